@@ -0,0 +1,173 @@
+"""
+Server-side analytics over daily scores.
+
+This module handles:
+- The per-user first/last daily score extraction (one window-function query)
+- Paired improvement statistics (paired t-test of last vs. first score)
+- A per-day cache of computed statistics
+"""
+import math
+from datetime import date
+from sqlalchemy import select, func, asc, Date
+from models import User, UserDailyScore
+from daily_questions import get_eastern_date
+
+_improvement_cache = {"date": None, "results": {}}
+
+
+def progress_query(min_days: int = 2, start_date: date | None = None, end_date: date | None = None):
+    """
+    One SELECT returning, per user with at least `min_days` completed days, the
+    first and last daily scores and dates plus days played. Window functions
+    over user_daily_scores partitioned by user_id replace a query per user.
+    `start_date`/`end_date` (inclusive) restrict which days count.
+    """
+    by_user = {
+        "partition_by": UserDailyScore.user_id,
+        "order_by": asc(UserDailyScore.date),
+        "rows": (None, None),
+    }
+    per_day = select(
+        UserDailyScore.user_id,
+        func.row_number().over(partition_by=UserDailyScore.user_id, order_by=asc(UserDailyScore.date)).label("rn"),
+        func.count().over(partition_by=UserDailyScore.user_id).label("days_played"),
+        func.first_value(UserDailyScore.avg_score).over(**by_user).label("first_score"),
+        func.first_value(UserDailyScore.date, type_=Date).over(**by_user).label("first_score_date"),
+        func.last_value(UserDailyScore.avg_score).over(**by_user).label("last_score"),
+        func.last_value(UserDailyScore.date, type_=Date).over(**by_user).label("last_score_date"),
+    )
+    if start_date:
+        per_day = per_day.where(UserDailyScore.date >= start_date)
+    if end_date:
+        per_day = per_day.where(UserDailyScore.date <= end_date)
+    per_day = per_day.subquery()
+
+    return (
+        select(
+            per_day.c.user_id,
+            User.display_name,
+            per_day.c.first_score,
+            per_day.c.first_score_date,
+            per_day.c.last_score,
+            per_day.c.last_score_date,
+            per_day.c.days_played,
+        )
+        .outerjoin(User, User.uid == per_day.c.user_id)
+        .where(per_day.c.rn == 1, per_day.c.days_played >= min_days)
+        .order_by(per_day.c.days_played.desc(), per_day.c.last_score.desc())
+    )
+
+
+def _betacf(a: float, b: float, x: float) -> float:
+    """Continued fraction for the incomplete beta function (modified Lentz)."""
+    tiny = 1e-300
+    qab, qap, qam = a + b, a + 1.0, a - 1.0
+    c, d = 1.0, 1.0 - qab * x / qap
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, 300):
+        m2 = 2 * m
+        aa = m * (b - m) * x / ((qam + m2) * (a + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + aa / c
+        c = c if abs(c) > tiny else tiny
+        h *= d * c
+        aa = -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + aa / c
+        c = c if abs(c) > tiny else tiny
+        delta = d * c
+        h *= delta
+        if abs(delta - 1.0) < 1e-15:
+            break
+    return h
+
+
+def _betainc(a: float, b: float, x: float) -> float:
+    """Regularized incomplete beta function I_x(a, b)."""
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    log_front = (
+        math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+        + a * math.log(x) + b * math.log1p(-x)
+    )
+    front = math.exp(log_front)
+    if x < (a + 1.0) / (a + b + 2.0):
+        return front * _betacf(a, b, x) / a
+    return 1.0 - front * _betacf(b, a, 1.0 - x) / b
+
+
+def t_two_sided_pvalue(t_stat: float, df: int) -> float:
+    """Two-sided p-value of Student's t distribution with `df` degrees of freedom."""
+    if math.isnan(t_stat):
+        return math.nan
+    if math.isinf(t_stat):
+        return 0.0
+    return _betainc(df / 2.0, 0.5, df / (df + t_stat * t_stat))
+
+
+def paired_improvement(first, last) -> dict:
+    """
+    Paired t-test of `last` against `first` (NumPy float arrays); same result
+    as scipy.stats.ttest_rel(last, first).
+    """
+    n = int(first.size)
+    diff = last - first
+    out = {
+        "n": n,
+        "mean_first": float(first.mean()) if n else None,
+        "mean_last": float(last.mean()) if n else None,
+        "mean_difference": float(diff.mean()) if n else None,
+        "variance_difference": None,
+        "t_statistic": None,
+        "p_value": None,
+        "df": n - 1 if n > 1 else None,
+    }
+    if n < 2:
+        return out
+
+    var = float(diff.var(ddof=1))
+    out["variance_difference"] = var
+    if var == 0.0:
+        # Every user changed by the same amount: t is undefined (no change) or infinite
+        out["p_value"] = None if out["mean_difference"] == 0.0 else 0.0
+        return out
+
+    t_stat = out["mean_difference"] / math.sqrt(var / n)
+    out["t_statistic"] = t_stat
+    out["p_value"] = t_two_sided_pvalue(t_stat, n - 1)
+    return out
+
+
+def improvement_stats(session, min_days: int = 2, start_date: date | None = None, end_date: date | None = None) -> dict:
+    """
+    Paired improvement statistics over every qualifying user's first and last
+    daily score. Cached per Eastern day and per filter combination.
+    """
+    import numpy as np  # only needed here; keeps NumPy out of app import time
+
+    today = get_eastern_date()
+    if _improvement_cache["date"] != today:
+        _improvement_cache["date"] = today
+        _improvement_cache["results"] = {}
+    key = (min_days, start_date, end_date)
+    cached = _improvement_cache["results"].get(key)
+    if cached is not None:
+        return cached
+
+    sub = progress_query(min_days, start_date, end_date).subquery()
+    rows = session.execute(select(sub.c.first_score, sub.c.last_score)).all()
+    scores = np.array(rows, dtype=np.float64).reshape(-1, 2)
+    result = {
+        **paired_improvement(scores[:, 0], scores[:, 1]),
+        "min_days": min_days,
+        "start_date": start_date.isoformat() if start_date else None,
+        "end_date": end_date.isoformat() if end_date else None,
+        "computed_for": today.isoformat(),
+    }
+    _improvement_cache["results"][key] = result
+    return result
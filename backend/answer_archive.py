@@ -0,0 +1,323 @@
+"""
+Monthly partitioning and cold archiving of user_answers.
+
+This module handles:
+- On Postgres, converting user_answers into a table range-partitioned by month,
+  and creating the upcoming months' partitions ahead of time
+- On SQLite, moving closed months out of user_answers into gzip-compressed
+  JSON-lines files, one per month (<ANSWER_ARCHIVE_DIR>/user_answers/YYYY-MM.jsonl.gz)
+- Reading archived rows back (iter_archived_answers) for exports and stats rebuilds
+
+Either way, queries for a hot day touch one month's worth of rows instead of
+the whole history. Archived months no longer back per-user guess history or
+past-day results: /api/results answers 410 for an archived day, and archiving
+takes the rows out of user_stats.answers_count so guess totals match the
+history that is served. Daily scores and score sums stay in the rollups.
+
+Usage (from backend/):
+    python answer_archive.py partition [--months-ahead 3]   # Postgres
+    python answer_archive.py archive [--keep-months 2]      # SQLite
+    python answer_archive.py list
+"""
+import os
+import re
+import gzip
+import json
+import heapq
+import argparse
+from pathlib import Path
+from datetime import date, datetime
+from sqlalchemy import select, update, delete, exists, func, text
+import db
+from db import SessionLocal, use_profile
+from models import UserAnswer, UserStats
+from daily_questions import get_eastern_date, backfill_user_stats
+
+ARCHIVE_DIR = Path(os.getenv("ANSWER_ARCHIVE_DIR", Path(__file__).resolve().parent / "data" / "archive")) / "user_answers"
+# Closed months kept in user_answers before `archive` moves them out
+KEEP_MONTHS = int(os.getenv("ANSWER_ARCHIVE_KEEP_MONTHS", "2"))
+MONTHS_AHEAD = int(os.getenv("ANSWER_PARTITION_MONTHS_AHEAD", "3"))
+ARCHIVE_BATCH_SIZE = 10_000
+
+_ARCHIVE_NAME = re.compile(r"^(\d{4})-(\d{2})\.jsonl\.gz$")
+_PARTITION_NAME = "user_answers_y{:04d}m{:02d}"
+_DEFAULT_PARTITION = "user_answers_default"
+
+
+def add_months(month: date, n: int) -> date:
+    """First day of the month `n` months after `month`'s."""
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _in_month(month: date):
+    return (UserAnswer.date >= month) & (UserAnswer.date < add_months(month, 1))
+
+
+def is_partitioned(conn) -> bool:
+    """Whether user_answers is already a partitioned table (Postgres)."""
+    return conn.execute(
+        text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass('user_answers')")
+    ).scalar() or False
+
+
+def _create_month_partition(conn, month: date, parent: str = "user_answers") -> str | None:
+    """Create `month`'s partition of `parent` unless it exists; returns its name if created."""
+    name = _PARTITION_NAME.format(month.year, month.month)
+    if conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar():
+        return None
+    bounds = {"start": month, "end": add_months(month, 1)}
+    stray = conn.execute(
+        text(f"SELECT 1 FROM {_DEFAULT_PARTITION} WHERE date >= :start AND date < :end LIMIT 1"), bounds
+    ).first()
+    if stray is None:
+        conn.execute(text(
+            f"CREATE TABLE {name} PARTITION OF {parent} "
+            f"FOR VALUES FROM ('{bounds['start']}') TO ('{bounds['end']}')"
+        ))
+        return name
+    # Rows for this month already landed in the default partition: move them over
+    conn.execute(text(f"ALTER TABLE {parent} DETACH PARTITION {_DEFAULT_PARTITION}"))
+    conn.execute(text(
+        f"CREATE TABLE {name} PARTITION OF {parent} "
+        f"FOR VALUES FROM ('{bounds['start']}') TO ('{bounds['end']}')"
+    ))
+    conn.execute(text(
+        f"INSERT INTO {name} SELECT * FROM {_DEFAULT_PARTITION} WHERE date >= :start AND date < :end"
+    ), bounds)
+    conn.execute(text(f"DELETE FROM {_DEFAULT_PARTITION} WHERE date >= :start AND date < :end"), bounds)
+    conn.execute(text(f"ALTER TABLE {parent} ATTACH PARTITION {_DEFAULT_PARTITION} DEFAULT"))
+    return name
+
+
+def ensure_month_partitions(conn, months_ahead: int = MONTHS_AHEAD, first: date | None = None,
+                            parent: str = "user_answers") -> list[str]:
+    """
+    Create partitions from `first`'s month (default: the current Eastern month)
+    through `months_ahead` months past the current one.
+    """
+    month = (first or get_eastern_date()).replace(day=1)
+    last = add_months(get_eastern_date().replace(day=1), months_ahead)
+    created = []
+    while month <= last:
+        name = _create_month_partition(conn, month, parent)
+        if name:
+            created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+def partition_user_answers(months_ahead: int = MONTHS_AHEAD) -> list[str]:
+    """
+    Convert user_answers into a monthly range-partitioned table (once), then make
+    sure upcoming months have partitions. Rows outside every month's range land in
+    a DEFAULT partition, so a missed run never rejects an insert.
+    The conversion copies the table inside one transaction and locks it meanwhile.
+    """
+    if db.engine.dialect.name != "postgresql":
+        raise SystemExit("Partitioning needs Postgres; on SQLite use `archive`")
+    with db.engine.begin() as conn:
+        if is_partitioned(conn):
+            return ensure_month_partitions(conn, months_ahead)
+        return _convert_to_partitioned(conn, months_ahead)
+
+
+def _convert_to_partitioned(conn, months_ahead: int) -> list[str]:
+    first = conn.execute(text("SELECT min(date) FROM user_answers")).scalar()
+    sequence = conn.execute(text("SELECT pg_get_serial_sequence('user_answers', 'id')")).scalar()
+
+    # The partition key has to be part of the primary key
+    conn.execute(text(
+        "CREATE TABLE user_answers_partitioned (LIKE user_answers INCLUDING DEFAULTS INCLUDING CONSTRAINTS, "
+        "CONSTRAINT user_answers_partitioned_pkey PRIMARY KEY (id, date)) PARTITION BY RANGE (date)"
+    ))
+    conn.execute(text(f"CREATE TABLE {_DEFAULT_PARTITION} PARTITION OF user_answers_partitioned DEFAULT"))
+    # Every month's partition exists before the copy, so rows go straight to their month
+    created = ensure_month_partitions(conn, months_ahead, first, parent="user_answers_partitioned")
+    conn.execute(text("INSERT INTO user_answers_partitioned SELECT * FROM user_answers"))
+    if sequence:
+        conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY user_answers_partitioned.id"))
+    conn.execute(text("DROP TABLE user_answers"))
+    conn.execute(text("ALTER TABLE user_answers_partitioned RENAME TO user_answers"))
+    conn.execute(text("ALTER TABLE user_answers RENAME CONSTRAINT user_answers_partitioned_pkey TO user_answers_pkey"))
+    # Indexes on the parent cascade to every partition, present and future
+    for index in UserAnswer.__table__.indexes:
+        index.create(conn)
+    return created
+
+
+def archive_path(month: date) -> Path:
+    return ARCHIVE_DIR / f"{month.year:04d}-{month.month:02d}.jsonl.gz"
+
+
+def archived_months() -> list[date]:
+    """First day of every archived month, oldest first."""
+    if not ARCHIVE_DIR.exists():
+        return []
+    months = []
+    for path in ARCHIVE_DIR.iterdir():
+        match = _ARCHIVE_NAME.match(path.name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def _encode(row: dict) -> dict:
+    return {k: v.isoformat() if isinstance(v, (date, datetime)) else v for k, v in row.items()}
+
+
+def _decode(record: dict) -> dict:
+    record["date"] = date.fromisoformat(record["date"])
+    if record.get("submitted_at"):
+        record["submitted_at"] = datetime.fromisoformat(record["submitted_at"])
+    return record
+
+
+def _read_month(path: Path):
+    """Raw (still encoded) records of one archive file, in (date, id) order."""
+    with gzip.open(path, "rt") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def is_archived(day: date) -> bool:
+    """Whether `day`'s month has been moved to the cold archive."""
+    return day.replace(day=1) in archived_months()
+
+
+def _month_in_db(session, month: date) -> bool:
+    return session.execute(select(UserAnswer.id).where(_in_month(month)).limit(1)).first() is not None
+
+
+def iter_archived_answers(start: date | None = None, end: date | None = None, session=None):
+    """
+    Archived user_answers rows (dicts of column values) with start <= date <= end,
+    ordered by (date, id). Only the month files overlapping the range are opened.
+    Months that still have rows in user_answers are skipped: an archive run
+    interrupted after publishing the file but before deleting the rows leaves
+    them in both places, and the database copy is the one readers already see.
+    """
+    months = [
+        month for month in archived_months()
+        if not ((start and add_months(month, 1) <= start) or (end and month > end))
+    ]
+    if not months:
+        return
+    if session is None:
+        with SessionLocal() as own_session:
+            months = [month for month in months if not _month_in_db(own_session, month)]
+    else:
+        months = [month for month in months if not _month_in_db(session, month)]
+    for month in months:
+        for record in _read_month(archive_path(month)):
+            record = _decode(record)
+            if (start and record["date"] < start) or (end and record["date"] > end):
+                continue
+            yield record
+
+
+def archive_month(session, month: date) -> int:
+    """
+    Move one month of user_answers into its archive file. Returns rows moved.
+    The file is fully written and renamed into place before the rows are
+    deleted; rerunning after an interruption merges instead of duplicating.
+    """
+    if not _month_in_db(session, month):
+        return 0
+    # Users losing these rows must have a rollup so their answer totals survive
+    missing = session.execute(
+        select(UserAnswer.user_id).distinct()
+        .where(_in_month(month), ~exists().where(UserStats.user_id == UserAnswer.user_id))
+    ).scalars().all()
+    for user_id in missing:
+        backfill_user_stats(session, user_id)
+
+    path = archive_path(month)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rows = session.execute(
+        select(*UserAnswer.__table__.columns)
+        .where(_in_month(month))
+        .order_by(UserAnswer.date, UserAnswer.id)
+        .execution_options(yield_per=ARCHIVE_BATCH_SIZE)
+    )
+    sources = [(_encode(dict(row._mapping)) for row in rows)]
+    if path.exists():
+        sources.append(_read_month(path))
+
+    tmp = path.with_name(path.name + ".tmp")
+    moved = 0
+    last_id = None
+    with open(tmp, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as out:
+            for record in heapq.merge(*sources, key=lambda r: (r["date"], r["id"])):
+                if record["id"] == last_id:
+                    continue
+                last_id = record["id"]
+                out.write((json.dumps(record, separators=(",", ":")) + "\n").encode())
+                moved += 1
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(tmp, path)
+
+    # Same transaction as the delete, so a rerun after an interruption counts each row once
+    in_month = (
+        select(func.count()).select_from(UserAnswer)
+        .where(UserAnswer.user_id == UserStats.user_id, _in_month(month))
+        .scalar_subquery()
+    )
+    session.execute(
+        update(UserStats)
+        .where(UserStats.user_id.in_(select(UserAnswer.user_id).where(_in_month(month))))
+        .values(answers_count=UserStats.answers_count - in_month)
+    )
+    session.execute(delete(UserAnswer).where(_in_month(month)))
+    session.commit()
+    return moved
+
+
+def archive_closed_months(keep_months: int = KEEP_MONTHS) -> dict:
+    """
+    Archive every month older than the current Eastern month and the
+    `keep_months` closed months before it. Returns {"YYYY-MM": rows}.
+    """
+    cutoff = add_months(get_eastern_date().replace(day=1), -keep_months)
+    moved = {}
+    with SessionLocal() as session:
+        first = session.execute(select(UserAnswer.date).order_by(UserAnswer.date).limit(1)).scalar()
+        month = first.replace(day=1) if first else cutoff
+        while month < cutoff:
+            count = archive_month(session, month)
+            if count:
+                moved[f"{month.year:04d}-{month.month:02d}"] = count
+            month = add_months(month, 1)
+    return moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Partition or archive user_answers by month.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    part = sub.add_parser("partition", help="Postgres: partition by month and create upcoming partitions")
+    part.add_argument("--months-ahead", type=int, default=MONTHS_AHEAD)
+    arch = sub.add_parser("archive", help="move closed months into compressed per-month files")
+    arch.add_argument("--keep-months", type=int, default=KEEP_MONTHS,
+                      help="closed months to keep in the database")
+    sub.add_parser("list", help="show archived months")
+    args = parser.parse_args()
+    use_profile("batch")
+
+    if args.command == "partition":
+        created = partition_user_answers(args.months_ahead)
+        print(f"Created partitions: {', '.join(created) or 'none needed'}")
+    elif args.command == "archive":
+        moved = archive_closed_months(args.keep_months)
+        for month, count in moved.items():
+            print(f"{month}: archived {count} rows")
+        print(f"Archived {sum(moved.values())} rows from {len(moved)} months into {ARCHIVE_DIR}")
+    else:
+        for month in archived_months():
+            path = archive_path(month)
+            print(f"{month:%Y-%m}  {path.stat().st_size / 1024:10.1f} KiB  {path}")
+
+
+if __name__ == "__main__":
+    main()
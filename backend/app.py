@@ -1,101 +1,65 @@
 import os
 import random
 import json
+from functools import wraps
 from pathlib import Path
-from flask import Flask, render_template, request, redirect, url_for, session, send_from_directory, jsonify
+from flask import Flask, Blueprint, Response, render_template, request, redirect, url_for, session, send_from_directory, jsonify
 from backend_logic import sample_unique_posts
-from db import SessionLocal, engine, Base
+from db import SessionLocal, session_scope, close_request_session, init_db, use_read_replica, note_write, wrote_recently, reading_from_replica
 from models import User as DBUser, UserRound as DBUserRound
 from flask_cors import CORS
 from daily_questions import (
-    get_eastern_date, ensure_daily_questions, get_user_answers_for_date,
+    get_eastern_date, parse_date, ensure_daily_questions, get_user_answers_for_date,
     has_user_completed_date, compute_rankings_for_date, get_user_historical_average,
-    DEFAULT_NUM_QUESTIONS
+    record_answer_stats, get_user_answer_total, DEFAULT_NUM_QUESTIONS
 )
-from db import SessionLocal
-from models import UserAnswer, UserDailyScore, DailyQuestion
-from sqlalchemy import select, func, asc
-
-app = Flask(__name__)
-
+from models import UserAnswer, UserDailyScore, DailyQuestion, SignupSurvey
+from leaderboard import (
+    get_total_users, note_user_created, leaderboard_page, get_user_rank,
+    LEADERBOARD_WINDOWS, get_window_leaderboard, window_rank_for_user
+)
+from live_updates import publisher, stream_topic, stream_slots
+from analytics import progress_query, improvement_stats
+from pagination import encode_cursor, decode_cursor
+from distributions import record_guess, get_distribution
+from answer_archive import is_archived
+from survey_store import save_survey_response
+from catalog import get_posts
+from game_store import game_store
+from scoring import answer_scores, score_batch, daily_averages
+import query_stats
+from cohorts import COHORT_FIELDS, upsert_signup_survey, cohort_scores, get_alltime_cohort_ranks
+from sqlalchemy import select, func, tuple_
+from datetime import datetime, date as date_type
 
+bp = Blueprint("game", __name__)
 
 
-app.secret_key = os.getenv("FLASK_SECRET_KEY", "dev-secret-key-change-in-production")
-CORS(app)
+def read_replica(view):
+    """
+    Serve a read-only endpoint from the read replica (when one is configured).
+    Read-your-writes: a user_id that wrote recently in this process, or a
+    request with fresh=1, is served from the primary instead. The write may
+    have gone to another worker, so the frontend sends fresh=1 on the results
+    fetch that follows the last submit.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        fresh = request.args.get("fresh") in ("1", "true") or wrote_recently(request.args.get("user_id"))
+        with use_read_replica(not fresh):
+            return view(*args, **kwargs)
+    return wrapper
 
-# Ensure tables exist (safe to call multiple times)
-try:
-    Base.metadata.create_all(bind=engine)
-except Exception:
-    # Avoid crashing if import paths are odd in certain run modes
-    pass
 
 # Default number of questions per quiz
 DEFAULT_NUM_QUESTIONS = 5
 
-def nonlinear_score(user, truth, alpha=0.3, beta=5):
-    diff = abs(user - truth)
-    denom = alpha * truth + beta
-    return 100 / (1 + (diff / denom)**2)
-
-# Cache available tweet posts on startup for performance
-def _load_all_posts():
-    """Load all available posts and cache them."""
-    base_path = Path(__file__).resolve().parent / "survey_metadata"
-    
-    if not base_path.exists():
-        return []
-    
-    all_posts = []
-    subdirs = [d for d in base_path.iterdir() if d.is_dir()]
-    
-    for subdir in subdirs:
-        img_files = [
-            f for f in subdir.iterdir() 
-            if f.suffix.lower() in [".png", ".jpg", ".jpeg"]
-        ]
-        
-        for img_path in img_files:
-            json_path = subdir / (img_path.stem + ".json")
-            
-            if not json_path.exists():
-                continue
-            
-            try:
-                with open(json_path, 'r') as f:
-                    gt = json.load(f)
-                
-                dem_value = gt.get("dem", None)
-                rep_value = gt.get("rep", None)
-                
-                if dem_value is None or rep_value is None:
-                    continue
-                
-                # Get relative path from survey_metadata directory
-                relative_path = img_path.relative_to(base_path)
-                
-                all_posts.append({
-                    "id": f"{subdir.name}/{img_path.stem}",
-                    "img_path": str(relative_path),
-                    "topic": subdir.name,
-                    "dem": dem_value,
-                    "rep": rep_value
-                })
-            except (json.JSONDecodeError, KeyError, IOError):
-                continue
-    
-    return all_posts
-
-# Cache posts on startup
-_cached_posts = _load_all_posts()
-
-@app.route("/")
+@bp.route("/")
 def index():
     """Redirect to start a new quiz."""
-    return redirect(url_for('start_quiz'))
+    return redirect(url_for('.start_quiz'))
 
-@app.route("/start")
+@bp.route("/start")
 def start_quiz():
     """Initialize session with 5 unique problems."""
     # Sample 5 unique posts
@@ -113,9 +77,9 @@ def start_quiz():
     session['responses'] = []
     
     # Redirect to first question
-    return redirect(url_for('display_problem'))
+    return redirect(url_for('.display_problem'))
 
-@app.route("/problem")
+@bp.route("/problem")
 def display_problem():
     """Display the current question."""
     problems = session.get('problems')
@@ -123,11 +87,11 @@ def display_problem():
     
     # Check if quiz is initialized
     if not problems:
-        return redirect(url_for('start_quiz'))
+        return redirect(url_for('.start_quiz'))
     
     # Check if all questions are answered
     if current_idx >= len(problems):
-        return redirect(url_for('show_results'))
+        return redirect(url_for('.show_results'))
     
     # Get current problem
     current_problem = problems[current_idx]
@@ -141,14 +105,14 @@ def display_problem():
                           total_questions=len(problems),
                           question_number=current_idx + 1)
 
-# @app.post("/submit_answer")
+# @bp.post("/submit_answer")
 # def submit_answer():
 #     """Process user answer and move to next question."""
 #     problems = session.get('problems')
 #     current_idx = session.get('current_idx', 0)
     
 #     if not problems or current_idx >= len(problems):
-#         return redirect(url_for('start_quiz'))
+#         return redirect(url_for('.start_quiz'))
     
 #     # Get user guesses
 #     dem_guess = float(request.form.get("dem_0", 0) or 0)
@@ -189,18 +153,18 @@ def display_problem():
     
 #     # Check if quiz is complete
 #     if current_idx + 1 >= len(problems):
-#         return redirect(url_for('show_results'))
+#         return redirect(url_for('.show_results'))
 #     else:
-#         return redirect(url_for('display_problem'))
+#         return redirect(url_for('.display_problem'))
 
-@app.route("/results")
+@bp.route("/results")
 def show_results():
     """Display results summary for all questions."""
     responses = session.get('responses', [])
     problems = session.get('problems', [])
     
     if not responses:
-        return redirect(url_for('start_quiz'))
+        return redirect(url_for('.start_quiz'))
     
     # Prepare comparison data for template
     comparison = []
@@ -237,53 +201,55 @@ def show_results():
                           average_score=average_score,
                           total_questions=len(responses))
 
-@app.route("/reset")
+@bp.route("/reset")
 def reset_quiz():
     """Clear session and start a new quiz."""
     session.clear()
-    return redirect(url_for('start_quiz'))
+    return redirect(url_for('.start_quiz'))
 
-@app.route("/api/restart", methods=['POST', 'GET'])
+def _current_game() -> tuple[str | None, list[dict] | None]:
+    """The (game_id, questions) of the caller's game: ?game_id=, a JSON game_id, or the session cookie."""
+    game_id = request.args.get('game_id')
+    if not game_id and request.is_json:
+        game_id = (request.get_json(silent=True) or {}).get('game_id')
+    game_id = game_id or session.get('game_id')
+    if not game_id:
+        return None, None
+    return game_id, game_store.get(game_id)
+
+@bp.route("/api/restart", methods=['POST', 'GET'])
 def restart_game():
     """Clear current game session to allow starting a new game."""
-    session.pop('game_questions', None)
-    session.pop('game_started', None)
+    game_id, _ = _current_game()
+    if game_id:
+        game_store.delete(game_id)
+    session.pop('game_id', None)
     return jsonify({"message": "Game session cleared. Call /api/start_game to begin a new game."})
 
-@app.route("/api/start_game", methods=['POST', 'GET'])
+@bp.route("/api/start_game", methods=['POST', 'GET'])
 def start_game():
     """Initialize a game session with 5 unique questions."""
-    global _cached_posts
-    
-    # Reload cache if empty (in case survey_metadata was updated)
-    if not _cached_posts:
-        _cached_posts = _load_all_posts()
-    
-    if not _cached_posts:
+    posts = get_posts()
+    if not posts:
         return jsonify({"error": "No posts available"}), 404
     
-    # Sample 5 unique posts (ensuring no duplicates)
-    if len(_cached_posts) < DEFAULT_NUM_QUESTIONS:
-        # If not enough posts, use what we have
-        selected_posts = _cached_posts
-    else:
-        # Sample without replacement
-        selected_posts = random.sample(_cached_posts, DEFAULT_NUM_QUESTIONS)
-    
-    # Store full question data in session (including ground truth)
-    session['game_questions'] = selected_posts
-    session['game_started'] = True
+    # Sample 5 unique posts (ensuring no duplicates). Question data (including
+    # ground truth) stays on the server or is re-drawn from the catalog; the
+    # cookie only holds the game id
+    game_id, selected_posts = game_store.start(posts)
+    session['game_id'] = game_id
     
     # Return list of question indices and total count
     return jsonify({
+        "game_id": game_id,
         "total_questions": len(selected_posts),
         "question_ids": list(range(len(selected_posts)))
     })
 
-@app.route("/api/get_question/<int:index>", methods=['GET'])
+@bp.route("/api/get_question/<int:index>", methods=['GET'])
 def get_question(index):
     """Return question at specified index (0-based) without ground truth."""
-    questions = session.get('game_questions')
+    _, questions = _current_game()
     
     if not questions:
         return jsonify({"error": "Game not started. Call /api/start_game first"}), 400
@@ -294,7 +260,7 @@ def get_question(index):
     post = questions[index]
     
     # Build image URL using url_for to point to the Flask-served static path
-    image_url = url_for('serve_survey_image', filename=post['img_path'])
+    image_url = url_for('.serve_survey_image', filename=post['img_path'])
     
     # Return only ID and image URL (no ground truth)
     return jsonify({
@@ -304,10 +270,10 @@ def get_question(index):
         "index": index
     })
 
-@app.route("/api/submit_results", methods=['POST'])
+@bp.route("/api/submit_results", methods=['POST'])
 def submit_results():
     """Accept user answers for all questions and return scored feedback."""
-    questions = session.get('game_questions')
+    game_id, questions = _current_game()
     
     if not questions:
         return jsonify({"error": "Game not started. Call /api/start_game first"}), 400
@@ -326,33 +292,35 @@ def submit_results():
     # Create a lookup map by question ID for efficient matching
     question_map = {q['id']: q for q in questions}
     
-    results = []
-    total_score_sum = 0
-    
+    answered = []
     for answer in user_answers:
         answer_id = answer.get('id')
         if not answer_id or answer_id not in question_map:
             continue
-        
-        question = question_map[answer_id]
-        user_dem = float(answer.get('user', {}).get('dem', 0))
-        user_rep = float(answer.get('user', {}).get('rep', 0))
-        
-        # Get ground truth
-        dem_gt = question['dem']
-        rep_gt = question['rep']
-        
-        # Compute scores (100 - absolute difference)
-        dem_score = nonlinear_score(user_dem, dem_gt)
-        rep_score = nonlinear_score(user_rep, rep_gt)
-        total_score = (dem_score + rep_score) / 2
-        # dem_score = max(0, 100 - abs(user_dem - dem_gt))
-        # rep_score = max(0, 100 - abs(user_rep - rep_gt))
-        # total_score = (dem_score + rep_score) / 2
+        answered.append((
+            question_map[answer_id],
+            float(answer.get('user', {}).get('dem', 0)),
+            float(answer.get('user', {}).get('rep', 0)),
+        ))
+    
+    # Compute every answer's scores in one vectorized pass
+    dem_scores, rep_scores, total_scores = score_batch(
+        [user_dem for _, user_dem, _ in answered],
+        [user_rep for _, _, user_rep in answered],
+        [question['dem'] for question, _, _ in answered],
+        [question['rep'] for question, _, _ in answered],
+    )
+    
+    results = []
+    total_score_sum = 0
+    
+    for (question, user_dem, user_rep), dem_score, rep_score, total_score in zip(
+        answered, dem_scores.tolist(), rep_scores.tolist(), total_scores.tolist()
+    ):
         total_score_sum += total_score
         
         # Build image URL
-        image_url = url_for('serve_survey_image', filename=question['img_path'])
+        image_url = url_for('.serve_survey_image', filename=question['img_path'])
         
         results.append({
             "id": question["id"],
@@ -363,8 +331,8 @@ def submit_results():
                 "rep": user_rep
             },
             "actual": {
-                "dem": dem_gt,
-                "rep": rep_gt
+                "dem": question['dem'],
+                "rep": question['rep']
             },
             "scores": {
                 "dem_score": round(dem_score, 2),
@@ -377,8 +345,8 @@ def submit_results():
     average_score = round(total_score_sum / len(results), 2) if results else 0
     
     # Clear game session
-    session.pop('game_questions', None)
-    session.pop('game_started', None)
+    game_store.delete(game_id)
+    session.pop('game_id', None)
     
     return jsonify({
         "results": results,
@@ -388,73 +356,30 @@ def submit_results():
 
 # --- User + Leaderboard endpoints (SQL-backed) ---
 
-@app.post("/api/users/ensure")
+@bp.post("/api/users/ensure")
 def api_users_ensure():
     data = request.get_json(silent=True) or {}
     uid = (data.get("uid") or "").strip()
     display = (data.get("displayName") or "").strip() or None
     if not uid:
         return jsonify({"error": "uid required"}), 400
-    with SessionLocal() as s:
+    with session_scope() as s:
         u = s.get(DBUser, uid)
         if not u:
             u = DBUser(uid=uid, display_name=display, score=0.0, games_played=0)
             s.add(u)
+            created = True
         else:
+            created = False
             if display and u.display_name != display:
                 u.display_name = display
         s.commit()
+    if created:
+        note_user_created()
     return jsonify({"ok": True})
 
 
-def save_survey_response(email, responses):
-    """Save survey responses to a local JSON file."""
-    # Ensure data directory exists
-    data_dir = os.path.join(os.path.dirname(__file__), "data")
-    os.makedirs(data_dir, exist_ok=True)
-    
-    survey_file = os.path.join(data_dir, "user_surveys.json")
-    
-    # Load existing data or create empty list
-    if os.path.exists(survey_file):
-        try:
-            with open(survey_file, "r") as f:
-                data = json.load(f)
-        except (json.JSONDecodeError, IOError):
-            data = []
-    else:
-        data = []
-    
-    # Map frontend survey response keys to backend format
-    mapped_responses = {
-        "party_identity": responses.get("partyIdentification", ""),
-        "ideology": responses.get("ideologicalOrientation", ""),
-        "warmth_dem": responses.get("feelingDemocrats"),
-        "warmth_rep": responses.get("feelingRepublicans"),
-        "engagement": responses.get("politicalNewsFollow", ""),
-        "empathy": responses.get("tryUnderstandOtherParty", ""),
-        "difference": responses.get("perceivedDifference", ""),
-        "age_range": responses.get("ageRange", ""),
-        "education_level": responses.get("educationLevel", ""),
-    }
-    
-    # Update or append
-    found = False
-    for entry in data:
-        if entry.get("email") == email:
-            entry.update(mapped_responses)
-            found = True
-            break
-    
-    if not found:
-        data.append({"email": email, **mapped_responses})
-    
-    # Save back to disk
-    with open(survey_file, "w") as f:
-        json.dump(data, f, indent=2)
-
-
-@app.post("/api/users/survey")
+@bp.post("/api/users/survey")
 def api_users_survey():
     """Save user survey responses during signup."""
     data = request.get_json(silent=True) or {}
@@ -465,18 +390,18 @@ def api_users_survey():
     if not uid:
         return jsonify({"error": "uid required"}), 400
     
-    # Save to JSON file if email is provided
+    # Append to the survey log if email is provided
     if email:
         try:
             save_survey_response(email, survey_responses)
         except Exception as e:
             # Log error but don't block account creation
-            print(f"Failed to save survey to JSON file: {e}")
+            print(f"Failed to save survey to survey log: {e}")
     
     # Convert survey responses to JSON string
     survey_json = json.dumps(survey_responses) if survey_responses else None
     
-    with SessionLocal() as s:
+    with session_scope() as s:
         u = s.get(DBUser, uid)
         if not u:
             # User doesn't exist yet, create with survey
@@ -488,15 +413,20 @@ def api_users_survey():
                 survey_responses=survey_json
             )
             s.add(u)
+            created = True
         else:
             # Update existing user's survey responses
             u.survey_responses = survey_json
+            created = False
+        upsert_signup_survey(s, uid, survey_responses)
         s.commit()
+    if created:
+        note_user_created()
     
     return jsonify({"ok": True})
 
 
-@app.post("/api/users/score")
+@bp.post("/api/users/score")
 def api_users_score():
     data = request.get_json(silent=True) or {}
     uid = (data.get("uid") or "").strip()
@@ -507,12 +437,14 @@ def api_users_score():
         return jsonify({"error": "average_score must be a number"}), 400
     if not uid:
         return jsonify({"error": "uid required"}), 400
-    with SessionLocal() as s:
+    with session_scope() as s:
         u = s.get(DBUser, uid)
         if not u:
             u = DBUser(uid=uid, display_name=display, score=avg, games_played=1)
             s.add(u)
+            created = True
         else:
+            created = False
             u.games_played = (u.games_played or 0) + 1
             # Keep the best score for leaderboard simplicity
             if u.score is None or avg > u.score:
@@ -523,15 +455,20 @@ def api_users_score():
         s.add(DBUserRound(user_uid=uid, average_score=avg))
         s.commit()
         out = {"ok": True, "score": u.score or 0.0, "games_played": u.games_played or 0}
+    if created:
+        note_user_created()
     return jsonify(out)
 
 
-@app.get("/api/leaderboard")
+@bp.get("/api/leaderboard")
+@read_replica
 def api_leaderboard():
     """Return leaderboard entries ordered by score desc.
     Query params:
       - limit: max entries to return (default 50, max 1000)
       - offset: offset for pagination (default 0)
+      - cursor: opaque keyset cursor from a previous page's next_cursor;
+        takes precedence over offset and stays fast on deep pages
     """
     try:
         limit = min(max(int(request.args.get("limit", 50)), 1), 1000)
@@ -541,16 +478,14 @@ def api_leaderboard():
         offset = max(int(request.args.get("offset", 0)), 0)
     except Exception:
         offset = 0
+    cursor = request.args.get("cursor") or None
 
-    with SessionLocal() as s:
-        total = s.execute(select(func.count()).select_from(DBUser)).scalar() or 0
-        q = (
-            select(DBUser)
-            .order_by((DBUser.score.is_(None)).asc(), DBUser.score.desc())
-            .offset(offset)
-            .limit(limit)
-        )
-        rows = s.execute(q).scalars().all()
+    with session_scope() as s:
+        total = get_total_users(s)
+        try:
+            rows, next_cursor = leaderboard_page(s, limit, offset=offset, cursor=cursor)
+        except ValueError:
+            return jsonify({"error": "invalid cursor"}), 400
         entries = [
             {
                 "id": u.uid,
@@ -560,34 +495,83 @@ def api_leaderboard():
             }
             for u in rows
         ]
-    return jsonify({"entries": entries, "total": int(total), "offset": offset, "limit": limit})
+    return jsonify({"entries": entries, "total": int(total), "offset": offset, "limit": limit, "next_cursor": next_cursor})
 
 
-@app.get("/api/leaderboard/user/<uid>")
+@bp.get("/api/leaderboard/user/<uid>")
 def api_leaderboard_user(uid: str):
     """Return a single user's leaderboard row with rank.
-    Rank is computed as 1 + count of users with a strictly higher score.
+    Rank is 1 + count of users with a strictly higher score, read by primary key
+    from the periodic leaderboard snapshot.
+    Query params:
+      - live: if 1, correct the snapshot rank for users who scored since it was taken
     """
     if not uid:
         return jsonify({"error": "uid required"}), 400
-    with SessionLocal() as s:
+    live = request.args.get("live", "0").lower() in ("1", "true", "yes")
+    with session_scope() as s:
         u = s.get(DBUser, uid)
         if not u:
             return jsonify({"error": "not found"}), 404
         score = u.score or 0.0
-        higher = s.execute(select(func.count()).select_from(DBUser).where(DBUser.score != None, DBUser.score > score)).scalar() or 0
         # Users with NULL score are treated as 0 and will rank below those with >0
-        rank = int(higher) + 1
-        total = s.execute(select(func.count()).select_from(DBUser)).scalar() or 0
+        rank, snapshot_at = get_user_rank(s, u, live=live)
+        total = get_total_users(s)
         return jsonify({
             "id": u.uid,
             "displayName": u.display_name,
             "score": float(score),
             "gamesPlayed": int(u.games_played or 0),
-            "rank": rank,
+            "rank": int(rank),
             "total": int(total),
+            "snapshot_at": snapshot_at.isoformat() if snapshot_at else None,
         })
-@app.route("/api/daily_questions", methods=['GET'])
+
+
+@bp.get("/api/leaderboard/<window>")
+def api_window_leaderboard(window: str):
+    """Return the daily-question leaderboard for a time window.
+    Path: window is one of today, week (last 7 Eastern days), all
+    Users are ranked by their mean daily score over the window.
+    Query params:
+      - limit: max entries to return (default 50, max 1000)
+      - offset: offset for pagination (default 0)
+    """
+    if window not in LEADERBOARD_WINDOWS:
+        return jsonify({"error": f"window must be one of {', '.join(LEADERBOARD_WINDOWS)}"}), 400
+    try:
+        limit = min(max(int(request.args.get("limit", 50)), 1), 1000)
+    except Exception:
+        limit = 50
+    try:
+        offset = max(int(request.args.get("offset", 0)), 0)
+    except Exception:
+        offset = 0
+
+    with session_scope() as s:
+        board = get_window_leaderboard(s, window)
+    return jsonify({
+        "window": window,
+        "date": board["date"].isoformat(),
+        "entries": board["entries"][offset:offset + limit],
+        "total": len(board["entries"]),
+        "offset": offset,
+        "limit": limit,
+    })
+
+
+@bp.get("/api/leaderboard/<window>/user/<uid>")
+def api_window_leaderboard_user(window: str, uid: str):
+    """Return a single user's row and rank on a windowed leaderboard."""
+    if window not in LEADERBOARD_WINDOWS:
+        return jsonify({"error": f"window must be one of {', '.join(LEADERBOARD_WINDOWS)}"}), 400
+    with session_scope() as s:
+        entry = window_rank_for_user(s, window, uid)
+    if entry is None:
+        return jsonify({"error": "not found"}), 404
+    return jsonify({"window": window, **entry})
+
+@bp.route("/api/daily_questions", methods=['GET'])
 def get_daily_questions():
     """
     Get today's daily questions (5 questions, same for all users).
@@ -633,13 +617,13 @@ def get_daily_questions():
     questions = questions[:DEFAULT_NUM_QUESTIONS]
     
     return jsonify({
-        "date": today,
+        "date": today.isoformat(),
         "questions": questions,
         "completed": completed,
         "total_questions": len(questions)
     })
 
-@app.route("/api/submit_answer", methods=['POST'])
+@bp.route("/api/submit_answer", methods=['POST'])
 def submit_answer():
     """
     Submit a single answer for a daily question.
@@ -664,7 +648,7 @@ def submit_answer():
     today = get_eastern_date()
     
     # Check if user already answered this question today
-    with SessionLocal() as session:
+    with session_scope() as session:
         existing = session.execute(
             select(UserAnswer).where(
                 UserAnswer.user_id == user_id,
@@ -727,9 +711,7 @@ def submit_answer():
             return jsonify({"error": "Question not found for today"}), 404
         
         # Compute score
-        dem_score = nonlinear_score(dem_guess, daily_q.dem)
-        rep_score = nonlinear_score(rep_guess, daily_q.rep)
-        total_score = (dem_score + rep_score) / 2
+        dem_score, rep_score, total_score = answer_scores(dem_guess, rep_guess, daily_q.dem, daily_q.rep)
         
         # Store answer
         user_answer = UserAnswer(
@@ -756,12 +738,12 @@ def submit_answer():
         ).scalars().all()
         
         completed_all = len(all_answers) >= DEFAULT_NUM_QUESTIONS
+        daily_score = None
         
         if completed_all:
-            # Calculate average scores
-            avg_score = sum(a.score for a in all_answers) / len(all_answers)
-            avg_score_dem = sum(a.score_dem for a in all_answers) / len(all_answers)
-            avg_score_rep = sum(a.score_rep for a in all_answers) / len(all_answers)
+            avg_score, avg_score_dem, avg_score_rep = daily_averages(
+                (a.score, a.score_dem, a.score_rep) for a in all_answers
+            )
             
             # Check if daily score already exists
             existing_score = session.execute(
@@ -772,16 +754,27 @@ def submit_answer():
             ).scalar_one_or_none()
             
             if not existing_score:
+                # Copy the user's survey cohorts so cohort ranks need no join
+                survey = session.get(SignupSurvey, user_id)
                 daily_score = UserDailyScore(
                     user_id=user_id,
                     date=today,
                     avg_score=avg_score,
                     avg_score_dem=avg_score_dem,
-                    avg_score_rep=avg_score_rep
+                    avg_score_rep=avg_score_rep,
+                    party_identity=survey.party_identity if survey else None,
+                    ideology=survey.ideology if survey else None
                 )
                 session.add(daily_score)
         
+        session.flush()
+        record_answer_stats(session, user_id, daily_score)
+        record_guess(session, today, question_id, dem_guess, rep_guess, daily_q.dem, daily_q.rep)
         session.commit()
+        note_write(user_id)
+        if daily_score is not None:
+            # Push the new daily score to open leaderboard/results streams
+            publisher.notify()
         
         # Build immediate feedback payload
         def dir_str(guess, actual):
@@ -806,31 +799,41 @@ def submit_answer():
             }
         })
 
-@app.route("/api/results", methods=['GET'])
+@bp.route("/api/results", methods=['GET'])
+@read_replica
 def get_results():
     """
     Get results for a user for today (or specified date).
     Query params: user_id (required), date (optional, defaults to today)
     Returns comprehensive results with rankings and per-question breakdown.
+    A day in an archived month (answer_archive.py) answers 410.
     """
     user_id = request.args.get('user_id')
     if not user_id:
         return jsonify({"error": "Missing user_id parameter"}), 400
     
-    date = request.args.get('date') or get_eastern_date()
+    try:
+        date = parse_date(request.args.get('date')) or get_eastern_date()
+    except ValueError:
+        return jsonify({"error": "date must be YYYY-MM-DD"}), 400
     
     # Get user's answers for this date
     user_answers = get_user_answers_for_date(user_id, date)
     
     if not user_answers:
+        if is_archived(date):
+            return jsonify({
+                "error": "Results for this date have been archived",
+                "date": date.isoformat(),
+            }), 410
         return jsonify({
             "error": "No answers found for this date",
-            "date": date,
+            "date": date.isoformat(),
             "completed": False
         }), 404
     
     # Get daily questions for this date
-    with SessionLocal() as session:
+    with session_scope() as session:
         daily_questions = session.execute(
             select(DailyQuestion)
             .where(DailyQuestion.date == date)
@@ -982,6 +985,17 @@ def get_results():
         if historical_avg_rep is not None:
             delta_from_historical_rep = round(avg_score_rep - historical_avg_rep, 1)
         
+        # Ranks within the user's party identity / ideology cohorts: today's come
+        # from the rankings above, all-time ones from the cached rollup ranking
+        alltime_cohort_ranks = get_alltime_cohort_ranks(session)
+        cohort_ranks = {
+            field: {
+                "today": rankings['cohort_ranks'][field].get(user_id),
+                "all_time": alltime_cohort_ranks[field].get(user_id),
+            }
+            for field in rankings['cohort_ranks']
+        }
+        
         # Get daily score if exists
         daily_score = session.execute(
             select(UserDailyScore).where(
@@ -1008,26 +1022,94 @@ def get_results():
         "delta_from_historical_overall": delta_from_historical_overall,
         "best_question": {"dem": best_question_idx_dem, "rep": best_question_idx_rep},
         "worst_question": {"dem": worst_question_idx_dem, "rep": worst_question_idx_rep},
+        "cohort_ranks": cohort_ranks,
         "questions": questions
     })
 
-@app.route("/api/random_tweet", methods=['GET'])
+@bp.route("/api/questions/distribution", methods=['GET'])
+def get_question_distribution():
+    """
+    How everyone else guessed on a daily question.
+    Query params: question_id (required), date (optional, defaults to today),
+    user_id (required for today's questions; the user must have answered it)
+    Returns a 2D histogram of (dem, rep) guesses and per-axis error histograms,
+    read from counters maintained as answers are submitted.
+    """
+    question_id = request.args.get('question_id')
+    if not question_id:
+        return jsonify({"error": "Missing question_id parameter"}), 400
+    today = get_eastern_date()
+    try:
+        date = parse_date(request.args.get('date')) or today
+    except ValueError:
+        return jsonify({"error": "date must be YYYY-MM-DD"}), 400
+
+    with session_scope() as session:
+        if date >= today:
+            # Don't reveal today's crowd guesses before the user has made their own
+            user_id = request.args.get('user_id')
+            answered = user_id and session.execute(
+                select(UserAnswer.id).where(
+                    UserAnswer.user_id == user_id,
+                    UserAnswer.date == date,
+                    UserAnswer.question_id == question_id
+                )
+            ).first()
+            if not answered:
+                return jsonify({"error": "Answer this question before viewing its distribution"}), 403
+        return jsonify(get_distribution(session, date, question_id))
+
+def _sse_response(topic):
+    # Each stream holds a worker thread; past the cap, turn clients away instead of starving other requests
+    if not stream_slots.acquire(blocking=False):
+        return jsonify({"error": "Too many open streams; retry shortly"}), 503, {"Retry-After": "5"}
+    response = Response(
+        stream_topic(topic),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    response.call_on_close(stream_slots.release)
+    return response
+
+@bp.get("/api/stream/leaderboard")
+def stream_leaderboard():
+    """
+    Server-Sent Events stream of windowed leaderboard rank changes.
+    Query param: window (today, week, all; default today)
+    Sends a `snapshot` event with every ranked user, then `ranks` events
+    holding only users whose rank or score changed.
+    """
+    window = request.args.get("window", "today")
+    if window not in LEADERBOARD_WINDOWS:
+        return jsonify({"error": f"window must be one of {', '.join(LEADERBOARD_WINDOWS)}"}), 400
+    return _sse_response(("leaderboard", window))
+
+@bp.get("/api/stream/results")
+def stream_results():
+    """
+    Server-Sent Events stream of daily rank changes for a date.
+    Query param: date (optional, defaults to today)
+    Sends a `snapshot` event with every user's daily ranks, then `ranks` events
+    as new daily scores land.
+    """
+    try:
+        date = parse_date(request.args.get('date')) or get_eastern_date()
+    except ValueError:
+        return jsonify({"error": "date must be YYYY-MM-DD"}), 400
+    return _sse_response(("results", date))
+
+@bp.route("/api/random_tweet", methods=['GET'])
 def random_tweet():
     """Return one randomly sampled tweet + metadata."""
-    global _cached_posts
-    
-    # Reload cache if empty (in case survey_metadata was updated)
-    if not _cached_posts:
-        _cached_posts = _load_all_posts()
-    
-    if not _cached_posts:
+    posts = get_posts()
+    if not posts:
         return jsonify({"error": "No posts available"}), 404
     
     # Randomly sample one post
-    post = random.choice(_cached_posts)
+    post = random.choice(posts)
     
     # Build image URL using url_for to point to the Flask-served static path
-    image_url = url_for('serve_survey_image', filename=post['img_path'])
+    image_url = url_for('.serve_survey_image', filename=post['img_path'])
     
     # Return JSON without ground-truth for gameplay fairness
     # The frontend will get dem/rep values after submission if needed
@@ -1040,7 +1122,7 @@ def random_tweet():
         "rep": post["rep"]
     })
 
-@app.route("/survey_metadata/<path:filename>")
+@bp.route("/survey_metadata/<path:filename>")
 def serve_survey_image(filename):
     """Serve images from survey_metadata directory, handling nested paths."""
     base_path = Path(__file__).resolve().parent / "survey_metadata"
@@ -1060,107 +1142,270 @@ def serve_survey_image(filename):
     filename_only = file_path.name
     return send_from_directory(directory, filename_only)
 
-@app.route("/api/user/guesses", methods=['GET'])
+# Rows fetched per round-trip when streaming NDJSON exports
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "500"))
+
+def _wants_ndjson():
+    """True if the client asked for newline-delimited JSON (?format=ndjson or Accept header)."""
+    if request.args.get("format") == "ndjson":
+        return True
+    return "application/x-ndjson" in request.headers.get("Accept", "")
+
+def _ndjson_response(stmt, to_dict, scalars=False):
+    """
+    Stream `stmt` as NDJSON, one object per line.
+    Rows are fetched STREAM_BATCH_SIZE at a time through yield_per (a server-side
+    cursor on Postgres), so worker memory stays flat regardless of result size.
+    """
+    on_replica = reading_from_replica()
+
+    def generate():
+        # The body is produced after the view returns; keep the view's routing
+        with use_read_replica(on_replica), SessionLocal() as session:
+            result = session.execute(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+            rows = result.scalars() if scalars else result
+            for row in rows:
+                yield json.dumps(to_dict(row)) + "\n"
+    return Response(generate(), mimetype="application/x-ndjson")
+
+def _guess_dict(ua):
+    return {
+        "date": ua.date.isoformat(),
+        "question_id": ua.question_id,
+        "dem_guess": ua.dem_guess,
+        "rep_guess": ua.rep_guess,
+        "actual_dem": ua.actual_dem,
+        "actual_rep": ua.actual_rep,
+        "score": ua.score,
+        "score_dem": ua.score_dem,
+        "score_rep": ua.score_rep,
+        "submitted_at": ua.submitted_at.isoformat() if ua.submitted_at else None
+    }
+
+def _guess_cursor(ua):
+    submitted = ua.submitted_at.isoformat() if ua.submitted_at else None
+    return encode_cursor([ua.date.isoformat(), submitted, ua.id])
+
+def _after_guess_cursor(cursor):
+    """WHERE clause for guesses older than the cursor (date, submitted_at, id all descending)."""
+    date, submitted, answer_id = decode_cursor(cursor, 3)
+    try:
+        date = date_type.fromisoformat(date)
+        submitted_at = datetime.fromisoformat(submitted)
+    except (TypeError, ValueError) as e:
+        raise ValueError("invalid cursor") from e
+    if not isinstance(answer_id, int) or isinstance(answer_id, bool):
+        raise ValueError("invalid cursor")
+    return tuple_(UserAnswer.date, UserAnswer.submitted_at, UserAnswer.id) < tuple_(date, submitted_at, answer_id)
+
+@bp.route("/api/user/guesses", methods=['GET'])
+@read_replica
 def get_user_guesses():
     """
-    Returns a user's history of guesses.
+    Returns a user's history of guesses, newest first.
     Query param: user_id (required)
-    Optional: limit, offset
+    Optional: limit (default 100, max 1000), offset, cursor, format=ndjson
+    cursor is the opaque next_cursor of the previous page; it seeks on the
+    (user_id, date, submitted_at) index instead of skipping OFFSET rows.
+    total is the user's overall number of guesses, not the page size.
+    Months moved to the cold archive (answer_archive.py) are not served and
+    not counted in total.
+    With format=ndjson, streams one guess per line and only applies
+    limit/offset when they are given explicitly.
     """
     user_id = request.args.get('user_id')
     if not user_id:
         return jsonify({"error": "Missing user_id parameter"}), 400
 
-    # Add limit/offset if you want pagination
+    ndjson = _wants_ndjson()
+    default_limit = None if ndjson else 100
     try:
-        limit = int(request.args.get('limit', 100))
-        offset = int(request.args.get('offset', 0))
+        limit = max(int(request.args['limit']), 1) if 'limit' in request.args else default_limit
     except Exception:
-        limit, offset = 100, 0
-
-    with SessionLocal() as session:
-        answers_q = (session.query(UserAnswer)
-            .filter(UserAnswer.user_id == user_id)
-            .order_by(UserAnswer.date.desc(), UserAnswer.submitted_at.desc())
-            .offset(offset)
-            .limit(limit)
-        )
-        answers = answers_q.all()
-        results = []
-        for ua in answers:
-            results.append({
-                "date": ua.date,
-                "question_id": ua.question_id,
-                "dem_guess": ua.dem_guess,
-                "rep_guess": ua.rep_guess,
-                "actual_dem": ua.actual_dem,
-                "actual_rep": ua.actual_rep,
-                "score": ua.score,
-                "score_dem": ua.score_dem,
-                "score_rep": ua.score_rep,
-                "submitted_at": ua.submitted_at.isoformat() if ua.submitted_at else None
-            })
-        return jsonify({"guesses": results, "total": len(results)})
+        limit = default_limit
+    if not ndjson:
+        limit = min(limit, 1000)
+    try:
+        offset = max(int(request.args.get('offset', 0)), 0)
+    except Exception:
+        offset = 0
+    cursor = request.args.get('cursor') or None
+
+    stmt = (
+        select(UserAnswer)
+        .where(UserAnswer.user_id == user_id)
+        .order_by(UserAnswer.date.desc(), UserAnswer.submitted_at.desc(), UserAnswer.id.desc())
+    )
+    if cursor:
+        try:
+            stmt = stmt.where(_after_guess_cursor(cursor))
+        except ValueError:
+            return jsonify({"error": "invalid cursor"}), 400
+    else:
+        stmt = stmt.offset(offset)
+    if ndjson:
+        return _ndjson_response(stmt.limit(limit), _guess_dict, scalars=True)
+
+    with session_scope() as session:
+        # Fetch one extra row to know whether another page exists
+        answers = session.execute(stmt.limit(limit + 1)).scalars().all()
+        next_cursor = _guess_cursor(answers[limit - 1]) if len(answers) > limit else None
+        results = [_guess_dict(ua) for ua in answers[:limit]]
+        total = get_user_answer_total(session, user_id)
+        return jsonify({"guesses": results, "total": total, "next_cursor": next_cursor})
+
+def _user_id_dict(row):
+    return {"user_id": row.uid, "display_name": row.display_name}
 
-@app.route("/api/user_ids", methods=['GET'])
+@bp.route("/api/user_ids", methods=['GET'])
 def get_user_ids():
     """
-    Returns a list of all user ids (and optionally display names).
+    Returns a page of user ids and display names, ordered by user id.
+    Optional: limit (default 1000, max 10000), offset, cursor, format=ndjson
+    cursor is the opaque next_cursor of the previous page. Only the two
+    emitted columns are selected. format=ndjson streams every user, one per line.
     """
-    with SessionLocal() as session:
-        users = session.query(DBUser).all()
-        results = [{"user_id": u.uid, "display_name": u.display_name} for u in users]
-    return jsonify({"users": results, "total": len(results)})
+    stmt = select(DBUser.uid, DBUser.display_name).order_by(DBUser.uid)
+    if _wants_ndjson():
+        return _ndjson_response(stmt, _user_id_dict)
+
+    try:
+        limit = min(max(int(request.args.get("limit", 1000)), 1), 10000)
+    except Exception:
+        limit = 1000
+    try:
+        offset = max(int(request.args.get("offset", 0)), 0)
+    except Exception:
+        offset = 0
+    cursor = request.args.get("cursor") or None
+    if cursor:
+        try:
+            (after_uid,) = decode_cursor(cursor, 1)
+        except ValueError:
+            return jsonify({"error": "invalid cursor"}), 400
+        if not isinstance(after_uid, str):
+            return jsonify({"error": "invalid cursor"}), 400
+        stmt = stmt.where(DBUser.uid > after_uid)
+    else:
+        stmt = stmt.offset(offset)
+
+    with session_scope() as session:
+        # Fetch one extra row to know whether another page exists
+        rows = session.execute(stmt.limit(limit + 1)).all()
+        total = get_total_users(session)
+    next_cursor = encode_cursor([rows[limit - 1].uid]) if len(rows) > limit else None
+    results = [_user_id_dict(row) for row in rows[:limit]]
+    return jsonify({"users": results, "total": total, "next_cursor": next_cursor})
 
 
-@app.get("/api/users/progress")
+def _progress_dict(row):
+    return {
+        "user_id": row.user_id,
+        "display_name": row.display_name,
+        "first_score": round(row.first_score, 2),
+        "first_score_date": row.first_score_date.isoformat(),
+        "last_score": round(row.last_score, 2),
+        "last_score_date": row.last_score_date.isoformat(),
+        "days_played": row.days_played
+    }
+
+@bp.get("/api/users/progress")
+@read_replica
 def users_progress():
     """
     Returns all users who played on more than 1 day,
     with their first and last scores and dates.
+    Optional: format=ndjson to stream one user per line.
     """
-    results = []
-    with SessionLocal() as session:
-        # Get users who played more than 1 day (count > 1)
-        user_day_counts = (
-            session.query(
-                UserDailyScore.user_id,
-                func.count(UserDailyScore.date).label("days_played")
-            )
-            .group_by(UserDailyScore.user_id)
-            .having(func.count(UserDailyScore.date) > 1)
-            .all()
-        )
-        user_ids = [row.user_id for row in user_day_counts]
-        if not user_ids:
-            return jsonify(results)  # return empty array
-
-        # Preload display names for users
-        user_lookup = {
-            u.uid: u.display_name
-            for u in session.query(DBUser).filter(DBUser.uid.in_(user_ids)).all()
-        }
-        # For each such user, find first and last scores + dates
-        for row in user_day_counts:
-            scores = (
-                session.query(UserDailyScore)
-                .filter(UserDailyScore.user_id == row.user_id)
-                .order_by(asc(UserDailyScore.date))
-                .all()
-            )
-            if not scores or len(scores) < 2:
-                continue  # skip defensively
-            first = scores[0]
-            last = scores[-1]
-            results.append({
-                "user_id": row.user_id,
-                "display_name": user_lookup.get(row.user_id),
-                "first_score": round(first.avg_score, 2),
-                "first_score_date": first.date,
-                "last_score": round(last.avg_score, 2),
-                "last_score_date": last.date,
-                "days_played": row.days_played
-            })
-    # Optional: sort by most days played, or whatever you want
-    results.sort(key=lambda x: (x["days_played"], x["last_score"]), reverse=True)
-    return jsonify(results)
\ No newline at end of file
+    if _wants_ndjson():
+        return _ndjson_response(progress_query(), _progress_dict)
+
+    with session_scope() as session:
+        rows = session.execute(progress_query()).all()
+    results = [_progress_dict(row) for row in rows]
+    return jsonify(results)
+
+
+@bp.get("/api/stats/improvement")
+def stats_improvement():
+    """
+    Paired improvement statistics of users' last vs. first daily score
+    (paired t-test), computed server-side and cached per day.
+    Optional: min_days (default 2), start_date, end_date (YYYY-MM-DD)
+    """
+    try:
+        min_days = max(int(request.args.get("min_days", 2)), 2)
+    except Exception:
+        return jsonify({"error": "min_days must be an integer"}), 400
+    try:
+        start_date = parse_date(request.args.get("start_date"))
+        end_date = parse_date(request.args.get("end_date"))
+    except ValueError:
+        return jsonify({"error": "start_date and end_date must be YYYY-MM-DD"}), 400
+
+    with session_scope() as session:
+        stats = improvement_stats(session, min_days, start_date, end_date)
+    return jsonify(stats)
+
+
+@bp.get("/api/stats/cohorts")
+def stats_cohorts():
+    """
+    Average daily scores per signup survey cohort.
+    Query: by (party_identity | ideology | ...; default party_identity),
+    optional start_date, end_date (YYYY-MM-DD)
+    """
+    by = request.args.get("by", "party_identity")
+    if by not in COHORT_FIELDS:
+        return jsonify({"error": f"by must be one of: {', '.join(COHORT_FIELDS)}"}), 400
+    try:
+        start_date = parse_date(request.args.get("start_date"))
+        end_date = parse_date(request.args.get("end_date"))
+    except ValueError:
+        return jsonify({"error": "start_date and end_date must be YYYY-MM-DD"}), 400
+
+    with session_scope() as session:
+        cohorts = cohort_scores(session, by, start_date, end_date)
+    return jsonify({
+        "by": by,
+        "start_date": start_date.isoformat() if start_date else None,
+        "end_date": end_date.isoformat() if end_date else None,
+        "cohorts": cohorts,
+    })
+
+
+def create_app() -> Flask:
+    """
+    Build the Flask app. Importing this module has no other side effects:
+    tables are created by init_db() (gunicorn master, `flask --app app init-db`
+    or `python app.py`) and the post catalog loads on first use, or once in
+    the gunicorn master via catalog.preload().
+    """
+    app = Flask(__name__)
+    app.secret_key = os.getenv("FLASK_SECRET_KEY", "dev-secret-key-change-in-production")
+    CORS(app)
+    app.register_blueprint(bp)
+    # One session per request, shared by the view and its helpers (db.get_session)
+    app.teardown_appcontext(close_request_session)
+    query_stats.init_app(app)
+
+    @app.cli.command("init-db")
+    def init_db_command():
+        """Create any missing tables."""
+        init_db()
+
+    return app
+
+
+def __getattr__(name):
+    # `gunicorn app:app` and other `app.app` users get an instance built on first access
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+if __name__ == "__main__":
+    init_db()
+    create_app().run(host="0.0.0.0", port=int(os.getenv("PORT", "5000")), debug=True)
@@ -3,12 +3,12 @@ import random
 import os
 import json
 from pathlib import Path
-from db import SessionLocal
+from db import session_scope
 from models import Survey, Post, Question, Response
 from sqlalchemy import select, desc
 
 def load_posts(limit=50, topic_id=None):
-    with SessionLocal() as s:
+    with session_scope() as s:
         stmt = select(Post).order_by(Post.id.desc()).limit(limit)
         if topic_id:
             stmt = stmt.filter(Post.topic_id == topic_id)
@@ -24,7 +24,7 @@ def load_posts(limit=50, topic_id=None):
         ]
 
 def get_question_with_responses(question_id: int):
-    with SessionLocal() as s:
+    with session_scope() as s:
         q = s.get(Question, question_id)
         if not q: return None
         return {
@@ -37,7 +37,7 @@ def get_question_with_responses(question_id: int):
 
 # backend/backend_logic.py
 from sqlalchemy import select
-from db import SessionLocal
+from db import session_scope
 from models import Response
 
 def get_actual_for_question(question_id: int, response_text: str) -> dict:
@@ -50,7 +50,7 @@ def get_actual_for_question(question_id: int, response_text: str) -> dict:
 
     norm_target = response_text.strip().lower()
 
-    with SessionLocal() as s:
+    with session_scope() as s:
         rows = s.execute(
             select(Response).where(Response.question_id == question_id)
         ).scalars().all()
@@ -0,0 +1,98 @@
+"""
+Benchmark concurrent /api/submit_answer throughput under each DB_PROFILE.
+
+Each profile runs in a fresh subprocess (db.py reads DB_PROFILE at import)
+against its own scratch SQLite file, or against --database-url. Requests go
+through the Flask test client from a pool of threads, one simulated user per
+task answering all of today's questions.
+
+Usage (from backend/):
+    python bench_db_profiles.py [--users 200] [--threads 8] [--profiles web default]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+
+def run_worker(users: int, threads: int) -> dict:
+    """Play `users` users' days concurrently and report throughput."""
+    from app import create_app
+    from db import engine, init_db, DB_PROFILE
+    from daily_questions import get_eastern_date, ensure_daily_questions
+
+    init_db()
+    app = create_app()
+    questions = ensure_daily_questions(get_eastern_date())
+    if not questions:
+        raise SystemExit("No daily questions available (is survey_metadata present?)")
+
+    def play(user_idx: int) -> tuple[int, int]:
+        client = app.test_client()
+        ok = failed = 0
+        for i, q in enumerate(questions):
+            try:
+                resp = client.post("/api/submit_answer", json={
+                    "user_id": f"bench-{os.getpid()}-{user_idx}",
+                    "question_id": q["id"],
+                    "user": {"dem": (user_idx * 7 + i) % 101, "rep": (user_idx * 13 + i) % 101},
+                })
+                ok, failed = (ok + 1, failed) if resp.status_code == 200 else (ok, failed + 1)
+            except Exception:
+                failed += 1
+        return ok, failed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(play, range(users)))
+    elapsed = time.perf_counter() - start
+
+    ok = sum(r[0] for r in results)
+    failed = sum(r[1] for r in results)
+    return {
+        "profile": DB_PROFILE,
+        "dialect": engine.dialect.name,
+        "requests": ok + failed,
+        "failed": failed,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round((ok + failed) / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare DB_PROFILE settings on concurrent submit_answer load.")
+    parser.add_argument("--users", type=int, default=200, help="simulated users (5 answers each)")
+    parser.add_argument("--threads", type=int, default=8, help="concurrent request threads")
+    parser.add_argument("--profiles", nargs="+", default=["default", "web", "batch"])
+    parser.add_argument("--database-url", help="benchmark this database instead of scratch SQLite files")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.users, args.threads)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile in args.profiles:
+            env = dict(os.environ, DB_PROFILE=profile, GUNICORN_THREADS=str(args.threads))
+            env["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tmp, profile + '.db')}"
+            proc = subprocess.run(
+                [sys.executable, __file__, "--worker", "--users", str(args.users), "--threads", str(args.threads)],
+                env=env, capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                print(f"{profile}: failed\n{proc.stderr.strip()}")
+                continue
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            print(
+                f"{profile:>8} ({result['dialect']}): {result['requests']} requests in {result['seconds']}s"
+                f" = {result['requests_per_second']} req/s, {result['failed']} failed"
+            )
+
+
+if __name__ == "__main__":
+    main()
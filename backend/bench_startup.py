@@ -0,0 +1,105 @@
+"""
+Benchmark backend startup: module import, app construction and first request.
+
+Each run is a fresh interpreter against a scratch SQLite file, so nothing is
+warm. Phases are timed separately so a regression can be pinned to one:
+
+    import       import app (should touch neither the database nor survey_metadata)
+    create_app   build the Flask app and register routes
+    init_db      create tables (gunicorn master only, not per worker)
+    catalog      walk survey_metadata (gunicorn master only, via catalog.preload)
+    first_req    first GET /api/leaderboard through the test client
+
+Usage (from backend/):
+    python bench_startup.py [--runs 5] [--json]
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+PHASES = ("import", "create_app", "init_db", "catalog", "first_req")
+
+
+def run_once() -> dict:
+    """Time each startup phase in this (fresh) interpreter."""
+    from time import perf_counter
+
+    timings = {}
+    start = perf_counter()
+    import app as backend
+    timings["import"] = perf_counter() - start
+
+    start = perf_counter()
+    flask_app = backend.create_app()
+    timings["create_app"] = perf_counter() - start
+
+    from db import init_db
+    import catalog
+
+    start = perf_counter()
+    init_db()
+    timings["init_db"] = perf_counter() - start
+
+    start = perf_counter()
+    posts = catalog.preload()
+    timings["catalog"] = perf_counter() - start
+
+    start = perf_counter()
+    status = flask_app.test_client().get("/api/leaderboard?limit=10").status_code
+    timings["first_req"] = perf_counter() - start
+
+    return {
+        "timings": timings,
+        "posts": posts,
+        "status": status,
+        "modules": len(sys.modules),
+        "psycopg2_loaded": "psycopg2" in sys.modules,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time backend import and boot phases.")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to time (median is reported)")
+    parser.add_argument("--json", action="store_true", help="print one JSON object instead of a table")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_once()))
+        return
+
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(args.runs):
+            env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, f'startup-{i}.db')}")
+            proc = subprocess.run([sys.executable, __file__, "--worker"], env=env, capture_output=True, text=True)
+            if proc.returncode != 0:
+                raise SystemExit(proc.stderr.strip())
+            runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    medians = {phase: statistics.median(r["timings"][phase] for r in runs) for phase in PHASES}
+    last = runs[-1]
+    if args.json:
+        print(json.dumps({
+            "runs": args.runs,
+            "median_seconds": medians,
+            "posts": last["posts"],
+            "modules": last["modules"],
+            "psycopg2_loaded": last["psycopg2_loaded"],
+        }))
+        return
+
+    print(f"Median of {args.runs} fresh interpreters:")
+    for phase in PHASES:
+        print(f"  {phase:<11} {medians[phase] * 1000:8.1f} ms")
+    print(f"  worker boot {(medians['import'] + medians['create_app']) * 1000:8.1f} ms (import + create_app)")
+    print(f"  {last['posts']} catalog posts, {last['modules']} modules loaded, "
+          f"psycopg2 loaded: {last['psycopg2_loaded']}, first request status {last['status']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Catalog of playable posts (survey_metadata/<topic>/<image> plus its ground-truth JSON).
+
+This module handles:
+- Walking survey_metadata once per process, on first use rather than at import
+- Preloading in the gunicorn master (see gunicorn.conf.py) so forked workers
+  inherit the loaded catalog instead of each walking the directory again
+- A stable post order and a content version, so a seed replays the same
+  selection on any worker or host (see game_store.TokenGameStore)
+"""
+import json
+import hashlib
+import threading
+from pathlib import Path
+
+SURVEY_METADATA_DIR = Path(__file__).resolve().parent / "survey_metadata"
+
+_catalog = {"posts": None, "version": None}
+_catalog_lock = threading.Lock()
+
+
+def load_posts(base_path: Path = SURVEY_METADATA_DIR) -> list[dict]:
+    """
+    Load all available posts from the survey_metadata directory.
+    Returns list of dicts with keys: id, img_path, dem, rep, topic, ordered by id
+    """
+    if not base_path.exists():
+        return []
+
+    all_posts = []
+    for subdir in (d for d in base_path.iterdir() if d.is_dir()):
+        for img_path in subdir.iterdir():
+            if img_path.suffix.lower() not in (".png", ".jpg", ".jpeg"):
+                continue
+            json_path = subdir / (img_path.stem + ".json")
+            if not json_path.exists():
+                continue
+
+            try:
+                with open(json_path, "r") as f:
+                    gt = json.load(f)
+
+                dem_value = gt.get("dem", None)
+                rep_value = gt.get("rep", None)
+                if dem_value is None or rep_value is None:
+                    continue
+
+                all_posts.append({
+                    # Question ID: "subdir/image_name" (without extension)
+                    "id": f"{subdir.name}/{img_path.stem}",
+                    # Relative path from the survey_metadata directory
+                    "img_path": str(img_path.relative_to(base_path)),
+                    "topic": subdir.name,
+                    "dem": float(dem_value),
+                    "rep": float(rep_value),
+                })
+            except (json.JSONDecodeError, KeyError, IOError, ValueError):
+                continue
+
+    # Directory listing order differs between filesystems
+    all_posts.sort(key=lambda p: p["id"])
+    return all_posts
+
+
+def get_posts() -> list[dict]:
+    """
+    The cached catalog, loaded on first use. An empty catalog is not cached,
+    so posts added to survey_metadata later are picked up. Callers must not
+    mutate the returned list.
+    """
+    posts = _catalog["posts"]
+    if posts:
+        return posts
+    with _catalog_lock:
+        if not _catalog["posts"]:
+            posts = load_posts()
+            content = json.dumps(posts, sort_keys=True, separators=(",", ":")).encode()
+            _catalog["version"] = hashlib.sha256(content).hexdigest()[:12]
+            _catalog["posts"] = posts
+        return _catalog["posts"]
+
+
+def catalog_version() -> str:
+    """Short hash of the loaded catalog; changes whenever a post is added, removed or edited."""
+    get_posts()
+    return _catalog["version"]
+
+
+def preload() -> int:
+    """Load the catalog now (e.g. in the gunicorn master before forking)."""
+    return len(get_posts())
@@ -0,0 +1,278 @@
+"""
+Signup survey cohorts.
+
+This module handles:
+- Normalizing signup survey responses into typed signup_surveys columns
+- Backfilling signup_surveys from the JSON in User.survey_responses
+- Cohort score aggregates (e.g. by party identity) as indexed SQL GROUP BYs
+- Daily and all-time ranks within party identity / ideology cohorts, read from
+  the cohort columns denormalized onto user_daily_scores and user_stats
+
+`alembic upgrade head` backfills surveys and cohorts that are missing
+(revision f3b8a2c6d1e9); the command below rebuilds them all from scratch.
+
+Usage (from backend/):
+    python cohorts.py backfill
+"""
+import os
+import sys
+import json
+import time
+import threading
+from datetime import date
+from sqlalchemy import select, func, delete, insert, update
+from db import SessionLocal, use_profile
+from models import User, UserDailyScore, UserStats, SignupSurvey
+from survey_store import map_survey_responses
+from ranking import rank_desc
+
+# Categorical survey columns that cohorts can be grouped by
+COHORT_FIELDS = (
+    "party_identity",
+    "ideology",
+    "engagement",
+    "empathy",
+    "difference",
+    "age_range",
+    "education_level",
+)
+# Cohorts with precomputed rankings (denormalized onto user_daily_scores and user_stats)
+COHORT_RANK_FIELDS = ("party_identity", "ideology")
+# Seconds an all-time cohort ranking is served before being recomputed
+ALLTIME_COHORT_TTL = float(os.getenv("COHORT_RANK_TTL", "60"))
+
+_alltime_cohort_cache = {"expires_at": 0.0, "ranks": None}
+_alltime_cohort_lock = threading.Lock()
+
+
+def _to_int(value) -> int | None:
+    try:
+        return int(round(float(value)))
+    except (TypeError, ValueError):
+        return None
+
+
+def survey_columns(responses: dict) -> dict:
+    """signup_surveys column values for raw frontend survey responses."""
+    mapped = map_survey_responses(responses or {})
+    columns = {field: mapped[field] or None for field in COHORT_FIELDS}
+    columns["warmth_dem"] = _to_int(mapped["warmth_dem"])
+    columns["warmth_rep"] = _to_int(mapped["warmth_rep"])
+    return columns
+
+
+def upsert_signup_survey(session, user_id: str, responses: dict | None) -> None:
+    """
+    Create or replace the typed survey row for `user_id`, or remove it when
+    there are no responses (caller commits).
+    """
+    row = session.get(SignupSurvey, user_id)
+    if not isinstance(responses, dict) or not responses:
+        if row is not None:
+            session.delete(row)
+            session.execute(
+                update(UserStats)
+                .where(UserStats.user_id == user_id)
+                .values({field: None for field in COHORT_RANK_FIELDS})
+            )
+        return
+    if row is None:
+        row = SignupSurvey(user_id=user_id)
+        session.add(row)
+    columns = survey_columns(responses)
+    for field, value in columns.items():
+        setattr(row, field, value)
+    session.execute(
+        update(UserStats)
+        .where(UserStats.user_id == user_id)
+        .values({field: columns[field] for field in COHORT_RANK_FIELDS})
+    )
+
+
+def backfill_signup_surveys(session, batch_size: int = 1000) -> int:
+    """
+    Rebuild signup_surveys from User.survey_responses.
+    Returns the number of surveys written.
+    """
+    session.execute(delete(SignupSurvey))
+    users = session.execute(
+        select(User.uid, User.survey_responses)
+        .where(User.survey_responses.is_not(None))
+        .execution_options(yield_per=batch_size)
+    )
+    written = 0
+    for partition in users.partitions():
+        rows = []
+        for uid, raw in partition:
+            try:
+                responses = json.loads(raw)
+            except (TypeError, ValueError):
+                continue
+            if isinstance(responses, dict) and responses:
+                rows.append({"user_id": uid, **survey_columns(responses)})
+        if rows:
+            session.execute(insert(SignupSurvey), rows)
+            written += len(rows)
+
+    # Refresh the cohort columns copied onto scores and rollups
+    for model in (UserDailyScore, UserStats):
+        session.execute(
+            update(model).values({
+                field: select(getattr(SignupSurvey, field))
+                .where(SignupSurvey.user_id == model.user_id)
+                .scalar_subquery()
+                for field in COHORT_RANK_FIELDS
+            })
+        )
+    # Rollups created before score sums were tracked
+    def daily_sum(column):
+        return (
+            select(func.coalesce(func.sum(column), 0.0))
+            .where(UserDailyScore.user_id == UserStats.user_id)
+            .scalar_subquery()
+        )
+
+    session.execute(
+        update(UserStats).values(
+            score_sum=daily_sum(UserDailyScore.avg_score),
+            score_dem_sum=daily_sum(UserDailyScore.avg_score_dem),
+            score_rep_sum=daily_sum(UserDailyScore.avg_score_rep),
+        )
+    )
+    session.commit()
+    return written
+
+
+def cohort_scores(session, by: str, start_date: date | None = None, end_date: date | None = None) -> list[dict]:
+    """
+    Average daily scores per cohort value of the `by` survey column, over
+    days in [start_date, end_date] (inclusive, both optional).
+    Users without a survey row are not counted.
+    """
+    cohort = getattr(SignupSurvey, by)
+    stmt = (
+        select(
+            cohort.label("cohort"),
+            func.count(func.distinct(UserDailyScore.user_id)).label("users"),
+            func.count().label("days"),
+            func.avg(UserDailyScore.avg_score).label("avg_score"),
+            func.avg(UserDailyScore.avg_score_dem).label("avg_score_dem"),
+            func.avg(UserDailyScore.avg_score_rep).label("avg_score_rep"),
+        )
+        .join(SignupSurvey, SignupSurvey.user_id == UserDailyScore.user_id)
+        .group_by(cohort)
+        .order_by(cohort)
+    )
+    if start_date:
+        stmt = stmt.where(UserDailyScore.date >= start_date)
+    if end_date:
+        stmt = stmt.where(UserDailyScore.date <= end_date)
+
+    return [
+        {
+            by: row.cohort,
+            "users": row.users,
+            "days": row.days,
+            "avg_score": round(row.avg_score, 2),
+            "avg_score_dem": round(row.avg_score_dem, 2),
+            "avg_score_rep": round(row.avg_score_rep, 2),
+        }
+        for row in session.execute(stmt)
+    ]
+
+
+def rank_within_cohorts(rows, field: str) -> dict:
+    """
+    Ranks within each `field` cohort for rows carrying user_id, `field`,
+    avg_score, avg_score_dem and avg_score_rep. Users without a cohort value
+    are skipped. Returns {user_id: {"cohort", "rank", "rank_dem", "rank_rep", "total"}}.
+    """
+    groups = {}
+    for row in rows:
+        value = getattr(row, field)
+        if value is not None:
+            groups.setdefault(value, []).append(row)
+
+    out = {}
+    for value, members in groups.items():
+        overall = rank_desc(members, lambda r: r.avg_score)
+        dem = rank_desc(members, lambda r: r.avg_score_dem)
+        rep = rank_desc(members, lambda r: r.avg_score_rep)
+        for uid in overall:
+            out[uid] = {
+                "cohort": value,
+                "rank": overall[uid],
+                "rank_dem": dem[uid],
+                "rank_rep": rep[uid],
+                "total": len(members),
+            }
+    return out
+
+
+def compute_alltime_cohort_ranks(session) -> dict:
+    """
+    All-time ranks (by average daily score) within each COHORT_RANK_FIELDS
+    cohort: {field: {user_id: {...}}}, from the user_stats rollup in one query.
+    """
+    rows = session.execute(
+        select(
+            UserStats.user_id,
+            UserStats.party_identity,
+            UserStats.ideology,
+            (UserStats.score_sum / UserStats.days_completed).label("avg_score"),
+            (UserStats.score_dem_sum / UserStats.days_completed).label("avg_score_dem"),
+            (UserStats.score_rep_sum / UserStats.days_completed).label("avg_score_rep"),
+        ).where(UserStats.days_completed > 0)
+    ).all()
+    return {field: rank_within_cohorts(rows, field) for field in COHORT_RANK_FIELDS}
+
+
+def _store_alltime_cohort_ranks(ranks: dict) -> None:
+    _alltime_cohort_cache["ranks"] = ranks
+    _alltime_cohort_cache["expires_at"] = time.monotonic() + ALLTIME_COHORT_TTL
+
+
+def warm_alltime_cohort_ranks() -> None:
+    """
+    Recompute the cached all-time cohort ranks on a daemon thread (one at a
+    time per process). Called at worker boot and when the cache goes stale.
+    """
+    if not _alltime_cohort_lock.acquire(blocking=False):
+        return
+    # Serve the current ranks for another TTL, even if this refresh fails
+    _alltime_cohort_cache["expires_at"] = time.monotonic() + ALLTIME_COHORT_TTL
+
+    def refresh():
+        try:
+            with SessionLocal() as session:
+                _store_alltime_cohort_ranks(compute_alltime_cohort_ranks(session))
+        except Exception as e:
+            print(f"All-time cohort rank refresh failed: {e}")
+        finally:
+            _alltime_cohort_lock.release()
+
+    threading.Thread(target=refresh, name="cohort-ranks", daemon=True).start()
+
+
+def get_alltime_cohort_ranks(session) -> dict:
+    """
+    Cached compute_alltime_cohort_ranks. Once per ALLTIME_COHORT_TTL the ranks
+    are recomputed in the background while the previous ones keep being served,
+    so requests never pay for ranking every user. Only a process that has
+    nothing cached yet (workers warm up at boot) computes them inline.
+    """
+    if _alltime_cohort_cache["ranks"] is None:
+        _store_alltime_cohort_ranks(compute_alltime_cohort_ranks(session))
+    elif time.monotonic() >= _alltime_cohort_cache["expires_at"]:
+        warm_alltime_cohort_ranks()
+    return _alltime_cohort_cache["ranks"]
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["backfill"]:
+        use_profile("batch")
+        with SessionLocal() as s:
+            n = backfill_signup_surveys(s)
+        print(f"Backfilled {n} signup surveys")
+    else:
+        print("Usage: python cohorts.py backfill")
@@ -5,88 +5,49 @@ This module handles:
 - Daily question sampling (5 questions per day, same for all users)
 - Timezone handling (America/New_York)
 - Database persistence of daily questions
+- The per-user gameplay rollup (user_stats)
+- Daily rankings, overall and within signup survey cohorts
 """
 import random
 import json
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, date
 from zoneinfo import ZoneInfo
-from sqlalchemy import select
-from db import SessionLocal
-from models import DailyQuestion, UserAnswer, UserDailyScore
+from sqlalchemy import select, func, update
+from sqlalchemy.exc import IntegrityError
+from db import session_scope
+from models import DailyQuestion, UserAnswer, UserDailyScore, UserStats, SignupSurvey
+from cohorts import COHORT_RANK_FIELDS, rank_within_cohorts
+from ranking import rank_desc
+from catalog import get_posts
 
 # Timezone for all date operations
 EASTERN_TZ = ZoneInfo("America/New_York")
 DEFAULT_NUM_QUESTIONS = 5
 
-def get_eastern_date() -> str:
+def get_eastern_date() -> date:
     """
-    Get current date in Eastern timezone as YYYY-MM-DD string.
-    All date operations should use this function to ensure consistency.
+    Get current date in Eastern timezone.
+    All date operations should use this function to ensure consistency;
+    dates are stored in native DATE columns and only become YYYY-MM-DD
+    strings at the API edge (parse_date / date.isoformat()).
     """
-    now_eastern = datetime.now(EASTERN_TZ)
-    return now_eastern.strftime("%Y-%m-%d")
+    return datetime.now(EASTERN_TZ).date()
 
-def load_all_available_posts():
+def parse_date(value: str | None) -> date | None:
     """
-    Load all available posts from survey_metadata directory.
-    Returns list of dicts with keys: id, img_path, dem, rep, topic
+    Parse a YYYY-MM-DD request value; None when it is missing or empty.
+    Raises ValueError on anything else.
     """
-    base_path = Path(__file__).resolve().parent / "survey_metadata"
-    
-    if not base_path.exists():
-        return []
-    
-    all_posts = []
-    subdirs = [d for d in base_path.iterdir() if d.is_dir()]
-    
-    for subdir in subdirs:
-        img_files = [
-            f for f in subdir.iterdir() 
-            if f.suffix.lower() in [".png", ".jpg", ".jpeg"]
-        ]
-        
-        for img_path in img_files:
-            json_path = subdir / (img_path.stem + ".json")
-            
-            if not json_path.exists():
-                continue
-            
-            try:
-                with open(json_path, 'r') as f:
-                    gt = json.load(f)
-                
-                dem_value = gt.get("dem", None)
-                rep_value = gt.get("rep", None)
-                
-                if dem_value is None or rep_value is None:
-                    continue
-                
-                # Get relative path from survey_metadata directory
-                relative_path = img_path.relative_to(base_path)
-                
-                # Create question ID: "subdir/image_name" (without extension)
-                question_id = f"{subdir.name}/{img_path.stem}"
-                
-                all_posts.append({
-                    "id": question_id,
-                    "img_path": str(relative_path),
-                    "topic": subdir.name,
-                    "dem": float(dem_value),
-                    "rep": float(rep_value)
-                })
-            except (json.JSONDecodeError, KeyError, IOError, ValueError):
-                continue
-    
-    return all_posts
+    return date.fromisoformat(value) if value else None
 
-def ensure_daily_questions(date: str) -> list[dict]:
+def ensure_daily_questions(date: date) -> list[dict]:
     """
-    Ensure daily questions exist for the given date (YYYY-MM-DD).
+    Ensure daily questions exist for the given date.
     If they don't exist, generate and store 5 random unique questions.
     Returns list of daily question dicts with keys: id, img_path, topic, dem, rep, question_order
     """
-    with SessionLocal() as session:
+    with session_scope() as session:
         # Check if questions already exist for this date
         existing = session.execute(
             select(DailyQuestion)
@@ -110,7 +71,7 @@ def ensure_daily_questions(date: str) -> list[dict]:
         
         # Need to generate new questions
         # First, get all available posts
-        all_posts = load_all_available_posts()
+        all_posts = get_posts()
         
         # If there are fewer than DEFAULT_NUM_QUESTIONS globally, degrade gracefully
         if len(all_posts) == 0:
@@ -166,12 +127,12 @@ def ensure_daily_questions(date: str) -> list[dict]:
             for dq in all_questions
         ]
 
-def get_user_answers_for_date(user_id: str, date: str) -> list[dict]:
+def get_user_answers_for_date(user_id: str, date: date) -> list[dict]:
     """
     Get all answers for a user on a specific date.
     Returns list of answer dicts with keys: question_id, dem_guess, rep_guess, score, score_dem, score_rep
     """
-    with SessionLocal() as session:
+    with session_scope() as session:
         answers = session.execute(
             select(UserAnswer)
             .where(UserAnswer.user_id == user_id, UserAnswer.date == date)
@@ -190,14 +151,14 @@ def get_user_answers_for_date(user_id: str, date: str) -> list[dict]:
             for ans in answers
         ]
 
-def has_user_completed_date(user_id: str, date: str) -> bool:
+def has_user_completed_date(user_id: str, date: date) -> bool:
     """
     Check if user has completed all 5 questions for a given date.
     """
     answers = get_user_answers_for_date(user_id, date)
     return len(answers) >= DEFAULT_NUM_QUESTIONS
 
-def compute_rankings_for_date(date: str) -> dict:
+def compute_rankings_for_date(date: date) -> dict:
     """
     Compute rankings for all users who completed the date.
     Returns dict with:
@@ -207,111 +168,44 @@ def compute_rankings_for_date(date: str) -> dict:
     - question_ranks: {question_id: {user_id: rank}} based on per-question scores
     - question_ranks_dem: {question_id: {user_id: rank}} based on per-question score_dem
     - question_ranks_rep: {question_id: {user_id: rank}} based on per-question score_rep
+    - cohort_ranks: {field: {user_id: {"cohort", "rank", "rank_dem", "rank_rep", "total"}}}
+      within each party_identity / ideology cohort
+    The daily cohort ranks deliberately ride on this per-request ranking: they
+    sort the daily_scores rows already loaded for the daily ranks (no extra
+    query), and a player who has just finished is ranked at once, which a
+    cached ranking would miss. Only the all-time cohort ranks, which scan
+    user_stats, are cached (cohorts.get_alltime_cohort_ranks).
     """
-    with SessionLocal() as session:
+    with session_scope() as session:
         # Get all daily scores for this date
         daily_scores = session.execute(
-            select(UserDailyScore)
-            .where(UserDailyScore.date == date)
-            .order_by(UserDailyScore.avg_score.desc())
-        ).scalars().all()
-        
-        # Compute daily ranks (ties place user at top of tie)
-        daily_ranks = {}
-        current_rank = 1
-        prev_score = None
-        
-        for score in daily_scores:
-            if prev_score is not None and score.avg_score < prev_score:
-                current_rank = len(daily_ranks) + 1
-            daily_ranks[score.user_id] = current_rank
-            prev_score = score.avg_score
-        
-        # Compute daily ranks for Democrat scores
-        daily_scores_dem = session.execute(
-            select(UserDailyScore)
-            .where(UserDailyScore.date == date)
-            .order_by(UserDailyScore.avg_score_dem.desc())
+            select(UserDailyScore).where(UserDailyScore.date == date)
         ).scalars().all()
         
-        daily_ranks_dem = {}
-        current_rank_dem = 1
-        prev_score_dem = None
+        # Daily ranks (ties place user at top of tie)
+        daily_ranks = rank_desc(daily_scores, lambda s: s.avg_score)
+        daily_ranks_dem = rank_desc(daily_scores, lambda s: s.avg_score_dem)
+        daily_ranks_rep = rank_desc(daily_scores, lambda s: s.avg_score_rep)
         
-        for score in daily_scores_dem:
-            if prev_score_dem is not None and score.avg_score_dem < prev_score_dem:
-                current_rank_dem = len(daily_ranks_dem) + 1
-            daily_ranks_dem[score.user_id] = current_rank_dem
-            prev_score_dem = score.avg_score_dem
-        
-        # Compute daily ranks for Republican scores
-        daily_scores_rep = session.execute(
-            select(UserDailyScore)
-            .where(UserDailyScore.date == date)
-            .order_by(UserDailyScore.avg_score_rep.desc())
-        ).scalars().all()
-        
-        daily_ranks_rep = {}
-        current_rank_rep = 1
-        prev_score_rep = None
-        
-        for score in daily_scores_rep:
-            if prev_score_rep is not None and score.avg_score_rep < prev_score_rep:
-                current_rank_rep = len(daily_ranks_rep) + 1
-            daily_ranks_rep[score.user_id] = current_rank_rep
-            prev_score_rep = score.avg_score_rep
+        # Ranks within party identity / ideology cohorts (cohorts are stored on the rows)
+        cohort_ranks = {field: rank_within_cohorts(daily_scores, field) for field in COHORT_RANK_FIELDS}
         
         # Get all answers for this date, grouped by question
         all_answers = session.execute(
-            select(UserAnswer)
-            .where(UserAnswer.date == date)
-            .order_by(UserAnswer.score.desc())
+            select(UserAnswer).where(UserAnswer.date == date)
         ).scalars().all()
         
-        # Group by question_id and compute per-question ranks
-        question_ranks = {}
-        question_ranks_dem = {}
-        question_ranks_rep = {}
         question_groups = {}
-        
         for ans in all_answers:
-            if ans.question_id not in question_groups:
-                question_groups[ans.question_id] = []
-            question_groups[ans.question_id].append(ans)
+            question_groups.setdefault(ans.question_id, []).append(ans)
         
+        question_ranks = {}
+        question_ranks_dem = {}
+        question_ranks_rep = {}
         for question_id, answers_list in question_groups.items():
-            # Overall question ranks
-            question_ranks[question_id] = {}
-            current_q_rank = 1
-            prev_q_score = None
-            
-            for ans in sorted(answers_list, key=lambda x: x.score, reverse=True):
-                if prev_q_score is not None and ans.score < prev_q_score:
-                    current_q_rank = len([k for k in question_ranks[question_id].keys()]) + 1
-                question_ranks[question_id][ans.user_id] = current_q_rank
-                prev_q_score = ans.score
-            
-            # Democrat question ranks
-            question_ranks_dem[question_id] = {}
-            current_q_rank_dem = 1
-            prev_q_score_dem = None
-            
-            for ans in sorted(answers_list, key=lambda x: x.score_dem, reverse=True):
-                if prev_q_score_dem is not None and ans.score_dem < prev_q_score_dem:
-                    current_q_rank_dem = len([k for k in question_ranks_dem[question_id].keys()]) + 1
-                question_ranks_dem[question_id][ans.user_id] = current_q_rank_dem
-                prev_q_score_dem = ans.score_dem
-            
-            # Republican question ranks
-            question_ranks_rep[question_id] = {}
-            current_q_rank_rep = 1
-            prev_q_score_rep = None
-            
-            for ans in sorted(answers_list, key=lambda x: x.score_rep, reverse=True):
-                if prev_q_score_rep is not None and ans.score_rep < prev_q_score_rep:
-                    current_q_rank_rep = len([k for k in question_ranks_rep[question_id].keys()]) + 1
-                question_ranks_rep[question_id][ans.user_id] = current_q_rank_rep
-                prev_q_score_rep = ans.score_rep
+            question_ranks[question_id] = rank_desc(answers_list, lambda a: a.score)
+            question_ranks_dem[question_id] = rank_desc(answers_list, lambda a: a.score_dem)
+            question_ranks_rep[question_id] = rank_desc(answers_list, lambda a: a.score_rep)
         
         return {
             "daily_ranks": daily_ranks,
@@ -319,7 +213,8 @@ def compute_rankings_for_date(date: str) -> dict:
             "daily_ranks_rep": daily_ranks_rep,
             "question_ranks": question_ranks,
             "question_ranks_dem": question_ranks_dem,
-            "question_ranks_rep": question_ranks_rep
+            "question_ranks_rep": question_ranks_rep,
+            "cohort_ranks": cohort_ranks
         }
 
 def get_user_historical_average(user_id: str) -> dict | None:
@@ -327,7 +222,7 @@ def get_user_historical_average(user_id: str) -> dict | None:
     Get user's historical average score across all days they've completed.
     Returns dict with keys: 'overall', 'dem', 'rep' or None if user has no completed days.
     """
-    with SessionLocal() as session:
+    with session_scope() as session:
         scores = session.execute(
             select(UserDailyScore)
             .where(UserDailyScore.user_id == user_id)
@@ -346,3 +241,74 @@ def get_user_historical_average(user_id: str) -> dict | None:
             'dem': total_dem / count,
             'rep': total_rep / count
         }
+
+def record_answer_stats(session, user_id: str, daily_score: UserDailyScore | None = None) -> None:
+    """
+    Bump the user's rollup after a new UserAnswer (and, if `daily_score` is
+    given, a new UserDailyScore) has been flushed in `session`.
+    Users without a rollup row yet are backfilled from their existing rows.
+    """
+    values = {"answers_count": UserStats.answers_count + 1}
+    if daily_score is not None:
+        values.update(
+            days_completed=UserStats.days_completed + 1,
+            score_sum=UserStats.score_sum + daily_score.avg_score,
+            score_dem_sum=UserStats.score_dem_sum + daily_score.avg_score_dem,
+            score_rep_sum=UserStats.score_rep_sum + daily_score.avg_score_rep,
+            party_identity=daily_score.party_identity,
+            ideology=daily_score.ideology,
+        )
+    bumped = session.execute(
+        update(UserStats).where(UserStats.user_id == user_id).values(**values)
+    ).rowcount
+    if bumped:
+        return
+
+    if not backfill_user_stats(session, user_id):
+        # A concurrent request created the row first; count this answer on top of it
+        record_answer_stats(session, user_id, daily_score)
+
+def backfill_user_stats(session, user_id: str) -> bool:
+    """
+    Create the user's rollup from their existing user_answers / user_daily_scores rows.
+    Returns False if the user already has one (e.g. a concurrent request created it).
+    """
+    answers = session.execute(
+        select(func.count()).select_from(UserAnswer).where(UserAnswer.user_id == user_id)
+    ).scalar() or 0
+    days, score_sum, score_dem_sum, score_rep_sum = session.execute(
+        select(
+            func.count(),
+            func.coalesce(func.sum(UserDailyScore.avg_score), 0.0),
+            func.coalesce(func.sum(UserDailyScore.avg_score_dem), 0.0),
+            func.coalesce(func.sum(UserDailyScore.avg_score_rep), 0.0),
+        ).where(UserDailyScore.user_id == user_id)
+    ).one()
+    survey = session.get(SignupSurvey, user_id)
+    try:
+        with session.begin_nested():
+            session.add(UserStats(
+                user_id=user_id,
+                answers_count=answers,
+                days_completed=days,
+                score_sum=score_sum,
+                score_dem_sum=score_dem_sum,
+                score_rep_sum=score_rep_sum,
+                party_identity=survey.party_identity if survey else None,
+                ideology=survey.ideology if survey else None,
+            ))
+    except IntegrityError:
+        return False
+    return True
+
+def get_user_answer_total(session, user_id: str) -> int:
+    """
+    Number of answers the user has submitted, read from the rollup by primary key.
+    Falls back to an index-only count for users without a rollup row yet.
+    """
+    stats = session.get(UserStats, user_id)
+    if stats is not None:
+        return stats.answers_count
+    return session.execute(
+        select(func.count()).select_from(UserAnswer).where(UserAnswer.user_id == user_id)
+    ).scalar() or 0
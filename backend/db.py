@@ -1,16 +1,228 @@
 # backend/db.py
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-import psycopg2
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g, has_app_context
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+import query_stats
 
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///app.db")
-print(DATABASE_URL)
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
 
-# Important for SQLite + threads
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+# Named engine tuning profiles, selected with DB_PROFILE:
+# - "web": request serving; short lock waits and statement timeouts
+# - "batch": scripts and backfills (their main() calls use_profile("batch")); long waits, no statement timeout
+# - "default": SQLAlchemy/driver defaults (the previous behaviour)
+DB_PROFILES = {
+    "web": {
+        "sqlite_pragmas": {
+            "journal_mode": "WAL",  # readers no longer block the writer
+            "synchronous": "NORMAL",  # fsync at checkpoints only; safe with WAL
+            "busy_timeout": 5000,  # ms to wait for the write lock instead of failing
+            "cache_size": -16000,  # KiB of page cache per connection
+        },
+        "statement_timeout_ms": 5000,
+        "pool_recycle": 1800,
+    },
+    "batch": {
+        "sqlite_pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 60000,
+            "cache_size": -64000,
+            "temp_store": "MEMORY",
+        },
+        "statement_timeout_ms": 0,
+        "pool_recycle": 1800,
+    },
+    "default": {},
+}
+DB_PROFILE = os.getenv("DB_PROFILE", "web")
+if DB_PROFILE not in DB_PROFILES:
+    raise ValueError(f"Unknown DB_PROFILE {DB_PROFILE!r}; expected one of {sorted(DB_PROFILES)}")
 
-engine = create_engine(DATABASE_URL, echo=False, future=True, connect_args=connect_args)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+
+def pool_settings() -> dict:
+    """
+    Connection pool size per process, from the gunicorn layout:
+    WEB_CONCURRENCY workers x GUNICORN_THREADS threads. Each worker holds its
+    own pool, sized for its request threads plus one background thread
+    (rank publisher, snapshot job). DB_MAX_CONNECTIONS, if set, caps the
+    total across workers.
+    """
+    workers = max(int(os.getenv("WEB_CONCURRENCY", "1")), 1)
+    threads = max(int(os.getenv("GUNICORN_THREADS", "1")), 1)
+    pool_size, max_overflow = threads + 1, threads
+    max_connections = os.getenv("DB_MAX_CONNECTIONS")
+    if max_connections:
+        per_worker = max(int(max_connections) // workers, 1)
+        pool_size = min(pool_size, per_worker)
+        max_overflow = min(max_overflow, per_worker - pool_size)
+    return {"pool_size": pool_size, "max_overflow": max_overflow}
+
+
+def engine_options(profile: str = DB_PROFILE, url: str = DATABASE_URL) -> dict:
+    """create_engine keyword arguments for `profile`."""
+    settings = DB_PROFILES[profile]
+    sqlite = url.startswith("sqlite")
+    # Important for SQLite + threads
+    connect_args = {"check_same_thread": False} if sqlite else {}
+    options = {"echo": False, "future": True, "connect_args": connect_args}
+    if not settings:
+        return options
+
+    options["pool_pre_ping"] = not sqlite
+    options["pool_recycle"] = settings["pool_recycle"]
+    if not (sqlite and ":memory:" in url):
+        options.update(pool_settings())
+    if not sqlite:
+        connect_args["connect_timeout"] = 10
+        connect_args["options"] = f"-c statement_timeout={settings['statement_timeout_ms']}"
+    return options
+
+
+def _apply_sqlite_pragmas(pragmas: dict):
+    def on_connect(dbapi_conn, _record):
+        cursor = dbapi_conn.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+    return on_connect
+
+
+def _make_engine(url: str, extra_pragmas: dict | None = None):
+    eng = create_engine(url, **engine_options(DB_PROFILE, url))
+    pragmas = dict(DB_PROFILES[DB_PROFILE].get("sqlite_pragmas", {}), **(extra_pragmas or {}))
+    if url.startswith("sqlite") and pragmas:
+        event.listen(eng, "connect", _apply_sqlite_pragmas(pragmas))
+    return eng
+
+
+engine = _make_engine(DATABASE_URL)
+
+# Optional read replica (e.g. a Postgres standby, or a second SQLite file as a
+# local stand-in). Without READ_DATABASE_URL every read goes to the primary.
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL") or None
+read_engine = _make_engine(READ_DATABASE_URL, {"query_only": "ON"}) if READ_DATABASE_URL else engine
+# Seconds after a user's write during which their reads stay on the primary
+READ_YOUR_WRITES_WINDOW = float(os.getenv("READ_YOUR_WRITES_WINDOW", "10"))
+
+
+def use_profile(profile: str) -> None:
+    """
+    Rebuild the engines with another DB_PROFILE, for scripts that run under
+    "batch" without the web default's statement timeout. Call at the start of
+    main(), before any session is opened; sessions pick up the new engines,
+    and query accounting (query_stats) moves over with them.
+    """
+    global DB_PROFILE, engine, read_engine
+    if profile not in DB_PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE {profile!r}; expected one of {sorted(DB_PROFILES)}")
+    if profile == DB_PROFILE:
+        return
+    counted = query_stats.installed_on(engine)
+    DB_PROFILE = profile
+    for old in {engine, read_engine}:
+        old.dispose()
+    engine = _make_engine(DATABASE_URL)
+    read_engine = _make_engine(READ_DATABASE_URL, {"query_only": "ON"}) if READ_DATABASE_URL else engine
+    if counted:
+        query_stats.install(engine, read_engine)
+
+
+def lift_statement_timeout(session) -> None:
+    """
+    Let the rest of `session`'s current transaction run without the profile's
+    statement_timeout (Postgres; SET LOCAL ends with the transaction). For
+    whole-table rebuilds that web workers run off the request path.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        session.execute(text("SET LOCAL statement_timeout = 0"))
+
+
+_use_replica = ContextVar("db_use_replica", default=False)
+_recent_writes = {}  # key (user id) -> time.monotonic() deadline
+
+
+class RoutingSession(Session):
+    """
+    Sends statements to read_engine inside use_read_replica(), and to the
+    primary otherwise. Flushes and INSERT/UPDATE/DELETE always use the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if _use_replica.get() and not self._flushing and not getattr(clause, "is_dml", False):
+            return read_engine
+        return engine
+
+
+@contextmanager
+def use_read_replica(enabled: bool = True):
+    """Route sessions used in this context (thread/request) to the read replica."""
+    token = _use_replica.set(enabled)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def reading_from_replica() -> bool:
+    """True inside use_read_replica() (e.g. to carry the routing into a streamed response)."""
+    return _use_replica.get()
+
+
+def note_write(key: str) -> None:
+    """Record that `key` (a user id) just committed a write, for read-your-writes."""
+    now = time.monotonic()
+    _recent_writes[key] = now + READ_YOUR_WRITES_WINDOW
+    if len(_recent_writes) > 10000:
+        for k in [k for k, deadline in _recent_writes.items() if deadline < now]:
+            _recent_writes.pop(k, None)
+
+
+def wrote_recently(key: str | None) -> bool:
+    """True if `key` wrote within READ_YOUR_WRITES_WINDOW (in this process)."""
+    return key is not None and _recent_writes.get(key, 0.0) > time.monotonic()
+
+
+SessionLocal = sessionmaker(class_=RoutingSession, autoflush=False, autocommit=False, future=True)
+
+
+def get_session() -> Session:
+    """
+    The request-scoped session: created on first use in a Flask app context,
+    shared by the view and every helper it calls, closed at teardown.
+    """
+    if "db_session" not in g:
+        g.db_session = SessionLocal()
+    return g.db_session
+
+
+def close_request_session(exc=None) -> None:
+    """Teardown hook: close (and roll back anything uncommitted in) the request session."""
+    session = g.pop("db_session", None)
+    if session is not None:
+        session.close()
+
+
+@contextmanager
+def session_scope():
+    """
+    The request's shared session inside a Flask app context; otherwise (scripts,
+    background threads) a new session that is closed on exit.
+    """
+    if has_app_context():
+        yield get_session()
+    else:
+        with SessionLocal() as session:
+            yield session
 Base = declarative_base()
+
+
+def init_db() -> None:
+    """Create any missing tables. Run once at deploy/boot, never per request."""
+    import models  # noqa: F401  (registers every table on Base.metadata)
+    Base.metadata.create_all(bind=engine)
@@ -0,0 +1,179 @@
+"""
+Per-question guess distributions ("how did everyone else guess").
+
+This module handles:
+- Incrementally maintained histogram counters, bumped as each UserAnswer is stored
+- A 2D histogram of (dem_guess, rep_guess) and per-axis error histograms
+- Rebuilding the counters from user_answers (and archived months) for backfills
+
+Each new answer costs three single-row upserts; reads never touch user_answers.
+"""
+import sys
+from collections import Counter
+from datetime import date
+from sqlalchemy import select, func, delete, insert, case, literal
+from sqlalchemy.dialects import postgresql, sqlite
+from db import SessionLocal, use_profile
+from models import QuestionGuessCell, QuestionGuessError, UserAnswer
+from answer_archive import iter_archived_answers
+
+# Guesses are percentages in [0, 100]; errors (guess - actual) lie in [-100, 100]
+GUESS_BIN_WIDTH = 5
+GUESS_BINS = 100 // GUESS_BIN_WIDTH
+ERROR_BIN_WIDTH = 5
+ERROR_BINS = 200 // ERROR_BIN_WIDTH
+
+
+def guess_bin(value: float) -> int:
+    """Histogram bin of a guess; 100 falls in the last bin."""
+    return min(max(int(value // GUESS_BIN_WIDTH), 0), GUESS_BINS - 1)
+
+
+def error_bin(error: float) -> int:
+    """Histogram bin of an error, offset so that -100 maps to bin 0."""
+    return min(max(int((error + 100) // ERROR_BIN_WIDTH), 0), ERROR_BINS - 1)
+
+
+def _upsert_statement(dialect: str, model, keys: dict, amount: int = 1):
+    """INSERT ... ON CONFLICT DO UPDATE adding `amount` to a counter row, for `dialect`."""
+    dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = dialect_insert(model).values(**keys, count=amount)
+    return stmt.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={"count": model.count + stmt.excluded.count},
+    )
+
+
+def _upsert_increment(session, model, keys: dict, amount: int = 1) -> None:
+    """INSERT the counter row with `amount`, or add `amount` to it if it exists."""
+    session.execute(_upsert_statement(session.get_bind().dialect.name, model, keys, amount))
+
+
+def record_guess(session, date: date, question_id: str, dem_guess: float, rep_guess: float,
+                 actual_dem: float, actual_rep: float) -> None:
+    """Add one answer to the question's distributions (three O(1) upserts)."""
+    _upsert_increment(session, QuestionGuessCell, {
+        "date": date,
+        "question_id": question_id,
+        "dem_bin": guess_bin(dem_guess),
+        "rep_bin": guess_bin(rep_guess),
+    })
+    for axis, guess, actual in (("dem", dem_guess, actual_dem), ("rep", rep_guess, actual_rep)):
+        _upsert_increment(session, QuestionGuessError, {
+            "date": date,
+            "question_id": question_id,
+            "axis": axis,
+            "err_bin": error_bin(guess - actual),
+        })
+
+
+def get_distribution(session, date: date, question_id: str) -> dict:
+    """
+    Dense histogram arrays for one daily question:
+    - guesses: GUESS_BINS x GUESS_BINS counts indexed [dem_bin][rep_bin]
+    - dem_error / rep_error: ERROR_BINS counts of (guess - actual)
+    """
+    guesses = [[0] * GUESS_BINS for _ in range(GUESS_BINS)]
+    total = 0
+    for dem_bin, rep_bin, count in session.execute(
+        select(QuestionGuessCell.dem_bin, QuestionGuessCell.rep_bin, QuestionGuessCell.count)
+        .where(QuestionGuessCell.date == date, QuestionGuessCell.question_id == question_id)
+    ):
+        guesses[dem_bin][rep_bin] = count
+        total += count
+
+    errors = {"dem": [0] * ERROR_BINS, "rep": [0] * ERROR_BINS}
+    for axis, err_bin, count in session.execute(
+        select(QuestionGuessError.axis, QuestionGuessError.err_bin, QuestionGuessError.count)
+        .where(QuestionGuessError.date == date, QuestionGuessError.question_id == question_id)
+    ):
+        errors[axis][err_bin] = count
+
+    return {
+        "date": date.isoformat(),
+        "question_id": question_id,
+        "total": total,
+        "guess_bin_width": GUESS_BIN_WIDTH,
+        "error_bin_width": ERROR_BIN_WIDTH,
+        "error_min": -100,
+        "guesses": guesses,
+        "dem_error": errors["dem"],
+        "rep_error": errors["rep"],
+    }
+
+
+def _sql_bin(expr, width: int, offset: int, bins: int):
+    """SQL equivalent of guess_bin/error_bin for set-based rebuilds."""
+    raw = func.floor((expr + offset) / width)
+    return case((raw < 0, 0), (raw > bins - 1, bins - 1), else_=raw)
+
+
+def rebuild_distributions(session, date: date | None = None) -> None:
+    """
+    Recompute the counters from user_answers with GROUP BY (one date, or all),
+    plus any months that answer_archive has moved into cold storage.
+    Only for backfills and repairs; the request path never calls this.
+    """
+    for model in (QuestionGuessCell, QuestionGuessError):
+        stmt = delete(model)
+        if date:
+            stmt = stmt.where(model.date == date)
+        session.execute(stmt)
+
+    answers = select(UserAnswer)
+    if date:
+        answers = answers.where(UserAnswer.date == date)
+    answers = answers.subquery()
+
+    dem_bin = _sql_bin(answers.c.dem_guess, GUESS_BIN_WIDTH, 0, GUESS_BINS)
+    rep_bin = _sql_bin(answers.c.rep_guess, GUESS_BIN_WIDTH, 0, GUESS_BINS)
+    session.execute(
+        QuestionGuessCell.__table__.insert().from_select(
+            ["date", "question_id", "dem_bin", "rep_bin", "count"],
+            select(answers.c.date, answers.c.question_id, dem_bin, rep_bin, func.count())
+            .group_by(answers.c.date, answers.c.question_id, dem_bin, rep_bin),
+        )
+    )
+    for axis, guess, actual in (
+        ("dem", answers.c.dem_guess, answers.c.actual_dem),
+        ("rep", answers.c.rep_guess, answers.c.actual_rep),
+    ):
+        err_bin = _sql_bin(guess - actual, ERROR_BIN_WIDTH, 100, ERROR_BINS)
+        session.execute(
+            QuestionGuessError.__table__.insert().from_select(
+                ["date", "question_id", "axis", "err_bin", "count"],
+                select(answers.c.date, answers.c.question_id, literal(axis), err_bin, func.count())
+                .group_by(answers.c.date, answers.c.question_id, err_bin),
+            )
+        )
+    _rebuild_from_archive(session, date)
+    session.commit()
+
+
+def _rebuild_from_archive(session, date: date | None) -> None:
+    """Add counters for answers of months moved out of user_answers (answer_archive)."""
+    cells = Counter()
+    errors = Counter()
+    for ans in iter_archived_answers(date, date, session):
+        key = (ans["date"], ans["question_id"])
+        cells[key + (guess_bin(ans["dem_guess"]), guess_bin(ans["rep_guess"]))] += 1
+        errors[key + ("dem", error_bin(ans["dem_guess"] - ans["actual_dem"]))] += 1
+        errors[key + ("rep", error_bin(ans["rep_guess"] - ans["actual_rep"]))] += 1
+    if cells:
+        session.execute(insert(QuestionGuessCell), [
+            {"date": d, "question_id": q, "dem_bin": dem, "rep_bin": rep, "count": n}
+            for (d, q, dem, rep), n in cells.items()
+        ])
+    if errors:
+        session.execute(insert(QuestionGuessError), [
+            {"date": d, "question_id": q, "axis": axis, "err_bin": err, "count": n}
+            for (d, q, axis, err), n in errors.items()
+        ])
+
+
+if __name__ == "__main__":
+    # python distributions.py [YYYY-MM-DD]  - rebuild counters for one date, or all dates
+    use_profile("batch")
+    with SessionLocal() as s:
+        rebuild_distributions(s, date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else None)
+    print("Guess distributions rebuilt")
@@ -0,0 +1,77 @@
+"""
+Check that the hot-path queries are planned on their indexes.
+
+Runs EXPLAIN (EXPLAIN QUERY PLAN on SQLite) for each query below against
+DATABASE_URL and fails if the plan does not mention the expected index. On
+Postgres, sequential scans are disabled for the session so small tables still
+show whether an index is usable at all.
+
+Usage (from backend/, after `alembic upgrade head` or init_db):
+    python explain_indexes.py [--verbose]
+"""
+import sys
+import argparse
+from datetime import date
+from sqlalchemy import select, text
+
+from db import engine
+from models import Post, PostQuestionMap, UserAnswer, UserDailyScore, User
+from leaderboard import LEADERBOARD_ORDER
+
+DAY = date(2026, 1, 1)
+
+# (expected index, statement)
+HOT_QUERIES = [
+    ("ix_user_daily_scores_date_score",
+     select(UserDailyScore).where(UserDailyScore.date == DAY).order_by(UserDailyScore.avg_score.desc())),
+    ("ix_user_daily_scores_date_score_dem",
+     select(UserDailyScore).where(UserDailyScore.date == DAY).order_by(UserDailyScore.avg_score_dem.desc())),
+    ("ix_user_daily_scores_date_score_rep",
+     select(UserDailyScore).where(UserDailyScore.date == DAY).order_by(UserDailyScore.avg_score_rep.desc())),
+    ("ix_user_answers_date_score",
+     select(UserAnswer).where(UserAnswer.date == DAY).order_by(UserAnswer.score.desc())),
+    ("ix_user_answers_date_question",
+     select(UserAnswer.score).where(UserAnswer.date == DAY, UserAnswer.question_id == "q1")),
+    ("ix_users_score_nulls_last",
+     select(User).order_by(*LEADERBOARD_ORDER).limit(50)),
+    ("ix_posts_topic_id",
+     select(Post).where(Post.topic_id == 1)),
+    ("ix_post_question_map_post",
+     select(PostQuestionMap).where(PostQuestionMap.post_id == 1)),
+    ("ix_post_question_map_question",
+     select(PostQuestionMap).where(PostQuestionMap.question_id == 1)),
+]
+
+
+def explain(conn, stmt) -> str:
+    """Plan text for `stmt` on this connection's dialect."""
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "sqlite":
+        return "\n".join(row[-1] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql)))
+    return "\n".join(row[0] for row in conn.execute(text("EXPLAIN " + sql)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify hot-path queries use their indexes.")
+    parser.add_argument("--verbose", action="store_true", help="print every plan, not just failures")
+    args = parser.parse_args()
+
+    failures = 0
+    with engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SET enable_seqscan = off"))
+        for index, stmt in HOT_QUERIES:
+            plan = explain(conn, stmt)
+            ok = index in plan
+            failures += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {index}")
+            if args.verbose or not ok:
+                print("     " + plan.replace("\n", "\n     "))
+
+    if failures:
+        print(f"{failures} of {len(HOT_QUERIES)} queries are not using their index")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Columnar export of gameplay tables for research analysis.
+
+Writes user_answers, user_daily_scores and daily_questions as Parquet files
+partitioned by date (Hive layout, readable with pandas.read_parquet or
+pyarrow.dataset):
+
+    <out>/<table>/date=YYYY-MM-DD/part-0.parquet
+
+Rows are streamed from the database in chunks and written batch by batch, so
+memory stays bounded by --batch-size. Runs are incremental: only dates after
+the last exported date are written, and the still-open current Eastern day is
+skipped unless --include-today is given.
+
+Requires pyarrow (pip install pyarrow).
+
+Usage (from backend/):
+    python export_parquet.py [--out DIR] [--tables user_answers ...] [--full]
+"""
+import os
+import json
+import argparse
+from pathlib import Path
+from types import SimpleNamespace
+from datetime import date, timedelta
+from sqlalchemy import select, String, Float, Integer, DateTime
+from db import SessionLocal, use_profile
+from models import UserAnswer, UserDailyScore, DailyQuestion
+from daily_questions import get_eastern_date
+from answer_archive import iter_archived_answers
+
+EXPORT_TABLES = {
+    "user_answers": UserAnswer,
+    "user_daily_scores": UserDailyScore,
+    "daily_questions": DailyQuestion,
+}
+DEFAULT_OUT_DIR = Path(__file__).resolve().parents[1] / "exports"
+STATE_FILE = "_export_state.json"
+
+
+def _arrow_schema(model, pa):
+    """Arrow schema for every column of `model` except the date partition key."""
+    type_map = {
+        String: pa.string(),
+        Float: pa.float64(),
+        Integer: pa.int64(),
+        DateTime: pa.timestamp("us"),
+    }
+    fields = []
+    for col in model.__table__.columns:
+        if col.name == "date":
+            continue
+        arrow_type = next((t for sa_type, t in type_map.items() if isinstance(col.type, sa_type)), pa.string())
+        fields.append(pa.field(col.name, arrow_type, nullable=col.nullable))
+    return pa.schema(fields)
+
+
+def load_state(out_dir: Path) -> dict:
+    path = out_dir / STATE_FILE
+    if not path.exists():
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_state(out_dir: Path, state: dict) -> None:
+    path = out_dir / STATE_FILE
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+class _PartitionWriter:
+    """Writes one date partition, buffering at most one batch of rows."""
+
+    def __init__(self, pa, pq, table_dir: Path, partition_date: date, schema, batch_size: int):
+        self.pa = pa
+        self.schema = schema
+        self.batch_size = batch_size
+        self.final_path = table_dir / f"date={partition_date.isoformat()}" / "part-0.parquet"
+        self.final_path.parent.mkdir(parents=True, exist_ok=True)
+        self.tmp_path = self.final_path.with_suffix(".parquet.tmp")
+        self.writer = pq.ParquetWriter(self.tmp_path, schema, compression="zstd")
+        self.buffer = {name: [] for name in schema.names}
+
+    def add(self, row) -> None:
+        for name in self.schema.names:
+            self.buffer[name].append(getattr(row, name))
+        if len(self.buffer[self.schema.names[0]]) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.buffer[self.schema.names[0]]:
+            return
+        batch = self.pa.RecordBatch.from_pydict(self.buffer, schema=self.schema)
+        self.writer.write_batch(batch)
+        self.buffer = {name: [] for name in self.schema.names}
+
+    def close(self) -> None:
+        self.flush()
+        self.writer.close()
+        # Publish the partition atomically so readers never see a half-written file
+        os.replace(self.tmp_path, self.final_path)
+
+
+def iter_export_rows(model, after_date: date | None, before_date: date | None, batch_size: int):
+    """
+    Yield rows of `model` with after_date < date <= before_date, ordered by
+    (date, id) and fetched `batch_size` rows per round-trip.
+    user_answers months moved to the cold archive are read from their files first.
+    """
+    if model is UserAnswer:
+        start = after_date + timedelta(days=1) if after_date else None
+        for record in iter_archived_answers(start, before_date):
+            yield SimpleNamespace(**record)
+    stmt = select(*model.__table__.columns).order_by(model.date, model.id)
+    if after_date:
+        stmt = stmt.where(model.date > after_date)
+    if before_date:
+        stmt = stmt.where(model.date <= before_date)
+    with SessionLocal() as session:
+        result = session.execute(stmt.execution_options(yield_per=batch_size))
+        for row in result:
+            yield row
+
+
+def export_table(name: str, out_dir: Path, after_date: date | None, until_date: date | None, batch_size: int) -> tuple[int, int, date | None]:
+    """
+    Export one table's date partitions in (after_date, until_date].
+    Returns (dates_written, rows_written, last_date_written).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    model = EXPORT_TABLES[name]
+    schema = _arrow_schema(model, pa)
+    table_dir = out_dir / name
+
+    writer = None
+    dates = rows = 0
+    last_date = None
+    for row in iter_export_rows(model, after_date, until_date, batch_size):
+        if writer is None or row.date != last_date:
+            if writer is not None:
+                writer.close()
+            writer = _PartitionWriter(pa, pq, table_dir, row.date, schema, batch_size)
+            last_date = row.date
+            dates += 1
+        writer.add(row)
+        rows += 1
+    if writer is not None:
+        writer.close()
+    return dates, rows, last_date
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export gameplay tables to date-partitioned Parquet.")
+    parser.add_argument("--out", type=Path, default=DEFAULT_OUT_DIR, help="output directory")
+    parser.add_argument("--tables", nargs="+", choices=sorted(EXPORT_TABLES), default=sorted(EXPORT_TABLES))
+    parser.add_argument("--batch-size", type=int, default=50_000, help="rows per fetch and per Parquet batch")
+    parser.add_argument("--full", action="store_true", help="ignore previous runs and export every date")
+    parser.add_argument("--include-today", action="store_true", help="also export the current (still open) day")
+    args = parser.parse_args()
+    use_profile("batch")
+
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise SystemExit("pyarrow is required for Parquet export: pip install pyarrow")
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    state = {} if args.full else load_state(args.out)
+    yesterday = get_eastern_date() - timedelta(days=1)
+    # Closed days only by default, so an exported partition never changes afterwards
+    until_date = None if args.include_today else yesterday
+
+    for name in args.tables:
+        after_date = date.fromisoformat(state[name]) if state.get(name) else None
+        dates, rows, last_date = export_table(name, args.out, after_date, until_date, args.batch_size)
+        if last_date:
+            # Today's partition (if written) stays open and is rewritten next run
+            state[name] = min(last_date, yesterday).isoformat()
+            save_state(args.out, state)
+        print(f"{name}: wrote {rows} rows across {dates} dates (after {after_date or 'start'})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Server-side state for /api/start_game games.
+
+This module handles:
+- Keeping a game's selected posts (including ground truth) on the server,
+  keyed by an opaque game id, instead of in the signed session cookie
+- Interchangeable backends, chosen with GAME_STORE:
+    memory  an in-process LRU with a TTL (single-process deployments)
+    db      the game_sessions table (default; shared by every worker)
+    token   nothing stored: the game id is a signed (seed, catalog version)
+            token and the questions are re-drawn from the catalog on each use
+- Evicting abandoned games after GAME_TTL seconds
+
+The cookie now carries only the game id, so requests (including every image
+fetch) no longer ship and re-verify the full question list.
+"""
+import os
+import json
+import time
+import random
+import secrets
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from flask import current_app
+from itsdangerous import BadData, URLSafeTimedSerializer
+from sqlalchemy import delete
+from db import session_scope
+from models import GameSession, utcnow
+from catalog import get_posts, catalog_version
+from daily_questions import DEFAULT_NUM_QUESTIONS
+
+GAME_STORE = os.getenv("GAME_STORE", "db")
+# Seconds an unfinished game is kept
+GAME_TTL = int(os.getenv("GAME_TTL", "3600"))
+# Games held by the memory store before the least recently used is dropped
+GAME_STORE_MAX_GAMES = int(os.getenv("GAME_STORE_MAX_GAMES", "10000"))
+# Seconds between sweeps of expired rows in the db store
+GAME_PURGE_INTERVAL = int(os.getenv("GAME_PURGE_INTERVAL", "300"))
+
+
+def new_game_id() -> str:
+    return secrets.token_urlsafe(16)
+
+
+def select_posts(posts: list[dict], rng, n: int = DEFAULT_NUM_QUESTIONS) -> list[dict]:
+    """n unique posts drawn with `rng` (every post if the catalog is smaller)."""
+    if len(posts) < n:
+        return list(posts)
+    return rng.sample(posts, n)
+
+
+class _SavedGames:
+    """start() for the stores that keep the drawn questions."""
+
+    def start(self, posts: list[dict]) -> tuple[str, list[dict]]:
+        questions = select_posts(posts, random)
+        return self.create(questions), questions
+
+
+class MemoryGameStore(_SavedGames):
+    """Games in a process-local LRU; each expires GAME_TTL seconds after creation."""
+
+    def __init__(self, ttl: int = GAME_TTL, max_games: int = GAME_STORE_MAX_GAMES):
+        self.ttl = ttl
+        self.max_games = max_games
+        self._games = OrderedDict()  # game_id -> (expires_at, questions)
+        self._lock = threading.Lock()
+
+    def create(self, questions: list[dict]) -> str:
+        game_id = new_game_id()
+        now = time.monotonic()
+        with self._lock:
+            self._games[game_id] = (now + self.ttl, questions)
+            # Drop expired games from the cold end, then enforce the size cap
+            while self._games:
+                oldest_id, (expires_at, _) = next(iter(self._games.items()))
+                if expires_at > now and len(self._games) <= self.max_games:
+                    break
+                del self._games[oldest_id]
+        return game_id
+
+    def get(self, game_id: str) -> list[dict] | None:
+        with self._lock:
+            entry = self._games.get(game_id)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._games[game_id]
+                return None
+            self._games.move_to_end(game_id)
+            return entry[1]
+
+    def delete(self, game_id: str) -> None:
+        with self._lock:
+            self._games.pop(game_id, None)
+
+
+class DBGameStore(_SavedGames):
+    """Games in the game_sessions table; expired rows are swept every GAME_PURGE_INTERVAL."""
+
+    def __init__(self, ttl: int = GAME_TTL):
+        self.ttl = ttl
+        self._next_purge = 0.0
+
+    def create(self, questions: list[dict]) -> str:
+        game_id = new_game_id()
+        now = utcnow()
+        with session_scope() as session:
+            session.add(GameSession(
+                id=game_id,
+                questions=json.dumps(questions, separators=(",", ":")),
+                expires_at=now + timedelta(seconds=self.ttl),
+            ))
+            if time.monotonic() >= self._next_purge:
+                self._next_purge = time.monotonic() + GAME_PURGE_INTERVAL
+                session.execute(delete(GameSession).where(GameSession.expires_at <= now))
+            session.commit()
+        return game_id
+
+    def get(self, game_id: str) -> list[dict] | None:
+        with session_scope() as session:
+            game = session.get(GameSession, game_id)
+            if game is None or game.expires_at <= utcnow():
+                return None
+            return json.loads(game.questions)
+
+    def delete(self, game_id: str) -> None:
+        with session_scope() as session:
+            session.execute(delete(GameSession).where(GameSession.id == game_id))
+            session.commit()
+
+
+class TokenGameStore:
+    """
+    Stateless games: the id is a signed, timestamped [seed, catalog version]
+    token, and the questions are redrawn with random.Random(seed). Any worker
+    holding the same FLASK_SECRET_KEY and catalog can serve any game. Tokens are
+    refused once GAME_TTL has passed or the catalog has changed.
+    """
+
+    def __init__(self, ttl: int = GAME_TTL):
+        self.ttl = ttl
+
+    def _serializer(self) -> URLSafeTimedSerializer:
+        return URLSafeTimedSerializer(current_app.secret_key, salt="game-token")
+
+    def start(self, posts: list[dict]) -> tuple[str, list[dict]]:
+        seed = secrets.randbits(63)
+        token = self._serializer().dumps([seed, catalog_version()])
+        return token, select_posts(posts, random.Random(seed))
+
+    def get(self, game_id: str) -> list[dict] | None:
+        try:
+            seed, version = self._serializer().loads(game_id, max_age=self.ttl)
+        except (BadData, TypeError, ValueError):
+            return None
+        if version != catalog_version():
+            return None
+        return select_posts(get_posts(), random.Random(seed))
+
+    def delete(self, game_id: str) -> None:
+        """Nothing to delete; the token simply lapses after GAME_TTL."""
+
+
+GAME_STORES = {"memory": MemoryGameStore, "db": DBGameStore, "token": TokenGameStore}
+if GAME_STORE not in GAME_STORES:
+    raise ValueError(f"Unknown GAME_STORE {GAME_STORE!r}; expected one of {sorted(GAME_STORES)}")
+game_store = GAME_STORES[GAME_STORE]()
@@ -0,0 +1,41 @@
+# backend/gunicorn.conf.py
+# Run from backend/:  gunicorn   (this file is picked up automatically)
+import os
+
+wsgi_app = "app:create_app()"
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+# db.pool_settings() sizes each worker's connection pool from these two variables,
+# so defaults are written back to the environment the workers inherit
+workers = int(os.environ.setdefault("WEB_CONCURRENCY", "2"))
+threads = int(os.environ.setdefault("GUNICORN_THREADS", "4"))
+worker_class = "gthread"
+
+
+def on_starting(server):
+    """Once, in the master: create missing tables and load the post catalog."""
+    import catalog
+    import answer_archive
+    from db import init_db, engine, read_engine
+
+    init_db()
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            # Only once user_answers has been partitioned (answer_archive.py partition)
+            if answer_archive.is_partitioned(conn):
+                for name in answer_archive.ensure_month_partitions(conn):
+                    server.log.info("Created partition %s", name)
+    # Don't hand the master's open connections to forked workers
+    engine.dispose()
+    read_engine.dispose()
+    server.log.info("Preloaded %d catalog posts", catalog.preload())
+
+
+def post_fork(server, worker):
+    from db import engine, read_engine
+    from cohorts import warm_alltime_cohort_ranks
+
+    # Drop any pooled connections inherited from the master without closing them
+    engine.dispose(close=False)
+    read_engine.dispose(close=False)
+    # Rank every user once per worker up front, not inside its first /api/results request
+    warm_alltime_cohort_ranks()
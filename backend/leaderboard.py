@@ -0,0 +1,398 @@
+"""
+Leaderboard query helpers.
+
+This module handles:
+- Ordering of the all-time leaderboard (best `users.score`, NULL scores last)
+- Keyset (cursor) pagination on (score, uid)
+- A short-lived cache of the total user count
+- A periodic snapshot table holding every user's rank, for O(1) rank lookups
+- Windowed (today / last 7 days / all time) leaderboards over user_daily_scores
+"""
+import os
+import sys
+import time
+import threading
+from datetime import datetime, date, timedelta
+from sqlalchemy import select, func, or_, and_, delete, insert, literal, DateTime
+from sqlalchemy.exc import IntegrityError, OperationalError
+from db import SessionLocal, session_scope, use_profile, lift_statement_timeout
+from pagination import encode_cursor, decode_cursor
+from models import User, LeaderboardSnapshot, UserDailyScore, utcnow
+from daily_questions import get_eastern_date
+
+# Seconds the cached user count is trusted before it is recounted
+USER_COUNT_TTL = float(os.getenv("LEADERBOARD_COUNT_TTL", "60"))
+
+# Seconds between leaderboard snapshot refreshes
+SNAPSHOT_INTERVAL = float(os.getenv("LEADERBOARD_SNAPSHOT_INTERVAL", "300"))
+# Seconds before a worker retries a background snapshot rebuild
+SNAPSHOT_RETRY_DELAY = 30.0
+
+# Seconds a computed windowed leaderboard is served before it is recomputed
+WINDOW_TTL = float(os.getenv("LEADERBOARD_WINDOW_TTL", "30"))
+
+# Window name -> number of Eastern days it covers (None = all time)
+LEADERBOARD_WINDOWS = {"today": 1, "week": 7, "all": None}
+
+_user_count_cache = {"value": None, "expires_at": 0.0}
+_window_cache = {}
+_snapshot_refresh = {"lock": threading.Lock(), "next_at": 0.0}
+
+# Matches ix_users_score_nulls_last so both paging modes walk the index
+LEADERBOARD_ORDER = (User.score.is_(None).asc(), User.score.desc(), User.uid.asc())
+
+
+def get_total_users(session=None) -> int:
+    """
+    Return the number of users, recounting at most once per USER_COUNT_TTL.
+    """
+    now = time.monotonic()
+    if _user_count_cache["value"] is not None and now < _user_count_cache["expires_at"]:
+        return _user_count_cache["value"]
+
+    if session is None:
+        with session_scope() as s:
+            total = s.execute(select(func.count()).select_from(User)).scalar() or 0
+    else:
+        total = session.execute(select(func.count()).select_from(User)).scalar() or 0
+
+    _user_count_cache["value"] = int(total)
+    _user_count_cache["expires_at"] = now + USER_COUNT_TTL
+    return _user_count_cache["value"]
+
+
+def note_user_created() -> None:
+    """
+    Keep the cached count in step with a user insert made by this process.
+    Other workers pick the new user up when their TTL runs out.
+    """
+    if _user_count_cache["value"] is not None:
+        _user_count_cache["value"] += 1
+
+
+def encode_leaderboard_cursor(user: User) -> str:
+    """Build an opaque cursor pointing just past `user` in leaderboard order."""
+    return encode_cursor([user.score, user.uid])
+
+
+def decode_leaderboard_cursor(cursor: str) -> tuple[float | None, str]:
+    """
+    Decode a cursor produced by encode_leaderboard_cursor.
+    Raises ValueError if the cursor is malformed.
+    """
+    score, uid = decode_cursor(cursor, 2)
+    if not isinstance(uid, str) or not (score is None or isinstance(score, (int, float))):
+        raise ValueError("invalid cursor")
+    return (float(score) if score is not None else None), uid
+
+
+def after_cursor(score: float | None, uid: str):
+    """
+    WHERE clause selecting the rows that follow (score, uid) in leaderboard order.
+    """
+    if score is None:
+        return and_(User.score.is_(None), User.uid > uid)
+    return or_(
+        User.score < score,
+        and_(User.score == score, User.uid > uid),
+        User.score.is_(None),
+    )
+
+
+def leaderboard_page(session, limit: int, offset: int = 0, cursor: str | None = None) -> tuple[list[User], str | None]:
+    """
+    Fetch one leaderboard page.
+    When `cursor` is given, rows are located with a keyset seek instead of OFFSET.
+    Returns (users, next_cursor); next_cursor is None on the last page.
+    """
+    q = select(User).order_by(*LEADERBOARD_ORDER)
+    if cursor:
+        q = q.where(after_cursor(*decode_leaderboard_cursor(cursor)))
+    else:
+        q = q.offset(offset)
+    # Fetch one extra row to know whether another page exists
+    rows = session.execute(q.limit(limit + 1)).scalars().all()
+    next_cursor = encode_leaderboard_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def refresh_leaderboard_snapshot(session) -> int:
+    """
+    Rebuild leaderboard_snapshot from users in a single INSERT ... SELECT.
+    Ranks use the same rule as the live rank: 1 + count of strictly higher scores,
+    with NULL scores counted as 0. Returns the number of rows written.
+    Runs without the web profile's statement timeout, which a large users
+    table would exceed from a web worker's background rebuild.
+    """
+    lift_statement_timeout(session)
+    score = func.coalesce(User.score, 0.0)
+    ranked = select(
+        User.uid,
+        score,
+        func.rank().over(order_by=score.desc()),
+        func.coalesce(User.games_played, 0),
+        literal(utcnow(), DateTime),
+    )
+    session.execute(delete(LeaderboardSnapshot))
+    result = session.execute(
+        insert(LeaderboardSnapshot).from_select(
+            ["uid", "score", "rank", "games_played", "snapshot_at"], ranked
+        )
+    )
+    session.commit()
+    return result.rowcount
+
+
+def _refresh_snapshot_in_background() -> None:
+    """
+    Rebuild the snapshot on a daemon thread, at most one rebuild per process
+    and one attempt per SNAPSHOT_RETRY_DELAY. Failures (another worker's
+    concurrent rebuild, a locked table, a lock timeout) are logged and retried
+    by a later stale read or by run_snapshot_job.
+    """
+    now = time.monotonic()
+    if now < _snapshot_refresh["next_at"] or not _snapshot_refresh["lock"].acquire(blocking=False):
+        return
+    _snapshot_refresh["next_at"] = now + SNAPSHOT_RETRY_DELAY
+
+    def rebuild():
+        try:
+            with SessionLocal() as session:
+                try:
+                    refresh_leaderboard_snapshot(session)
+                except (IntegrityError, OperationalError) as e:
+                    session.rollback()
+                    print(f"Leaderboard snapshot refresh skipped: {e}")
+        finally:
+            _snapshot_refresh["lock"].release()
+
+    threading.Thread(target=rebuild, name="leaderboard-snapshot", daemon=True).start()
+
+
+def snapshot_row(session, uid: str) -> LeaderboardSnapshot | None:
+    """
+    Return `uid`'s snapshot row (None if the user is not in the snapshot).
+    A snapshot older than SNAPSHOT_INTERVAL is still served; the rebuild runs
+    in the background, so no request pays for ranking every user.
+    """
+    cutoff = utcnow() - timedelta(seconds=SNAPSHOT_INTERVAL)
+    snap = session.get(LeaderboardSnapshot, uid)
+    if snap is not None:
+        taken_at = snap.snapshot_at
+    else:
+        taken_at = session.execute(select(func.max(LeaderboardSnapshot.snapshot_at))).scalar()
+    if taken_at is None or taken_at < cutoff:
+        _refresh_snapshot_in_background()
+    return snap
+
+
+def live_rank(session, score: float, since: datetime | None) -> int:
+    """
+    Rank for `score` against the snapshot, corrected for users changed after `since`.
+    Users updated since the snapshot are compared by their live score instead of
+    their snapshot score, so only the (small) set of recent players is read from users.
+    """
+    if since is None:
+        higher = session.execute(
+            select(func.count()).select_from(User)
+            .where(func.coalesce(User.score, 0.0) > score)
+        ).scalar() or 0
+        return int(higher) + 1
+
+    changed = select(User.uid).where(User.updated_at > since)
+    higher_in_snapshot = session.execute(
+        select(func.count()).select_from(LeaderboardSnapshot)
+        .where(LeaderboardSnapshot.score > score, LeaderboardSnapshot.uid.not_in(changed))
+    ).scalar() or 0
+    higher_changed = session.execute(
+        select(func.count()).select_from(User)
+        .where(User.updated_at > since, func.coalesce(User.score, 0.0) > score)
+    ).scalar() or 0
+    return int(higher_in_snapshot) + int(higher_changed) + 1
+
+
+def get_user_rank(session, user: User, live: bool = False) -> tuple[int, datetime | None]:
+    """
+    Return (rank, snapshot_at) for `user`.
+    Reads the rank from the snapshot by primary key. With `live`, or when the user
+    has no snapshot row yet, applies deltas from users who scored since the snapshot.
+    """
+    snap = snapshot_row(session, user.uid)
+    if snap is not None and not live:
+        return snap.rank, snap.snapshot_at
+    if snap is not None:
+        since = snap.snapshot_at
+    else:
+        since = session.execute(select(func.max(LeaderboardSnapshot.snapshot_at))).scalar()
+    return live_rank(session, float(user.score or 0.0), since), since
+
+
+def window_start(window: str, today: date) -> date | None:
+    """
+    First date (inclusive) covered by `window` ending on `today`.
+    Returns None for the all-time window. Raises ValueError for unknown windows.
+    """
+    if window not in LEADERBOARD_WINDOWS:
+        raise ValueError(f"window must be one of {', '.join(LEADERBOARD_WINDOWS)}")
+    days = LEADERBOARD_WINDOWS[window]
+    if days is None:
+        return None
+    return today - timedelta(days=days - 1)
+
+
+def _window_filter(start: date | None, today: date):
+    if start is None:
+        return UserDailyScore.date <= today
+    if start == today:
+        return UserDailyScore.date == today
+    return UserDailyScore.date.between(start, today)
+
+
+def compute_window_leaderboard(session, window: str, today: date | None = None) -> list[dict]:
+    """
+    Rank users by their mean daily score over `window` with one GROUP BY over
+    user_daily_scores. Returns entries ordered best first, each with its rank.
+    """
+    today = today or get_eastern_date()
+    start = window_start(window, today)
+    score = func.avg(UserDailyScore.avg_score).label("score")
+    rows = session.execute(
+        select(
+            UserDailyScore.user_id,
+            User.display_name,
+            score,
+            func.avg(UserDailyScore.avg_score_dem).label("score_dem"),
+            func.avg(UserDailyScore.avg_score_rep).label("score_rep"),
+            func.count().label("days_played"),
+        )
+        .outerjoin(User, User.uid == UserDailyScore.user_id)
+        .where(_window_filter(start, today))
+        .group_by(UserDailyScore.user_id, User.display_name)
+        .order_by(score.desc(), UserDailyScore.user_id)
+    ).all()
+
+    # Same rank rule as the all-time board: 1 + count of strictly higher scores
+    entries = []
+    prev_score = None
+    rank = 0
+    for idx, row in enumerate(rows):
+        if prev_score is None or row.score < prev_score:
+            rank = idx + 1
+        prev_score = row.score
+        entries.append({
+            "id": row.user_id,
+            "displayName": row.display_name,
+            "score": round(float(row.score), 2),
+            "scoreDem": round(float(row.score_dem), 2),
+            "scoreRep": round(float(row.score_rep), 2),
+            "daysPlayed": int(row.days_played),
+            "rank": rank,
+        })
+    return entries
+
+
+def get_window_leaderboard(session, window: str) -> dict:
+    """
+    Cached version of compute_window_leaderboard.
+    Each window is recomputed at most once per WINDOW_TTL, and immediately when
+    the Eastern date rolls over. Returns {"date", "entries", "ranks"}.
+    """
+    today = get_eastern_date()
+    cached = _window_cache.get(window)
+    now = time.monotonic()
+    if cached and cached["date"] == today and now < cached["expires_at"]:
+        return cached
+
+    entries = compute_window_leaderboard(session, window, today)
+    cached = {
+        "date": today,
+        "entries": entries,
+        "ranks": {e["id"]: idx for idx, e in enumerate(entries)},
+        "expires_at": now + WINDOW_TTL,
+    }
+    _window_cache[window] = cached
+    return cached
+
+
+def window_rank_for_user(session, window: str, user_id: str) -> dict | None:
+    """
+    Return the user's entry (score, days played, rank) and the number of ranked
+    users for `window`, or None if the user has no completed days in it.
+    Served from the window cache when warm; otherwise answered with indexed
+    aggregate queries instead of ranking every user.
+    """
+    today = get_eastern_date()
+    cached = _window_cache.get(window)
+    if cached and cached["date"] == today and time.monotonic() < cached["expires_at"]:
+        idx = cached["ranks"].get(user_id)
+        if idx is None:
+            return None
+        return {**cached["entries"][idx], "total": len(cached["entries"])}
+
+    start = window_start(window, today)
+    in_window = _window_filter(start, today)
+    mine = session.execute(
+        select(
+            func.avg(UserDailyScore.avg_score),
+            func.avg(UserDailyScore.avg_score_dem),
+            func.avg(UserDailyScore.avg_score_rep),
+            func.count(),
+        ).where(UserDailyScore.user_id == user_id, in_window)
+    ).one()
+    if not mine[3]:
+        return None
+
+    if start == today:
+        # One row per user: a range count on (date, avg_score)
+        higher = session.execute(
+            select(func.count()).select_from(UserDailyScore)
+            .where(in_window, UserDailyScore.avg_score > mine[0])
+        ).scalar() or 0
+        total = session.execute(
+            select(func.count()).select_from(UserDailyScore).where(in_window)
+        ).scalar() or 0
+    else:
+        per_user = (
+            select(func.avg(UserDailyScore.avg_score).label("score"))
+            .where(in_window)
+            .group_by(UserDailyScore.user_id)
+            .subquery()
+        )
+        higher, total = session.execute(
+            select(
+                func.count().filter(per_user.c.score > mine[0]),
+                func.count(),
+            ).select_from(per_user)
+        ).one()
+
+    display_name = session.execute(select(User.display_name).where(User.uid == user_id)).scalar()
+    return {
+        "id": user_id,
+        "displayName": display_name,
+        "score": round(float(mine[0]), 2),
+        "scoreDem": round(float(mine[1]), 2),
+        "scoreRep": round(float(mine[2]), 2),
+        "daysPlayed": int(mine[3]),
+        "rank": int(higher or 0) + 1,
+        "total": int(total or 0),
+    }
+
+
+def run_snapshot_job(interval: float = SNAPSHOT_INTERVAL) -> None:
+    """Rebuild the snapshot every `interval` seconds until interrupted."""
+    while True:
+        with SessionLocal() as session:
+            try:
+                rows = refresh_leaderboard_snapshot(session)
+                print(f"Leaderboard snapshot refreshed: {rows} users")
+            except (IntegrityError, OperationalError) as e:
+                # A web worker rebuilt it at the same moment, or the table was locked
+                session.rollback()
+                print(f"Leaderboard snapshot refresh skipped: {e}")
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    # python leaderboard.py [interval_seconds]  - run the snapshot job in the foreground
+    use_profile("batch")
+    run_snapshot_job(float(sys.argv[1]) if len(sys.argv) > 1 else SNAPSHOT_INTERVAL)
@@ -0,0 +1,229 @@
+"""
+Live leaderboard and results updates for Server-Sent Events streams.
+
+This module handles:
+- A single in-process publisher that watches user_daily_scores for new rows
+- Computing rankings once per change and diffing them against the last state
+- Fanning the resulting rank deltas out to every subscribed stream
+
+N open streams on a worker cost one ranking computation per change, not N polls.
+Other workers' inserts are picked up by polling a cheap watermark (max(id) of
+user_daily_scores plus the leaderboard snapshot time, so rescores and snapshot
+rebuilds, which add no rows, are published too); inserts made by this worker
+wake the publisher immediately via notify().
+
+Each open stream holds one of the worker's threads for as long as the client
+stays connected, so streams per worker are capped (stream_slots) below the
+gthread pool size; further clients get a 503 and retry, leaving threads free
+for ordinary requests.
+"""
+import os
+import json
+import queue
+import threading
+from datetime import date
+from sqlalchemy import select, func
+from db import SessionLocal
+from models import UserDailyScore, LeaderboardSnapshot
+from leaderboard import compute_window_leaderboard
+from daily_questions import get_eastern_date
+from ranking import rank_desc
+
+# Seconds between watermark checks for rows inserted by other workers
+POLL_INTERVAL = float(os.getenv("STREAM_POLL_INTERVAL", "2"))
+# Seconds of silence before a keep-alive comment is sent to the client
+HEARTBEAT_INTERVAL = float(os.getenv("STREAM_HEARTBEAT_INTERVAL", "15"))
+# Events buffered per subscriber before it is considered stalled and dropped
+SUBSCRIBER_QUEUE_SIZE = 100
+# Concurrent streams per worker; defaults to half of the worker's gthread pool
+MAX_STREAMS = int(os.getenv("STREAM_MAX_PER_WORKER", str(max(1, int(os.getenv("GUNICORN_THREADS", "4")) // 2))))
+
+# Queued in place of an event to end a dropped subscriber's stream
+_CLOSE = object()
+stream_slots = threading.BoundedSemaphore(MAX_STREAMS)
+
+
+def compute_results_state(session, date: date) -> dict:
+    """
+    Daily ranks for `date` keyed by user: {user_id: {"rank", "rank_dem", "rank_rep"}}.
+    Uses one query over user_daily_scores (not the per-question answers).
+    """
+    rows = session.execute(
+        select(
+            UserDailyScore.user_id,
+            UserDailyScore.avg_score,
+            UserDailyScore.avg_score_dem,
+            UserDailyScore.avg_score_rep,
+        ).where(UserDailyScore.date == date)
+    ).all()
+    overall = rank_desc(rows, lambda r: r.avg_score)
+    dem = rank_desc(rows, lambda r: r.avg_score_dem)
+    rep = rank_desc(rows, lambda r: r.avg_score_rep)
+    return {
+        uid: {"rank": overall[uid], "rank_dem": dem[uid], "rank_rep": rep[uid]}
+        for uid in overall
+    }
+
+
+def compute_leaderboard_state(session, window: str) -> dict:
+    """Windowed leaderboard keyed by user: {user_id: {"rank", "score", "displayName"}}."""
+    return {
+        e["id"]: {"rank": e["rank"], "score": e["score"], "displayName": e["displayName"]}
+        for e in compute_window_leaderboard(session, window)
+    }
+
+
+def change_watermark(session) -> tuple:
+    """
+    Value that changes whenever ranks may have: a new user_daily_scores row, or
+    a leaderboard snapshot rebuild (rescore.py rebuilds it after rewriting
+    scores in place). Two index-only lookups.
+    """
+    latest = session.execute(select(func.max(UserDailyScore.id))).scalar()
+    snapshot_at = session.execute(select(func.max(LeaderboardSnapshot.snapshot_at))).scalar()
+    return latest, snapshot_at
+
+
+def diff_state(old: dict, new: dict) -> dict:
+    """Entries of `new` that are missing from or different in `old`."""
+    return {uid: row for uid, row in new.items() if old.get(uid) != row}
+
+
+class RankPublisher:
+    """
+    Watches user_daily_scores and publishes rank deltas per topic.
+    Topics are ("leaderboard", window) or ("results", date).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._subscribers = {}  # topic -> set of queues
+        self._states = {}  # topic -> last published state
+        self._watermark = None
+        self._thread = None
+
+    def subscribe(self, topic: tuple) -> tuple[queue.Queue, dict]:
+        """
+        Register a subscriber for `topic`.
+        Returns (queue of future events, current full state for the initial snapshot).
+        """
+        q = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(topic, set()).add(q)
+            state = self._states.get(topic)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="rank-publisher", daemon=True)
+                self._thread.start()
+        if state is None:
+            with SessionLocal() as session:
+                state = self._compute(session, topic)
+            with self._lock:
+                self._states.setdefault(topic, state)
+        return q, state
+
+    def unsubscribe(self, topic: tuple, q: queue.Queue) -> None:
+        with self._lock:
+            subs = self._subscribers.get(topic)
+            if subs is not None:
+                subs.discard(q)
+                if not subs:
+                    del self._subscribers[topic]
+                    self._states.pop(topic, None)
+
+    def notify(self) -> None:
+        """Wake the publisher now; call after committing a UserDailyScore."""
+        self._wake.set()
+
+    def _compute(self, session, topic: tuple) -> dict:
+        kind, key = topic
+        if kind == "leaderboard":
+            return compute_leaderboard_state(session, key)
+        return compute_results_state(session, key)
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(POLL_INTERVAL)
+            self._wake.clear()
+            with self._lock:
+                topics = list(self._subscribers)
+            if not topics:
+                with self._lock:
+                    if not self._subscribers:
+                        self._thread = None
+                        return
+                continue
+            try:
+                self._publish_changes(topics)
+            except Exception as e:
+                # Keep the publisher alive through transient DB errors
+                print(f"Rank publisher failed to refresh: {e}")
+
+    def _publish_changes(self, topics: list) -> None:
+        with SessionLocal() as session:
+            watermark = change_watermark(session)
+            if watermark == self._watermark:
+                return
+            self._watermark = watermark
+            today = get_eastern_date()
+            for topic in topics:
+                new_state = self._compute(session, topic)
+                with self._lock:
+                    old_state = self._states.get(topic, {})
+                    self._states[topic] = new_state
+                    subs = list(self._subscribers.get(topic, ()))
+                changes = diff_state(old_state, new_state)
+                if not changes:
+                    continue
+                event = {"date": today.isoformat(), "total": len(new_state), "changes": changes}
+                for q in subs:
+                    try:
+                        q.put_nowait(event)
+                    except queue.Full:
+                        # The client stopped reading; drop it so it reconnects
+                        self.unsubscribe(topic, q)
+                        _close_queue(q)
+
+
+def _close_queue(q: queue.Queue) -> None:
+    """Make the stream reading `q` end, evicting its oldest event if the queue is full."""
+    while True:
+        try:
+            q.put_nowait(_CLOSE)
+            return
+        except queue.Full:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                pass
+
+
+publisher = RankPublisher()
+
+
+def format_sse(data: dict, event: str | None = None) -> str:
+    """Encode one Server-Sent Events message."""
+    msg = f"data: {json.dumps(data, separators=(',', ':'))}\n\n"
+    return f"event: {event}\n{msg}" if event else msg
+
+
+def stream_topic(topic: tuple):
+    """
+    Generator of SSE messages for `topic`: a full snapshot first, then deltas.
+    Sends keep-alive comments while idle and unsubscribes when the client leaves.
+    Ends when the publisher drops the subscriber, so the client reconnects.
+    """
+    q, state = publisher.subscribe(topic)
+    try:
+        yield format_sse({"total": len(state), "changes": state}, event="snapshot")
+        while True:
+            try:
+                event = q.get(timeout=HEARTBEAT_INTERVAL)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            if event is _CLOSE:
+                return
+            yield format_sse(event, event="ranks")
+    finally:
+        publisher.unsubscribe(topic, q)
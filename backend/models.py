@@ -1,10 +1,16 @@
 # backend/models.py
 from sqlalchemy import (
-    Column, Integer, String, Float, DateTime, ForeignKey, Text, Index
+    Column, Integer, String, Float, Date, DateTime, ForeignKey, Text, Index
 )
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from db import Base
-from datetime import datetime
+from datetime import datetime, timezone, date as date_type
+
+
+def utcnow() -> datetime:
+    """The current UTC time as a naive datetime, the way DateTime columns store it."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 
 class Topic(Base):
     __tablename__ = "topics"
@@ -21,7 +27,7 @@ class Survey(Base):
     title: Mapped[str | None] = mapped_column(String)
     document_url: Mapped[str | None] = mapped_column(String)
     cached_pdf_url: Mapped[str | None] = mapped_column(String)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow)
 
     topic = relationship("Topic", back_populates="surveys")
     questions = relationship("Question", back_populates="survey", cascade="all, delete-orphan")
@@ -66,6 +72,7 @@ class Post(Base):
     mappings = relationship("PostQuestionMap", back_populates="post", cascade="all, delete-orphan")
 
 Index("ix_posts_platform_external", Post.platform, Post.external_id)
+Index("ix_posts_topic_id", Post.topic_id)
 
 class PostQuestionMap(Base):
     __tablename__ = "post_question_map"
@@ -78,6 +85,9 @@ class PostQuestionMap(Base):
 
     post = relationship("Post", back_populates="mappings")
 
+Index("ix_post_question_map_post", PostQuestionMap.post_id)
+Index("ix_post_question_map_question", PostQuestionMap.question_id)
+
 # --- User tracking for leaderboard and logging ---
 class User(Base):
     __tablename__ = "users"
@@ -87,32 +97,48 @@ class User(Base):
     score: Mapped[float | None] = mapped_column(Float, default=0.0)
     games_played: Mapped[int | None] = mapped_column(Integer, default=0)
     survey_responses: Mapped[str | None] = mapped_column(Text)  # JSON string of survey responses
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
-    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow, onupdate=utcnow)
 
     rounds = relationship("UserRound", back_populates="user", cascade="all, delete-orphan")
 
+# Matches the leaderboard ordering (NULL scores last, best score first, uid tiebreak)
+Index("ix_users_score_nulls_last", User.score.is_(None), User.score.desc(), User.uid)
+Index("ix_users_updated_at", User.updated_at)
+
+# Periodic materialization of the all-time leaderboard (see leaderboard.refresh_leaderboard_snapshot)
+class LeaderboardSnapshot(Base):
+    __tablename__ = "leaderboard_snapshot"
+    uid: Mapped[str] = mapped_column(String, primary_key=True)
+    score: Mapped[float] = mapped_column(Float, nullable=False)  # NULL user scores are stored as 0
+    rank: Mapped[int] = mapped_column(Integer, nullable=False)  # 1 + count of users with a strictly higher score
+    games_played: Mapped[int] = mapped_column(Integer, nullable=False)
+    snapshot_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+Index("ix_leaderboard_snapshot_score", LeaderboardSnapshot.score)
+Index("ix_leaderboard_snapshot_taken", LeaderboardSnapshot.snapshot_at)
+
 
 class UserRound(Base):
     __tablename__ = "user_rounds"
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_uid: Mapped[str] = mapped_column(String, ForeignKey("users.uid"), nullable=False)
     average_score: Mapped[float] = mapped_column(Float, nullable=False)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow)
 
     user = relationship("User", back_populates="rounds")
 # Daily questions model - stores the 5 questions selected for each day
 class DailyQuestion(Base):
     __tablename__ = "daily_questions"
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    date: Mapped[str] = mapped_column(String, nullable=False)  # Date string in YYYY-MM-DD format (Eastern time)
+    date: Mapped[date_type] = mapped_column(Date, nullable=False)  # Eastern calendar day (get_eastern_date)
     question_id: Mapped[str] = mapped_column(String, nullable=False)  # Question ID from survey_metadata (e.g., "subdir/image_name")
     question_order: Mapped[int] = mapped_column(Integer, nullable=False)  # Order of question (0-4)
     img_path: Mapped[str] = mapped_column(String, nullable=False)  # Relative path to image
     dem: Mapped[float] = mapped_column(Float, nullable=False)  # Ground truth dem value
     rep: Mapped[float] = mapped_column(Float, nullable=False)  # Ground truth rep value
     topic: Mapped[str | None] = mapped_column(String)  # Topic/subdirectory name
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow)
 
 Index("ix_daily_questions_date_order", DailyQuestion.date, DailyQuestion.question_order)
 Index("ix_daily_questions_date_question", DailyQuestion.date, DailyQuestion.question_id)
@@ -122,7 +148,7 @@ class UserAnswer(Base):
     __tablename__ = "user_answers"
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[str] = mapped_column(String, nullable=False)  # Firebase user ID
-    date: Mapped[str] = mapped_column(String, nullable=False)  # Date string in YYYY-MM-DD format
+    date: Mapped[date_type] = mapped_column(Date, nullable=False)  # Eastern calendar day (get_eastern_date)
     question_id: Mapped[str] = mapped_column(String, nullable=False)
     dem_guess: Mapped[float] = mapped_column(Float, nullable=False)
     rep_guess: Mapped[float] = mapped_column(Float, nullable=False)
@@ -131,20 +157,103 @@ class UserAnswer(Base):
     score: Mapped[float] = mapped_column(Float, nullable=False)
     score_dem: Mapped[float] = mapped_column(Float, nullable=False)
     score_rep: Mapped[float] = mapped_column(Float, nullable=False)
-    submitted_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    submitted_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow)
 
 
 Index("ix_user_answers_user_date_question", UserAnswer.user_id, UserAnswer.date, UserAnswer.question_id, unique=True)
+# Guess history ordering (newest first) and keyset seeks; id breaks submitted_at ties
+Index("ix_user_answers_user_date_submitted", UserAnswer.user_id, UserAnswer.date, UserAnswer.submitted_at, UserAnswer.id)
+# Per-day scans: question lookups and per-question ranking (compute_rankings_for_date)
+Index("ix_user_answers_date_question", UserAnswer.date, UserAnswer.question_id)
+Index("ix_user_answers_date_score", UserAnswer.date, UserAnswer.score)
 
 # User daily scores model - stores aggregated daily scores (only when all 5 questions are answered)
 class UserDailyScore(Base):
     __tablename__ = "user_daily_scores"
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[str] = mapped_column(String, nullable=False)  # Firebase user ID
-    date: Mapped[str] = mapped_column(String, nullable=False)  # Date string in YYYY-MM-DD format (Eastern time)
+    date: Mapped[date_type] = mapped_column(Date, nullable=False)  # Eastern calendar day (get_eastern_date)
     avg_score: Mapped[float] = mapped_column(Float, nullable=False)  # Average score across all 5 questions
     avg_score_dem: Mapped[float] = mapped_column(Float, nullable=False)  # Average Democrat score across all 5 questions
     avg_score_rep: Mapped[float] = mapped_column(Float, nullable=False)  # Average Republican score across all 5 questions
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    party_identity: Mapped[str | None] = mapped_column(String)  # Copied from signup_surveys when the day is scored
+    ideology: Mapped[str | None] = mapped_column(String)  # Copied from signup_surveys when the day is scored
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow)
 
 Index("ix_user_daily_scores_user_date", UserDailyScore.user_id, UserDailyScore.date, unique=True)
+# Windowed leaderboards: today's ordering/rank counts, and covering scans for multi-day aggregates
+Index("ix_user_daily_scores_date_score", UserDailyScore.date, UserDailyScore.avg_score)
+Index("ix_user_daily_scores_date_score_dem", UserDailyScore.date, UserDailyScore.avg_score_dem)
+Index("ix_user_daily_scores_date_score_rep", UserDailyScore.date, UserDailyScore.avg_score_rep)
+Index(
+    "ix_user_daily_scores_date_user_scores",
+    UserDailyScore.date, UserDailyScore.user_id,
+    UserDailyScore.avg_score, UserDailyScore.avg_score_dem, UserDailyScore.avg_score_rep,
+)
+
+# Per-user rollup of gameplay counters, maintained as answers are submitted
+class UserStats(Base):
+    __tablename__ = "user_stats"
+    user_id: Mapped[str] = mapped_column(String, primary_key=True)  # Firebase user ID
+    answers_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # Rows in user_answers
+    days_completed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # Rows in user_daily_scores
+    score_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)  # Sum of avg_score over completed days
+    score_dem_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)  # Sum of avg_score_dem
+    score_rep_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)  # Sum of avg_score_rep
+    party_identity: Mapped[str | None] = mapped_column(String)  # Copied from signup_surveys
+    ideology: Mapped[str | None] = mapped_column(String)  # Copied from signup_surveys
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow, onupdate=utcnow)
+
+# Incrementally maintained guess histograms per daily question (see distributions.py)
+class QuestionGuessCell(Base):
+    __tablename__ = "question_guess_cells"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    date: Mapped[date_type] = mapped_column(Date, nullable=False)  # Eastern calendar day (get_eastern_date)
+    question_id: Mapped[str] = mapped_column(String, nullable=False)
+    dem_bin: Mapped[int] = mapped_column(Integer, nullable=False)  # dem_guess // bin width
+    rep_bin: Mapped[int] = mapped_column(Integer, nullable=False)  # rep_guess // bin width
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+Index("ix_question_guess_cells_key", QuestionGuessCell.date, QuestionGuessCell.question_id,
+      QuestionGuessCell.dem_bin, QuestionGuessCell.rep_bin, unique=True)
+
+class QuestionGuessError(Base):
+    __tablename__ = "question_guess_errors"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    date: Mapped[date_type] = mapped_column(Date, nullable=False)  # Eastern calendar day (get_eastern_date)
+    question_id: Mapped[str] = mapped_column(String, nullable=False)
+    axis: Mapped[str] = mapped_column(String, nullable=False)  # "dem" or "rep"
+    err_bin: Mapped[int] = mapped_column(Integer, nullable=False)  # (guess - actual + 100) // bin width
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+Index("ix_question_guess_errors_key", QuestionGuessError.date, QuestionGuessError.question_id,
+      QuestionGuessError.axis, QuestionGuessError.err_bin, unique=True)
+
+# Typed copy of the signup survey (User.survey_responses) for cohort queries (see cohorts.py)
+class SignupSurvey(Base):
+    __tablename__ = "signup_surveys"
+    user_id: Mapped[str] = mapped_column(String, primary_key=True)  # Firebase user ID
+    party_identity: Mapped[str | None] = mapped_column(String)  # e.g. "Strong Republican", "Independent"
+    ideology: Mapped[str | None] = mapped_column(String)  # e.g. "Very conservative", "Moderate"
+    warmth_dem: Mapped[int | None] = mapped_column(Integer)  # Feeling thermometer, 0-100
+    warmth_rep: Mapped[int | None] = mapped_column(Integer)  # Feeling thermometer, 0-100
+    engagement: Mapped[str | None] = mapped_column(String)
+    empathy: Mapped[str | None] = mapped_column(String)
+    difference: Mapped[str | None] = mapped_column(String)
+    age_range: Mapped[str | None] = mapped_column(String)
+    education_level: Mapped[str | None] = mapped_column(String)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow, onupdate=utcnow)
+
+# Cohort GROUP BYs: cohort value first, user_id so joins to scores stay index-only
+Index("ix_signup_surveys_party_user", SignupSurvey.party_identity, SignupSurvey.user_id)
+Index("ix_signup_surveys_ideology_user", SignupSurvey.ideology, SignupSurvey.user_id)
+
+# Server-side state of an in-progress /api/start_game game (see game_store.py)
+class GameSession(Base):
+    __tablename__ = "game_sessions"
+    id: Mapped[str] = mapped_column(String, primary_key=True)  # Opaque game id handed to the client
+    questions: Mapped[str] = mapped_column(Text, nullable=False)  # JSON list of the selected post dicts
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+# Purging abandoned games
+Index("ix_game_sessions_expires_at", GameSession.expires_at)
@@ -0,0 +1,30 @@
+"""
+Opaque cursors for keyset pagination.
+
+A cursor is the URL-safe base64 of a JSON array holding the sort-key values
+of the last row on a page; the next page seeks past those values instead of
+scanning over an OFFSET.
+"""
+import json
+import base64
+
+
+def encode_cursor(values: list) -> str:
+    """Encode the sort-key values of the last row on a page."""
+    payload = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """
+    Decode a cursor produced by encode_cursor holding `size` values.
+    Raises ValueError if the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("invalid cursor")
+    return values
@@ -0,0 +1,114 @@
+"""
+Per-request database query accounting.
+
+This module handles:
+- Counting statements and DB time per request via engine event listeners
+- Flagging N+1 patterns: the same SQL statement executed many times in one request
+- An X-DB-Queries / X-DB-Time-ms response header (QUERY_STATS_HEADERS=1)
+- count_queries(), for asserting query budgets in tests
+
+    with count_queries() as stats:
+        client.get("/api/results?user_id=u1")
+    assert stats.queries <= 8 and not stats.repeated()
+"""
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from flask import g, has_app_context, request
+from sqlalchemy import event
+
+# Same statement executed at least this many times in one request is reported as a likely N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+SEND_HEADERS = os.getenv("QUERY_STATS_HEADERS", "0") == "1"
+
+_collectors = []  # active count_queries() stats, outside any request
+
+
+class QueryStats:
+    """Statement count, total DB time and per-statement counts."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = Counter()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.queries += 1
+        self.db_time += elapsed
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> dict:
+        """Statements executed at least `threshold` times: {sql: count}."""
+        return {sql: n for sql, n in self.statements.items() if n >= threshold}
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    if has_app_context():
+        stats = g.get("query_stats")
+        if stats is not None:
+            stats.record(statement, elapsed)
+    for stats in _collectors:
+        stats.record(statement, elapsed)
+
+
+def install(*engines) -> None:
+    """Attach the counting listeners to each engine (once per engine)."""
+    for eng in set(engines):
+        if not installed_on(eng):
+            event.listen(eng, "before_cursor_execute", _before_cursor_execute)
+            event.listen(eng, "after_cursor_execute", _after_cursor_execute)
+
+
+def installed_on(eng) -> bool:
+    """Whether `eng` has the counting listeners (see db.use_profile)."""
+    return event.contains(eng, "before_cursor_execute", _before_cursor_execute)
+
+
+def current_stats() -> QueryStats | None:
+    """Stats of the current request, if any."""
+    return g.get("query_stats") if has_app_context() else None
+
+
+@contextmanager
+def count_queries():
+    """Collect stats for every statement run inside the block (any request)."""
+    stats = QueryStats()
+    _collectors.append(stats)
+    try:
+        yield stats
+    finally:
+        _collectors.remove(stats)
+
+
+def init_app(app) -> None:
+    """Start per-request accounting on `app` for the primary and read engines."""
+    from db import engine, read_engine
+
+    install(engine, read_engine)
+
+    @app.before_request
+    def _start_query_stats():
+        g.query_stats = QueryStats()
+
+    @app.after_request
+    def _report_query_stats(response):
+        stats = current_stats()
+        if stats is None:
+            return response
+        if SEND_HEADERS:
+            response.headers["X-DB-Queries"] = str(stats.queries)
+            response.headers["X-DB-Time-ms"] = f"{stats.db_time * 1000:.1f}"
+        repeated = stats.repeated()
+        if repeated:
+            worst_sql, worst_count = max(repeated.items(), key=lambda item: item[1])
+            app.logger.warning(
+                "Possible N+1 on %s %s: %d queries, statement run %d times: %s",
+                request.method, request.path, stats.queries, worst_count, " ".join(worst_sql.split())[:200],
+            )
+        return response
@@ -0,0 +1,19 @@
+"""
+Competition ranking shared by every leaderboard and results view.
+
+Scores are ranked best first and ties share the best rank (1, 2, 2, 4): a
+user's rank is 1 + the number of users with a strictly higher score.
+"""
+
+
+def rank_desc(rows, key, user_key=lambda row: row.user_id) -> dict:
+    """Rank `rows` by `key` descending: {user_key(row): rank}."""
+    ranks = {}
+    prev = None
+    rank = 0
+    for idx, row in enumerate(sorted(rows, key=key, reverse=True)):
+        if prev is None or key(row) < prev:
+            rank = idx + 1
+        ranks[user_key(row)] = rank
+        prev = key(row)
+    return ranks
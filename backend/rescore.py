@@ -0,0 +1,307 @@
+"""
+Bulk rescoring after a change to the scoring formula (scoring.ALPHA / BETA).
+
+This module handles:
+- Recomputing user_answers.score, score_dem and score_rep from the stored
+  guesses and ground truth, in primary-key chunks, with score_batch; only
+  rows whose scores change are written, one executemany UPDATE per chunk
+- Recomputing user_daily_scores averages with scoring.daily_averages (the
+  same arithmetic as submit_answer), writing only the days that change, and
+  the user_stats score sums with a set-based UPDATE ... FROM (SELECT ... GROUP
+  BY), both also in primary-key chunks
+- Resuming an interrupted run: the phase and last key done are saved to a
+  state file after every committed chunk, and a rerun continues from there
+- A read-only dry run (--dry-run) reporting what would change; --alpha and
+  --beta preview a formula before it is edited into scoring.py
+
+Every chunk is idempotent, so a crash between a commit and the state save
+only repeats that chunk. Deploy the new formula first, then rescore, so
+answers submitted meanwhile are already scored the new way. Months moved to
+the cold archive (answer_archive.py) are not rescored, and their days keep
+their stored averages. Web workers' in-process caches (windowed
+leaderboards, cohort ranks, improvement stats) are not invalidated from here;
+reload gunicorn after a run. A finished run rebuilds the leaderboard snapshot,
+which live streams (live_updates.py) watch, so open streams republish ranks.
+
+Usage (from backend/):
+    python rescore.py --dry-run [--alpha 0.35 --beta 4] [--show 10]
+    python rescore.py [--chunk-size 10000] [--restart]
+"""
+import os
+import json
+import argparse
+from pathlib import Path
+import numpy as np
+from sqlalchemy import select, update, bindparam, func
+from db import SessionLocal, use_profile
+from models import UserAnswer, UserDailyScore, UserStats
+from scoring import ALPHA, BETA, score_batch, daily_averages
+from leaderboard import refresh_leaderboard_snapshot
+
+DEFAULT_STATE_FILE = Path(__file__).resolve().parent / "data" / "rescore_state.json"
+CHUNK_SIZE = 10_000
+PHASES = ["answers", "daily", "stats"]
+
+_answers = UserAnswer.__table__
+# Keyed on (id, date) so a partitioned user_answers (answer_archive.py) only probes one partition
+_update_answer = (
+    update(_answers)
+    .where(_answers.c.id == bindparam("b_id"), _answers.c.date == bindparam("b_date"))
+    .values(score=bindparam("b_score"), score_dem=bindparam("b_score_dem"), score_rep=bindparam("b_score_rep"))
+)
+
+
+_days = UserDailyScore.__table__
+_update_daily = (
+    update(_days)
+    .where(_days.c.id == bindparam("b_id"))
+    .values(avg_score=bindparam("b_avg"), avg_score_dem=bindparam("b_avg_dem"), avg_score_rep=bindparam("b_avg_rep"))
+)
+
+
+def load_state(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_state(path: Path, state: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _answer_chunks(session, after_id: int, chunk_size: int):
+    """user_answers rows in id order after `after_id`, `chunk_size` at a time."""
+    while True:
+        rows = session.execute(
+            select(
+                UserAnswer.id, UserAnswer.date, UserAnswer.user_id,
+                UserAnswer.dem_guess, UserAnswer.rep_guess, UserAnswer.actual_dem, UserAnswer.actual_rep,
+                UserAnswer.score, UserAnswer.score_dem, UserAnswer.score_rep,
+            )
+            .where(UserAnswer.id > after_id)
+            .order_by(UserAnswer.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            return
+        yield rows
+        after_id = rows[-1].id
+
+
+def rescore_chunk(rows, alpha: float = ALPHA, beta: float = BETA):
+    """
+    Rescore one chunk. Returns (changed, new scores) where `changed` is a
+    boolean mask over the rows and the scores are (dem, rep, total) arrays.
+    """
+    columns = list(zip(*rows))
+    dem_scores, rep_scores, total_scores = score_batch(columns[3], columns[4], columns[5], columns[6], alpha, beta)
+    changed = (
+        (total_scores != np.asarray(columns[7], dtype=np.float64))
+        | (dem_scores != np.asarray(columns[8], dtype=np.float64))
+        | (rep_scores != np.asarray(columns[9], dtype=np.float64))
+    )
+    return changed, (dem_scores, rep_scores, total_scores)
+
+
+def rescore_answers(session, state: dict, save, chunk_size: int = CHUNK_SIZE) -> tuple[int, int]:
+    """Phase 1: rewrite stale answer scores. Returns (rows scanned, rows updated)."""
+    scanned = updated = 0
+    for rows in _answer_chunks(session, state.get("after") or 0, chunk_size):
+        changed, (dem_scores, rep_scores, total_scores) = rescore_chunk(rows)
+        params = [
+            {"b_id": row.id, "b_date": row.date, "b_score": total_scores[i].item(),
+             "b_score_dem": dem_scores[i].item(), "b_score_rep": rep_scores[i].item()}
+            for i, row in enumerate(rows) if changed[i]
+        ]
+        if params:
+            session.execute(_update_answer, params)
+        session.commit()
+        scanned += len(rows)
+        updated += len(params)
+        state["after"] = rows[-1].id
+        save(state)
+    return scanned, updated
+
+
+def _id_chunks(session, column, after, chunk_size: int):
+    """(low, high] bounds covering `column`'s values after `after`, `chunk_size` keys each."""
+    while True:
+        keys = select(column.label("key")).where(column > after).order_by(column).limit(chunk_size).subquery()
+        high = session.execute(select(func.max(keys.c.key))).scalar()
+        if high is None:
+            return
+        yield after, high
+        after = high
+
+
+def rescore_daily_scores(session, state: dict, save, chunk_size: int = CHUNK_SIZE) -> int:
+    """
+    Phase 2: set every user_daily_scores average back to the mean of that
+    user-day's answers, computed with scoring.daily_averages as submit does.
+    Days with no answers left in user_answers (archived) are not in the join
+    and keep their stored averages. Returns rows updated.
+    """
+    updated = 0
+    for low, high in _id_chunks(session, UserDailyScore.id, state.get("after") or 0, chunk_size):
+        rows = session.execute(
+            select(
+                UserDailyScore.id, UserDailyScore.avg_score, UserDailyScore.avg_score_dem, UserDailyScore.avg_score_rep,
+                UserAnswer.score, UserAnswer.score_dem, UserAnswer.score_rep,
+            )
+            .join(UserAnswer, (UserAnswer.user_id == UserDailyScore.user_id) & (UserAnswer.date == UserDailyScore.date))
+            .where(UserDailyScore.id > low, UserDailyScore.id <= high)
+        ).all()
+        stored, answers = {}, {}
+        for row in rows:
+            stored[row[0]] = tuple(row[1:4])
+            answers.setdefault(row[0], []).append(tuple(row[4:7]))
+        params = []
+        for day_id, scores in answers.items():
+            averages = daily_averages(scores)
+            if averages != stored[day_id]:
+                params.append({"b_id": day_id, "b_avg": averages[0], "b_avg_dem": averages[1], "b_avg_rep": averages[2]})
+        if params:
+            session.execute(_update_daily, params)
+        session.commit()
+        updated += len(params)
+        state["after"] = high
+        save(state)
+    return updated
+
+
+def rescore_user_stats(session, state: dict, save, chunk_size: int = CHUNK_SIZE) -> int:
+    """Phase 3: recompute the user_stats score sums from user_daily_scores. Returns rows updated."""
+    updated = 0
+    for low, high in _id_chunks(session, UserStats.user_id, state.get("after") or "", chunk_size):
+        sums = (
+            select(
+                UserDailyScore.user_id,
+                func.sum(UserDailyScore.avg_score).label("score_sum"),
+                func.sum(UserDailyScore.avg_score_dem).label("score_dem_sum"),
+                func.sum(UserDailyScore.avg_score_rep).label("score_rep_sum"),
+            )
+            .where(UserDailyScore.user_id > low, UserDailyScore.user_id <= high)
+            .group_by(UserDailyScore.user_id)
+            .subquery()
+        )
+        updated += session.execute(
+            update(UserStats)
+            .where(UserStats.user_id == sums.c.user_id)
+            .values(
+                score_sum=sums.c.score_sum,
+                score_dem_sum=sums.c.score_dem_sum,
+                score_rep_sum=sums.c.score_rep_sum,
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        session.commit()
+        state["after"] = high
+        save(state)
+    return updated
+
+
+def rescore(state_file: Path = DEFAULT_STATE_FILE, chunk_size: int = CHUNK_SIZE, restart: bool = False) -> None:
+    """Run (or resume) all three phases with the formula in scoring.py."""
+    formula = [ALPHA, BETA]
+    state = {} if restart else load_state(state_file)
+    if state and state.get("formula") != formula:
+        print(f"State in {state_file} is for formula {state.get('formula')}; starting over")
+        state = {}
+    if state.get("phase") == "done":
+        print(f"Already rescored with alpha={ALPHA}, beta={BETA}; pass --restart to run again")
+        return
+    if state:
+        print(f"Resuming at {state['phase']} after {state['after']!r}")
+    else:
+        state = {"formula": formula, "phase": PHASES[0], "after": None}
+
+    def save(s):
+        save_state(state_file, s)
+
+    with SessionLocal() as session:
+        for phase in PHASES[PHASES.index(state["phase"]):]:
+            if state["phase"] != phase:
+                state.update(phase=phase, after=None)
+                save(state)
+            if phase == "answers":
+                scanned, updated = rescore_answers(session, state, save, chunk_size)
+                print(f"answers: {updated} of {scanned} rows rescored")
+            elif phase == "daily":
+                print(f"daily: {rescore_daily_scores(session, state, save, chunk_size)} user_daily_scores rows changed")
+            else:
+                print(f"stats: {rescore_user_stats(session, state, save, chunk_size)} user_stats rows recomputed")
+        state.update(phase="done", after=None)
+        save(state)
+        refresh_leaderboard_snapshot(session)
+    print("Rescore done; reload gunicorn (kill -HUP the master) to drop cached leaderboards and stats")
+
+
+def dry_run(alpha: float = ALPHA, beta: float = BETA, chunk_size: int = CHUNK_SIZE, show: int = 0) -> dict:
+    """
+    Rescore every answer without writing and print a summary of the change.
+    A day's average moves by the mean of its answers' changes, so the answer
+    deltas bound the daily and all-time deltas too.
+    """
+    scanned = changed_rows = 0
+    days = set()
+    deltas = {"score": [], "score_dem": [], "score_rep": []}
+    samples = []
+    with SessionLocal() as session:
+        for rows in _answer_chunks(session, 0, chunk_size):
+            changed, (dem_scores, rep_scores, total_scores) = rescore_chunk(rows, alpha, beta)
+            scanned += len(rows)
+            if not changed.any():
+                continue
+            changed_rows += int(changed.sum())
+            columns = list(zip(*rows))
+            for name, new, old in (("score", total_scores, columns[7]),
+                                   ("score_dem", dem_scores, columns[8]),
+                                   ("score_rep", rep_scores, columns[9])):
+                deltas[name].append((new - np.asarray(old, dtype=np.float64))[changed])
+            for i in np.flatnonzero(changed):
+                days.add((rows[i].user_id, rows[i].date))
+                if len(samples) < show:
+                    samples.append((rows[i], total_scores[i].item()))
+
+    summary = {"alpha": alpha, "beta": beta, "answers": scanned, "changed": changed_rows, "days": len(days)}
+    print(f"alpha={alpha} beta={beta}: {changed_rows} of {scanned} answers would change, "
+          f"on {len(days)} user-days")
+    for name, parts in deltas.items():
+        if parts:
+            delta = np.concatenate(parts)
+            summary[name] = {"max_abs": float(np.abs(delta).max()), "mean": float(delta.mean())}
+            print(f"  {name:<10} max |delta| {summary[name]['max_abs']:.6f}  mean delta {summary[name]['mean']:+.6f}")
+    for row, new_score in samples:
+        print(f"  id={row.id} {row.date} user={row.user_id}  score {row.score:.4f} -> {new_score:.4f}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rescore stored answers after a scoring formula change.")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    parser.add_argument("--alpha", type=float, help="dry run only: preview this alpha instead of scoring.ALPHA")
+    parser.add_argument("--beta", type=float, help="dry run only: preview this beta instead of scoring.BETA")
+    parser.add_argument("--show", type=int, default=0, help="dry run only: print this many changed answers")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="rows per read and per UPDATE")
+    parser.add_argument("--state", type=Path, default=DEFAULT_STATE_FILE, help="progress file for resuming")
+    parser.add_argument("--restart", action="store_true", help="ignore saved progress and start over")
+    args = parser.parse_args()
+    use_profile("batch")
+
+    if args.dry_run:
+        dry_run(ALPHA if args.alpha is None else args.alpha, BETA if args.beta is None else args.beta,
+                args.chunk_size, args.show)
+        return
+    if args.alpha is not None or args.beta is not None:
+        # Stored scores must match what the endpoints compute; change scoring.py instead
+        parser.error("--alpha/--beta only apply to --dry-run; edit ALPHA/BETA in scoring.py to rescore")
+    rescore(args.state, args.chunk_size, args.restart)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Answer scoring.
+
+This module handles:
+- The per-party score of a guess against the ground truth (nonlinear_score)
+- Scoring whole arrays of answers at once with NumPy (score_batch), for
+  submit_results, rescoring and analytics passes
+- A self-check that the two agree bit for bit on this platform
+- A user-day's average scores (daily_averages), shared by submit and rescoring
+
+score_batch reproduces nonlinear_score exactly, not just to within rounding:
+every step is the same IEEE operation, and the square goes through
+np.float_power, which calls the C library's pow() like Python's `**` does.
+(x * x or np.power(x, 2) differ from pow(x, 2.0) in the last bit for about
+one ratio in a thousand, which would make stored and recomputed scores
+disagree.) NumPy is imported on first use, keeping it out of app import time.
+
+Usage (from backend/):
+    python scoring.py check [--n 1000000] [--seed 0]
+"""
+import sys
+import math
+import time
+import random
+import argparse
+
+# Shape of the score curve: a guess `alpha * truth + beta` points off scores 50
+ALPHA = 0.3
+BETA = 5
+
+
+def nonlinear_score(user, truth, alpha=ALPHA, beta=BETA):
+    diff = abs(user - truth)
+    denom = alpha * truth + beta
+    return 100 / (1 + (diff / denom)**2)
+
+
+def answer_scores(user_dem, user_rep, truth_dem, truth_rep, alpha=ALPHA, beta=BETA) -> tuple[float, float, float]:
+    """(dem_score, rep_score, total_score) of one answer."""
+    dem_score = nonlinear_score(user_dem, truth_dem, alpha, beta)
+    rep_score = nonlinear_score(user_rep, truth_rep, alpha, beta)
+    return dem_score, rep_score, (dem_score + rep_score) / 2
+
+
+def daily_averages(scores) -> tuple[float, float, float]:
+    """
+    (avg_score, avg_score_dem, avg_score_rep) of one user-day, from its
+    answers' (score, score_dem, score_rep). math.fsum is exact, so the result
+    does not depend on answer order and submit and rescore store the same bits.
+    """
+    totals, dems, reps = zip(*scores)
+    n = len(totals)
+    return math.fsum(totals) / n, math.fsum(dems) / n, math.fsum(reps) / n
+
+
+def _score_array(np, user, truth, alpha, beta):
+    diff = np.abs(user - truth)
+    denom = alpha * truth + beta
+    return 100 / (1 + np.float_power(diff / denom, 2))
+
+
+def score_batch(user_dem, user_rep, truth_dem, truth_rep, alpha=ALPHA, beta=BETA):
+    """
+    Vectorized answer_scores: takes equal-length sequences (or broadcastable
+    arrays) and returns float64 arrays (dem_scores, rep_scores, total_scores).
+    A zero denominator raises FloatingPointError where the scalar version
+    raises ZeroDivisionError.
+    """
+    import numpy as np  # only needed here; keeps NumPy out of app import time
+
+    user_dem, user_rep, truth_dem, truth_rep = (
+        np.asarray(values, dtype=np.float64) for values in (user_dem, user_rep, truth_dem, truth_rep)
+    )
+    with np.errstate(divide="raise", invalid="raise"):
+        dem_scores = _score_array(np, user_dem, truth_dem, alpha, beta)
+        rep_scores = _score_array(np, user_rep, truth_rep, alpha, beta)
+    return dem_scores, rep_scores, (dem_scores + rep_scores) / 2
+
+
+def check_equivalence(n: int = 1_000_000, seed: int = 0) -> int:
+    """
+    Score `n` random answers (plus the boundary guesses) both ways and print
+    the timings. Returns how many of the 3 * n scores differ in any bit.
+    """
+    rng = random.Random(seed)
+    # Guesses are whole or tenth percentages; ground truth is any float in [0, 100]
+    edges = [(u, t) for u in (0.0, 100.0, 50.0) for t in (0, 100, 0.0, 100.0, 37.5)]
+    user_dem = [e[0] for e in edges] + [round(rng.uniform(0, 100), rng.choice((0, 1))) for _ in range(n)]
+    truth_dem = [e[1] for e in edges] + [rng.uniform(0, 100) for _ in range(n)]
+    user_rep = [rng.uniform(0, 100) for _ in user_dem]
+    truth_rep = [rng.choice((rng.uniform(0, 100), rng.randint(0, 100))) for _ in user_dem]
+
+    started = time.perf_counter()
+    scalar = [answer_scores(*answer) for answer in zip(user_dem, user_rep, truth_dem, truth_rep)]
+    scalar_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batch = score_batch(user_dem, user_rep, truth_dem, truth_rep)
+    batch_seconds = time.perf_counter() - started
+
+    mismatches = sum(
+        expected != actual
+        for column, values in enumerate(batch)
+        for expected, actual in zip((row[column] for row in scalar), values.tolist())
+    )
+    print(f"{len(scalar)} answers: scalar {scalar_seconds:.3f}s, batch {batch_seconds:.3f}s "
+          f"({scalar_seconds / batch_seconds:.0f}x)")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer scoring utilities.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    check = sub.add_parser("check", help="verify score_batch matches nonlinear_score bit for bit")
+    check.add_argument("--n", type=int, default=1_000_000, help="random answers to score")
+    check.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    mismatches = check_equivalence(args.n, args.seed)
+    if mismatches:
+        print(f"FAIL: {mismatches} scores differ between score_batch and nonlinear_score")
+        sys.exit(1)
+    print("ok: score_batch matches nonlinear_score bit for bit")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Signup survey store (backend/data/user_surveys.jsonl).
+
+This module handles:
+- An append-only JSONL log, one survey record per line (the last line for an email wins)
+- An in-memory email -> byte offset index, caught up incrementally from the log tail
+- Cross-process safety with an flock'd sidecar lock file
+- Periodic compaction that rewrites the log with only the latest record per email
+- One-time migration of the legacy user_surveys.json array
+
+A signup costs one locked append, not a read and rewrite of every survey.
+"""
+import os
+import sys
+import json
+import fcntl
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+LOG_FILE = DATA_DIR / "user_surveys.jsonl"
+LEGACY_FILE = DATA_DIR / "user_surveys.json"
+# Compact once the log holds this many lines and at least twice as many lines as emails
+COMPACT_MIN_LINES = int(os.getenv("SURVEY_COMPACT_MIN_LINES", "1000"))
+
+
+def map_survey_responses(responses: dict) -> dict:
+    """Map frontend survey response keys to the stored format."""
+    return {
+        "party_identity": responses.get("partyIdentification", ""),
+        "ideology": responses.get("ideologicalOrientation", ""),
+        "warmth_dem": responses.get("feelingDemocrats"),
+        "warmth_rep": responses.get("feelingRepublicans"),
+        "engagement": responses.get("politicalNewsFollow", ""),
+        "empathy": responses.get("tryUnderstandOtherParty", ""),
+        "difference": responses.get("perceivedDifference", ""),
+        "age_range": responses.get("ageRange", ""),
+        "education_level": responses.get("educationLevel", ""),
+    }
+
+
+class SurveyStore:
+    """Append-only survey log with an email -> offset index."""
+
+    def __init__(self, path: Path = LOG_FILE, legacy_path: Path | None = LEGACY_FILE):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.legacy_path = legacy_path
+        self._mutex = threading.Lock()
+        self._index = {}  # email -> byte offset of its latest line
+        self._offset = 0  # bytes of the log already indexed
+        self._lines = 0  # lines indexed (including superseded ones)
+        self._inode = None
+
+    @contextmanager
+    def _locked(self):
+        """Hold the in-process mutex and an exclusive flock shared by all workers."""
+        with self._mutex:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_path, "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    self._migrate_legacy()
+                    yield
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _migrate_legacy(self) -> None:
+        """Convert the old JSON array into the log once (caller holds the lock)."""
+        if self.path.exists() or not self.legacy_path or not self.legacy_path.exists():
+            return
+        try:
+            with open(self.legacy_path, "r") as f:
+                entries = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            entries = []
+        self._write_compacted({e["email"]: e for e in entries if e.get("email")}.values())
+
+    def _catch_up(self) -> None:
+        """Index lines appended since the last call, by this or any other process."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self._index, self._offset, self._lines, self._inode = {}, 0, 0, None
+            return
+        if st.st_ino != self._inode or st.st_size < self._offset:
+            # Compacted (replaced) by another process: reindex from the start
+            self._index, self._offset, self._lines, self._inode = {}, 0, 0, st.st_ino
+        if st.st_size == self._offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # partial line from an interrupted write
+                try:
+                    email = json.loads(line)["email"]
+                except (ValueError, KeyError):
+                    email = None
+                if email:
+                    self._index[email] = self._offset
+                self._offset += len(line)
+                self._lines += 1
+
+    def _drop_partial_tail(self) -> None:
+        """
+        Cut off a partial last line left by an interrupted append, so the next
+        line starts on its own (caller holds the lock and has caught up).
+        """
+        if self.path.exists() and self.path.stat().st_size > self._offset:
+            os.truncate(self.path, self._offset)
+
+    def _read_at(self, offset: int) -> dict:
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def _write_compacted(self, records) -> None:
+        """Atomically replace the log with `records`, one line each (caller holds the lock)."""
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w") as f:
+            for record in records:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def _live_records(self) -> list[dict]:
+        """The latest record of every email, in one sequential read of the log."""
+        if not self._index:
+            return []
+        live = set(self._index.values())
+        records, offset = [], 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if offset in live:
+                    records.append(json.loads(line))
+                offset += len(line)
+        return records
+
+    def _compact(self) -> None:
+        self._write_compacted(self._live_records())
+        self._inode = None  # force a reindex of the rewritten file
+        self._catch_up()
+
+    def save(self, email: str, responses: dict) -> None:
+        """Record (or replace) the survey for `email` with one append."""
+        line = (json.dumps({"email": email, **responses}, separators=(",", ":")) + "\n").encode()
+        with self._locked():
+            self._catch_up()
+            self._drop_partial_tail()
+            with open(self.path, "ab") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._inode = self._inode or os.stat(self.path).st_ino
+            self._index[email] = self._offset
+            self._offset += len(line)
+            self._lines += 1
+            if self._lines >= COMPACT_MIN_LINES and self._lines >= 2 * len(self._index):
+                self._compact()
+
+    def get(self, email: str) -> dict | None:
+        """Latest survey for `email`, or None."""
+        with self._locked():
+            self._catch_up()
+            offset = self._index.get(email)
+            return self._read_at(offset) if offset is not None else None
+
+    def all(self) -> list[dict]:
+        """Latest survey for every email."""
+        with self._locked():
+            self._catch_up()
+            return self._live_records()
+
+    def compact(self) -> None:
+        """Rewrite the log keeping only the latest record per email."""
+        with self._locked():
+            self._catch_up()
+            self._compact()
+
+
+survey_store = SurveyStore()
+
+
+def save_survey_response(email: str, responses: dict) -> None:
+    """Save signup survey responses (frontend keys) for `email`."""
+    survey_store.save(email, map_survey_responses(responses))
+
+
+if __name__ == "__main__":
+    # python survey_store.py compact  - rewrite the log with one line per email
+    if sys.argv[1:] == ["compact"]:
+        survey_store.compact()
+        print(f"Compacted {LOG_FILE} to {len(survey_store._index)} surveys")
+    else:
+        print("Usage: python survey_store.py compact")
@@ -0,0 +1,56 @@
+"""
+Shared test setup: every test runs against a throwaway SQLite database.
+
+Backend modules import each other by bare name (from db import Base) and
+read their configuration at import time, so backend/ goes on sys.path and
+the environment is set here, before any of them is imported.
+"""
+import os
+import sys
+import random
+import tempfile
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+REPO_DIR = BACKEND_DIR.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+_tmp = Path(tempfile.mkdtemp(prefix="echo-breaker-tests-"))
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp / 'test.db'}"
+os.environ["ANSWER_ARCHIVE_DIR"] = str(_tmp / "archive")
+
+from db import Base, engine, init_db  # noqa: E402
+
+init_db()
+
+
+@pytest.fixture(autouse=True)
+def clean_tables():
+    """Empty every table after each test."""
+    yield
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+
+
+@pytest.fixture
+def client():
+    from app import create_app
+
+    return create_app().test_client()
+
+
+def play_today(client, users: range) -> None:
+    """Submit every question of today for users u<start> .. u<stop - 1>."""
+    from daily_questions import ensure_daily_questions, get_eastern_date
+
+    rng = random.Random(users.start)
+    for question in ensure_daily_questions(get_eastern_date()):
+        for u in users:
+            response = client.post("/api/submit_answer", json={
+                "user_id": f"u{u}", "question_id": question["id"],
+                "user": {"dem": rng.uniform(0, 100), "rep": rng.uniform(0, 100)},
+            })
+            assert response.status_code == 200
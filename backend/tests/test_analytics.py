@@ -0,0 +1,112 @@
+import random
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+import analytics
+from analytics import paired_improvement, progress_query
+from db import SessionLocal
+from models import User, UserDailyScore
+
+START = date(2026, 3, 1)
+
+
+@pytest.fixture
+def daily_scores():
+    """Eight users playing a random subset of 20 days; returns {user: [(date, score), ...]}."""
+    rng = random.Random(3)
+    played = {
+        f"u{u}": sorted((START + timedelta(days=d), round(rng.uniform(0, 100), 3))
+                        for d in rng.sample(range(20), rng.randint(0, 6)))
+        for u in range(8)
+    }
+    with SessionLocal() as session:
+        session.add_all(User(uid=uid, display_name=f"Player {uid}") for uid in played if uid != "u0")
+        session.add_all(
+            UserDailyScore(user_id=uid, date=day, avg_score=score, avg_score_dem=score, avg_score_rep=score)
+            for uid, days in played.items() for day, score in days
+        )
+        session.commit()
+    return played
+
+
+def per_user_progress(played, min_days=2, start_date=None, end_date=None):
+    """What a query per user would return: first and last day inside the range."""
+    out = {}
+    for uid, days in played.items():
+        days = [(d, s) for d, s in days if (not start_date or d >= start_date) and (not end_date or d <= end_date)]
+        if len(days) >= min_days:
+            out[uid] = (days[0][1], days[0][0], days[-1][1], days[-1][0], len(days))
+    return out
+
+
+@pytest.mark.parametrize("min_days, start_date, end_date", [
+    (2, None, None),
+    (4, None, None),
+    (2, START + timedelta(days=5), None),
+    (2, START + timedelta(days=3), START + timedelta(days=12)),
+])
+def test_progress_query_matches_a_query_per_user(daily_scores, min_days, start_date, end_date):
+    with SessionLocal() as session:
+        rows = session.execute(progress_query(min_days, start_date, end_date)).all()
+    got = {
+        r.user_id: (r.first_score, r.first_score_date, r.last_score, r.last_score_date, r.days_played)
+        for r in rows
+    }
+    assert got == per_user_progress(daily_scores, min_days, start_date, end_date)
+    assert [r.days_played for r in rows] == sorted((r.days_played for r in rows), reverse=True)
+
+
+def test_progress_endpoint(client, daily_scores):
+    expected = per_user_progress(daily_scores)
+    body = client.get("/api/users/progress").get_json()
+    assert {p["user_id"] for p in body} == set(expected)
+    for p in body:
+        first, first_date, last, last_date, days = expected[p["user_id"]]
+        assert p == {
+            "user_id": p["user_id"],
+            "display_name": None if p["user_id"] == "u0" else f"Player {p['user_id']}",
+            "first_score": round(first, 2), "first_score_date": first_date.isoformat(),
+            "last_score": round(last, 2), "last_score_date": last_date.isoformat(),
+            "days_played": days,
+        }
+
+
+@pytest.mark.parametrize("n, seed", [(2, 0), (5, 1), (40, 2), (400, 3)])
+def test_paired_improvement_matches_scipy(n, seed):
+    stats = pytest.importorskip("scipy.stats")  # only a reference here, not a dependency
+
+    rng = np.random.default_rng(seed)
+    first = rng.uniform(0, 100, n)
+    last = first + rng.normal(2, 10, n)
+    result = paired_improvement(first, last)
+    expected = stats.ttest_rel(last, first)
+    assert result["n"] == n and result["df"] == n - 1
+    assert result["mean_difference"] == pytest.approx((last - first).mean())
+    assert result["t_statistic"] == pytest.approx(expected.statistic)
+    assert result["p_value"] == pytest.approx(expected.pvalue, rel=1e-9, abs=1e-15)
+
+
+def test_paired_improvement_degenerate_samples():
+    one = paired_improvement(np.array([10.0]), np.array([20.0]))
+    assert (one["mean_difference"], one["t_statistic"], one["p_value"], one["df"]) == (10.0, None, None, None)
+    same = paired_improvement(np.array([10.0, 30.0]), np.array([15.0, 35.0]))
+    assert (same["variance_difference"], same["t_statistic"], same["p_value"]) == (0.0, None, 0.0)
+    assert paired_improvement(np.array([1.0, 2.0]), np.array([1.0, 2.0]))["p_value"] is None
+
+
+def test_improvement_endpoint_uses_progress_rows_and_is_cached(client, daily_scores, monkeypatch):
+    monkeypatch.setattr(analytics, "_improvement_cache", {"date": None, "results": {}})
+    expected = per_user_progress(daily_scores, min_days=3)
+    stats = client.get("/api/stats/improvement?min_days=3").get_json()
+    assert stats["n"] == len(expected)
+    assert stats["mean_first"] == pytest.approx(sum(v[0] for v in expected.values()) / len(expected))
+    assert stats["mean_last"] == pytest.approx(sum(v[2] for v in expected.values()) / len(expected))
+
+    with SessionLocal() as session:
+        session.query(UserDailyScore).delete()
+        session.commit()
+    assert client.get("/api/stats/improvement?min_days=3").get_json() == stats
+    assert client.get("/api/stats/improvement?min_days=4").get_json()["n"] == 0
+    assert client.get("/api/stats/improvement?start_date=03-01").status_code == 400
@@ -0,0 +1,135 @@
+import random
+from collections import Counter
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+import answer_archive
+from db import SessionLocal
+from distributions import rebuild_distributions
+from export_parquet import export_table
+from models import UserAnswer, UserStats, QuestionGuessCell, QuestionGuessError
+
+MONTHS = [date(2025, 1, 1), date(2025, 2, 1)]
+
+
+@pytest.fixture
+def answers():
+    """Three users' answers on a few days of two closed months; returns how many."""
+    rng = random.Random(0)
+    rows = [
+        UserAnswer(
+            user_id=f"u{u}", date=month.replace(day=day), question_id=f"q{q}",
+            dem_guess=rng.uniform(0, 100), rep_guess=rng.uniform(0, 100),
+            actual_dem=rng.uniform(0, 100), actual_rep=rng.uniform(0, 100),
+            score=50.0, score_dem=50.0, score_rep=50.0,
+        )
+        for month in MONTHS for day in (3, 17) for u in range(3) for q in range(5)
+    ]
+    with SessionLocal() as session:
+        session.add_all(rows)
+        session.commit()
+    yield len(rows)
+    for month in MONTHS:
+        answer_archive.archive_path(month).unlink(missing_ok=True)
+
+
+def archive_all():
+    with SessionLocal() as session:
+        for month in MONTHS:
+            answer_archive.archive_month(session, month)
+
+
+def restore_rows():
+    """Put archived rows back, as if archive_month stopped before its delete committed."""
+    with SessionLocal() as session:
+        records = list(answer_archive.iter_archived_answers())
+        session.add_all(UserAnswer(**record) for record in records)
+        for user_id, n in Counter(record["user_id"] for record in records).items():
+            session.get(UserStats, user_id).answers_count += n
+        session.commit()
+
+
+def distribution_counts() -> tuple[set, set]:
+    with SessionLocal() as session:
+        cells = session.execute(select(
+            QuestionGuessCell.date, QuestionGuessCell.question_id,
+            QuestionGuessCell.dem_bin, QuestionGuessCell.rep_bin, QuestionGuessCell.count,
+        )).all()
+        errors = session.execute(select(
+            QuestionGuessError.date, QuestionGuessError.question_id,
+            QuestionGuessError.axis, QuestionGuessError.err_bin, QuestionGuessError.count,
+        )).all()
+    return set(cells), set(errors)
+
+
+def rebuild() -> tuple[set, set]:
+    with SessionLocal() as session:
+        rebuild_distributions(session)
+    return distribution_counts()
+
+
+def export(tmp_path) -> tuple[int, list]:
+    """(rows the export reports writing, ids found in the written files)"""
+    import pyarrow.dataset as ds
+
+    _, rows, _ = export_table("user_answers", tmp_path, None, None, batch_size=7)
+    return rows, ds.dataset(tmp_path / "user_answers", partitioning="hive").to_table().column("id").to_pylist()
+
+
+def test_archive_moves_rows_out_of_the_table(answers):
+    archive_all()
+    with SessionLocal() as session:
+        assert session.execute(select(UserAnswer.id)).first() is None
+    assert answer_archive.archived_months() == MONTHS
+    assert len(list(answer_archive.iter_archived_answers())) == answers
+
+
+@pytest.mark.parametrize("interrupted", [False, True], ids=["archived", "interrupted"])
+def test_export_counts_every_answer_once(answers, tmp_path, interrupted):
+    archive_all()
+    if interrupted:
+        restore_rows()
+    rows, ids = export(tmp_path)
+    assert rows == answers
+    assert len(ids) == answers
+    assert len(set(ids)) == answers
+
+
+@pytest.mark.parametrize("interrupted", [False, True], ids=["archived", "interrupted"])
+def test_rebuild_matches_before_archiving(answers, interrupted):
+    expected = rebuild()
+    archive_all()
+    if interrupted:
+        restore_rows()
+    assert rebuild() == expected
+
+
+def test_rerun_after_interruption_does_not_duplicate(answers):
+    archive_all()
+    restore_rows()
+    archive_all()
+    assert len(list(answer_archive.iter_archived_answers())) == answers
+
+
+def test_archived_days_are_gone_from_results_and_guess_totals(client, answers):
+    with SessionLocal() as session:
+        answer_archive.archive_month(session, MONTHS[0])
+
+    response = client.get("/api/results?user_id=u0&date=2025-01-03")
+    assert response.status_code == 410
+    assert client.get("/api/results?user_id=u0&date=2025-03-03").status_code == 404
+
+    page = client.get("/api/user/guesses?user_id=u0&limit=1000").get_json()
+    assert {g["date"][:7] for g in page["guesses"]} == {"2025-02"}
+    assert page["total"] == len(page["guesses"]) == 10
+
+
+def test_rerun_after_interruption_counts_archived_answers_once(client, answers):
+    archive_all()
+    restore_rows()
+    archive_all()
+
+    page = client.get("/api/user/guesses?user_id=u0").get_json()
+    assert page["total"] == len(page["guesses"]) == 0
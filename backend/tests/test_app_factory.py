@@ -0,0 +1,73 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import create_engine, inspect
+
+import catalog
+from conftest import BACKEND_DIR
+
+IMPORT_CHECK = """
+import sys
+import app, catalog
+print(sorted(m for m in ("psycopg2", "numpy", "pyarrow") if m in sys.modules))
+print(catalog._catalog["posts"] is None)
+print(type(app.app).__name__, app.app is app.app)
+"""
+
+
+def run_backend(args, db_path):
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{db_path}"}
+    result = subprocess.run([sys.executable, *args], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.splitlines()
+
+
+def test_import_has_no_side_effects(tmp_path):
+    db_path = tmp_path / "fresh.db"
+    assert run_backend(["-c", IMPORT_CHECK], db_path) == ["[]", "True", "Flask True"]
+    assert not db_path.exists() or not inspect(create_engine(f"sqlite:///{db_path}")).get_table_names()
+
+
+def test_init_db_command_creates_the_tables(tmp_path):
+    db_path = tmp_path / "fresh.db"
+    run_backend(["-m", "flask", "--app", "app", "init-db"], db_path)
+    assert {"users", "user_answers", "user_daily_scores"} <= set(inspect(create_engine(f"sqlite:///{db_path}")).get_table_names())
+
+
+def write_post(base, topic, name, dem, rep):
+    (base / topic).mkdir(exist_ok=True)
+    (base / topic / f"{name}.png").write_bytes(b"")
+    (base / topic / f"{name}.json").write_text(json.dumps({"dem": dem, "rep": rep}))
+
+
+def test_catalog_loads_on_first_use_in_a_stable_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog, "_catalog", {"posts": None, "version": None})
+    load_posts = catalog.load_posts
+    monkeypatch.setattr(catalog, "load_posts", lambda: load_posts(tmp_path))
+    assert catalog.get_posts() == []
+    assert catalog._catalog["posts"] == []  # an empty catalog is loaded again next time
+
+    write_post(tmp_path, "b", "2", 10, 20)
+    write_post(tmp_path, "a", "1", 30, 40)
+    (tmp_path / "a" / "no-truth.png").write_bytes(b"")
+    posts = catalog.get_posts()
+    assert [p["id"] for p in posts] == ["a/1", "b/2"]
+    assert catalog.get_posts() is posts
+    version = catalog.catalog_version()
+
+    write_post(tmp_path, "a", "1", 31, 40)
+    assert catalog.get_posts() is posts  # loaded once per process
+    monkeypatch.setattr(catalog, "_catalog", {"posts": None, "version": None})
+    assert catalog.catalog_version() != version
+
+
+@pytest.mark.parametrize("raw", ["{", '{"dem": 1}', '{"dem": "x", "rep": 2}'])
+def test_catalog_skips_broken_ground_truth(tmp_path, raw):
+    write_post(tmp_path, "t", "ok", 1, 2)
+    (tmp_path / "t" / "bad.jpg").write_bytes(b"")
+    (tmp_path / "t" / "bad.json").write_text(raw)
+    assert [p["id"] for p in catalog.load_posts(tmp_path)] == ["t/ok"]
@@ -0,0 +1,61 @@
+import pytest
+
+from conftest import play_today
+from pagination import encode_cursor
+
+FORGED_CURSORS = {
+    "/api/user_ids": [[123], [{}], [None], [["u1"]]],
+    "/api/user/guesses?user_id=u1": [
+        ["2026-01-01", "2026-01-01T00:00:00", {}],
+        ["2026-01-01", "2026-01-01T00:00:00", "1"],
+        [123, "2026-01-01T00:00:00", 1],
+    ],
+}
+
+
+@pytest.mark.parametrize("path,values", [
+    (path, values) for path, cursors in FORGED_CURSORS.items() for values in cursors
+])
+def test_forged_cursor_is_rejected(client, path, values):
+    sep = "&" if "?" in path else "?"
+    response = client.get(f"{path}{sep}cursor={encode_cursor(values)}")
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "invalid cursor"}
+
+
+def test_user_ids_cursor_round_trip(client):
+    from db import session_scope
+    from models import User
+
+    with session_scope() as session:
+        session.add_all([User(uid=f"u{i}", display_name=f"User {i}") for i in range(3)])
+        session.commit()
+    first = client.get("/api/user_ids?limit=2").get_json()
+    second = client.get(f"/api/user_ids?limit=2&cursor={first['next_cursor']}").get_json()
+    assert [u["user_id"] for u in first["users"] + second["users"]] == ["u0", "u1", "u2"]
+    assert second["next_cursor"] is None
+
+
+def test_guesses_cursor_walk_visits_every_guess_once(client):
+    play_today(client, range(1))
+    expected = client.get("/api/user/guesses?user_id=u0&limit=1000").get_json()
+    assert expected["total"] == len(expected["guesses"]) > 2
+
+    seen, cursor = [], None
+    while True:
+        url = "/api/user/guesses?user_id=u0&limit=2" + (f"&cursor={cursor}" if cursor else "")
+        page = client.get(url).get_json()
+        seen += page["guesses"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == expected["guesses"]
+
+
+@pytest.mark.parametrize("limit", ["0", "-1"])
+def test_guesses_limit_is_clamped(client, limit):
+    play_today(client, range(1))
+    page = client.get(f"/api/user/guesses?user_id=u0&limit={limit}&offset=-5").get_json()
+    newest = client.get("/api/user/guesses?user_id=u0&limit=1").get_json()
+    assert page["guesses"] == newest["guesses"]
+    assert page["next_cursor"] == newest["next_cursor"]
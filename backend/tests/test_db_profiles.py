@@ -0,0 +1,32 @@
+import db
+import query_stats
+from sqlalchemy import text
+
+
+def test_use_profile_rebinds_sessions():
+    original = db.DB_PROFILE
+    try:
+        db.use_profile("batch")
+        with db.SessionLocal() as session:
+            assert session.get_bind() is db.engine
+            assert session.execute(text("PRAGMA busy_timeout")).scalar() == 60000
+    finally:
+        db.use_profile(original)
+    with db.SessionLocal() as session:
+        assert session.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+
+
+def test_query_accounting_survives_a_profile_switch(client):
+    original = db.DB_PROFILE
+    try:
+        db.use_profile("batch")
+        assert query_stats.installed_on(db.engine)
+        with query_stats.count_queries() as stats:
+            with db.SessionLocal() as session:
+                session.execute(text("SELECT 1"))
+        assert stats.queries == 1
+    finally:
+        db.use_profile(original)
+    with query_stats.count_queries() as stats:
+        client.get("/api/leaderboard/today")
+    assert stats.queries > 0
@@ -0,0 +1,86 @@
+import random
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from db import SessionLocal
+from distributions import (
+    GUESS_BINS, ERROR_BINS, guess_bin, error_bin, record_guess, rebuild_distributions,
+    get_distribution, _upsert_statement,
+)
+from models import QuestionGuessCell, QuestionGuessError, UserAnswer
+
+DAY = date(2026, 3, 2)
+# (dem_guess, rep_guess, actual_dem, actual_rep) on the bin edges
+EDGE_ANSWERS = [
+    (0.0, 100.0, 100.0, 0.0),  # errors of exactly -100 and +100
+    (100.0, 0.0, 0.0, 100.0),
+    (5.0, 95.0, 5.0, 95.0),  # zero error, guesses on inner bin edges
+    (4.999, 99.999, 9.999, 0.001),
+]
+
+
+@pytest.mark.parametrize("value, expected", [(0, 0), (4.999, 0), (5, 1), (99.999, GUESS_BINS - 1), (100, GUESS_BINS - 1)])
+def test_guess_bin_edges(value, expected):
+    assert guess_bin(value) == expected
+
+
+@pytest.mark.parametrize("error, expected", [(-100, 0), (-95.001, 0), (-95, 1), (0, ERROR_BINS // 2), (100, ERROR_BINS - 1)])
+def test_error_bin_edges(error, expected):
+    assert error_bin(error) == expected
+
+
+def test_postgres_upsert_adds_to_the_existing_count():
+    keys = {"date": DAY, "question_id": "q1", "dem_bin": 1, "rep_bin": 2}
+    sql = str(_upsert_statement("postgresql", QuestionGuessCell, keys).compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (date, question_id, dem_bin, rep_bin) DO UPDATE" in sql
+    assert "SET count = (question_guess_cells.count + excluded.count)" in sql
+
+
+def test_sqlite_upsert_increments_one_row():
+    with SessionLocal() as session:
+        for _ in range(3):
+            record_guess(session, DAY, "q1", 100.0, 0.0, 0.0, 100.0)
+        session.commit()
+        distribution = get_distribution(session, DAY, "q1")
+    assert distribution["total"] == 3
+    assert distribution["guesses"][GUESS_BINS - 1][0] == 3
+    assert distribution["dem_error"][ERROR_BINS - 1] == 3
+    assert distribution["rep_error"][0] == 3
+
+
+def counters(session):
+    cells = session.execute(select(
+        QuestionGuessCell.date, QuestionGuessCell.question_id,
+        QuestionGuessCell.dem_bin, QuestionGuessCell.rep_bin, QuestionGuessCell.count,
+    )).all()
+    errors = session.execute(select(
+        QuestionGuessError.date, QuestionGuessError.question_id,
+        QuestionGuessError.axis, QuestionGuessError.err_bin, QuestionGuessError.count,
+    )).all()
+    return set(cells), set(errors)
+
+
+def test_rebuild_matches_incremental_counters():
+    rng = random.Random(0)
+    answers = EDGE_ANSWERS + [
+        (rng.uniform(0, 100), rng.uniform(0, 100), rng.uniform(0, 100), rng.uniform(0, 100))
+        for _ in range(200)
+    ]
+    with SessionLocal() as session:
+        for i, (dem, rep, actual_dem, actual_rep) in enumerate(answers):
+            question_id = f"q{i % 3}"
+            session.add(UserAnswer(
+                user_id=f"u{i}", date=DAY, question_id=question_id, dem_guess=dem, rep_guess=rep,
+                actual_dem=actual_dem, actual_rep=actual_rep, score=0.0, score_dem=0.0, score_rep=0.0,
+            ))
+            record_guess(session, DAY, question_id, dem, rep, actual_dem, actual_rep)
+        session.commit()
+        incremental = counters(session)
+
+        rebuild_distributions(session, DAY)
+        assert counters(session) == incremental
+        rebuild_distributions(session)
+        assert counters(session) == incremental
@@ -0,0 +1,14 @@
+import pytest
+from sqlalchemy import text
+
+from db import engine
+from explain_indexes import HOT_QUERIES, explain
+
+
+@pytest.mark.parametrize("index, stmt", HOT_QUERIES, ids=[index for index, _ in HOT_QUERIES])
+def test_hot_query_uses_its_index(index, stmt):
+    with engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SET enable_seqscan = off"))
+        plan = explain(conn, stmt)
+    assert index in plan, f"{index} not used:\n{plan}"
@@ -0,0 +1,60 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from db import SessionLocal
+from export_parquet import export_table, load_state, save_state
+from models import UserDailyScore
+
+pa_dataset = pytest.importorskip("pyarrow.dataset")
+
+DAYS = [date(2026, 2, 1) + timedelta(days=d) for d in range(4)]
+
+
+@pytest.fixture
+def daily_scores():
+    with SessionLocal() as session:
+        session.add_all(
+            UserDailyScore(user_id=f"u{u}", date=day, avg_score=10.0 * u + i,
+                           avg_score_dem=1.0 * u, avg_score_rep=2.0 * u)
+            for i, day in enumerate(DAYS) for u in range(5)
+        )
+        session.commit()
+        return {row.id: row for row in session.execute(select(*UserDailyScore.__table__.columns))}
+
+
+def read_export(out_dir):
+    table = pa_dataset.dataset(out_dir / "user_daily_scores", partitioning="hive").to_table()
+    return table.to_pylist()
+
+
+def test_export_writes_one_partition_per_date(daily_scores, tmp_path):
+    dates, rows, last = export_table("user_daily_scores", tmp_path, None, None, batch_size=2)
+    assert (dates, rows, last) == (len(DAYS), len(daily_scores), DAYS[-1])
+    assert sorted(p.parent.name for p in (tmp_path / "user_daily_scores").glob("*/part-0.parquet")) == [
+        f"date={day.isoformat()}" for day in DAYS
+    ]
+    assert not list(tmp_path.rglob("*.tmp"))
+
+    for record in read_export(tmp_path):
+        row = daily_scores[record["id"]]
+        assert record["date"] == row.date.isoformat()
+        assert (record["user_id"], record["avg_score"], record["avg_score_dem"], record["avg_score_rep"]) == (
+            row.user_id, row.avg_score, row.avg_score_dem, row.avg_score_rep,
+        )
+
+
+def test_export_only_writes_dates_in_range(daily_scores, tmp_path):
+    dates, rows, last = export_table("user_daily_scores", tmp_path, DAYS[0], DAYS[2], batch_size=1000)
+    assert (dates, rows, last) == (2, 10, DAYS[2])
+    assert {r["date"] for r in read_export(tmp_path)} == {day.isoformat() for day in DAYS[1:3]}
+
+    dates, rows, last = export_table("user_daily_scores", tmp_path, DAYS[-1], None, batch_size=1000)
+    assert (dates, rows, last) == (0, 0, None)
+
+
+def test_state_round_trip(tmp_path):
+    assert load_state(tmp_path) == {}
+    save_state(tmp_path, {"user_answers": "2026-02-03"})
+    assert load_state(tmp_path) == {"user_answers": "2026-02-03"}
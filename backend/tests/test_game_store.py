@@ -0,0 +1,94 @@
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from itsdangerous import TimestampSigner
+
+import game_store
+from db import SessionLocal
+from game_store import MemoryGameStore, DBGameStore, TokenGameStore
+from models import GameSession, utcnow
+
+POSTS = [{"id": f"topic/post{i}", "img_path": f"topic/post{i}.png", "dem": 40.0, "rep": 60.0} for i in range(20)]
+
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_memory_store_expires_games_after_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(game_store, "time", SimpleNamespace(monotonic=clock))
+    store = MemoryGameStore(ttl=60, max_games=10)
+    game_id = store.create(POSTS[:5])
+    assert store.get(game_id) == POSTS[:5]
+
+    clock.now += 61
+    assert store.get(game_id) is None
+    # Expired games are also dropped when the next game is created
+    stale = store.create(POSTS[:5])
+    clock.now += 61
+    store.create(POSTS[:5])
+    assert stale not in store._games
+
+
+def test_memory_store_evicts_least_recently_used_over_max_games():
+    store = MemoryGameStore(ttl=60, max_games=2)
+    first, second = store.create(POSTS[:1]), store.create(POSTS[1:2])
+    store.get(first)  # now the most recently used
+    third = store.create(POSTS[2:3])
+    assert store.get(second) is None
+    assert store.get(first) == POSTS[:1]
+    assert store.get(third) == POSTS[2:3]
+
+
+def test_db_store_sweeps_expired_rows(monkeypatch):
+    store = DBGameStore(ttl=60)
+    expired = store.create(POSTS[:5])
+    assert store.get(expired) == POSTS[:5]
+
+    later = utcnow() + timedelta(seconds=61)
+    monkeypatch.setattr(game_store, "utcnow", lambda: later)
+    assert store.get(expired) is None
+    store._next_purge = 0.0  # the purge interval has passed
+    current = store.create(POSTS[:5])
+    with SessionLocal() as session:
+        assert [game.id for game in session.query(GameSession)] == [current]
+
+
+@pytest.fixture
+def token_store(monkeypatch):
+    from app import create_app
+
+    version = {"value": "v1"}
+    monkeypatch.setattr(game_store, "get_posts", lambda: POSTS)
+    monkeypatch.setattr(game_store, "catalog_version", lambda: version["value"])
+    with create_app().app_context():
+        yield TokenGameStore(ttl=60), version
+
+
+def test_token_store_redraws_the_same_questions(token_store):
+    store, _ = token_store
+    token, questions = store.start(POSTS)
+    assert len(questions) == game_store.DEFAULT_NUM_QUESTIONS
+    assert store.get(token) == questions
+    assert store.get(token + "x") is None
+
+
+def test_token_store_rejects_expired_tokens(token_store, monkeypatch):
+    store, _ = token_store
+    token, _ = store.start(POSTS)
+    issued = TimestampSigner.get_timestamp
+    monkeypatch.setattr(TimestampSigner, "get_timestamp", lambda self: issued(self) + 61)
+    assert store.get(token) is None
+
+
+def test_token_store_rejects_tokens_from_another_catalog(token_store):
+    store, version = token_store
+    token, _ = store.start(POSTS)
+    version["value"] = "v2"
+    assert store.get(token) is None
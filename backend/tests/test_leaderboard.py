@@ -0,0 +1,97 @@
+import pytest
+
+import leaderboard
+from db import SessionLocal
+from models import User
+
+SCORES = [90.0, 75.5, None, 75.5, 60.0, None, 90.0, 10.0, 75.5]
+
+
+@pytest.fixture
+def users(monkeypatch):
+    monkeypatch.setattr(leaderboard, "_user_count_cache", {"value": None, "expires_at": 0.0})
+    with SessionLocal() as session:
+        session.add_all(User(uid=f"u{i}", score=score, games_played=1) for i, score in enumerate(SCORES))
+        session.commit()
+
+
+def expected_order():
+    ranked = sorted(enumerate(SCORES), key=lambda item: (item[1] is None, -(item[1] or 0), f"u{item[0]}"))
+    return [f"u{i}" for i, _ in ranked]
+
+
+def test_cursor_pages_walk_ties_and_null_scores_in_order(client, users):
+    seen, cursor = [], None
+    while True:
+        url = "/api/leaderboard?limit=2" + (f"&cursor={cursor}" if cursor else "")
+        page = client.get(url).get_json()
+        seen += [entry["id"] for entry in page["entries"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == expected_order()
+
+
+def test_offset_pages_match_cursor_order(client, users):
+    page = client.get("/api/leaderboard?limit=3&offset=3").get_json()
+    assert [entry["id"] for entry in page["entries"]] == expected_order()[3:6]
+    assert page["total"] == len(SCORES)
+
+
+def test_total_is_cached_and_bumped_by_this_process(client, users):
+    assert client.get("/api/leaderboard").get_json()["total"] == len(SCORES)
+    with SessionLocal() as session:
+        session.add(User(uid="late", score=1.0))
+        session.commit()
+    # Not recounted within the TTL...
+    assert client.get("/api/leaderboard").get_json()["total"] == len(SCORES)
+    # ...but a user created through this process is counted at once
+    client.post("/api/users/score", json={"uid": "new", "average_score": 5})
+    assert client.get("/api/leaderboard").get_json()["total"] == len(SCORES) + 1
+
+
+@pytest.fixture
+def daily_scores(monkeypatch):
+    """(user, days ago, score): a, b and c on different mixes of days."""
+    from datetime import timedelta
+
+    from daily_questions import get_eastern_date
+    from models import UserDailyScore
+
+    monkeypatch.setattr(leaderboard, "_window_cache", {})
+    today = get_eastern_date()
+    rows = [("a", 0, 80.0), ("a", 3, 40.0), ("b", 0, 80.0), ("b", 10, 100.0), ("c", 3, 90.0), ("c", 10, 20.0)]
+    with SessionLocal() as session:
+        session.add_all(
+            UserDailyScore(user_id=uid, date=today - timedelta(days=ago),
+                           avg_score=score, avg_score_dem=score, avg_score_rep=score)
+            for uid, ago, score in rows
+        )
+        session.commit()
+
+
+@pytest.mark.parametrize("window, expected", [
+    ("today", [("a", 80.0, 1), ("b", 80.0, 1)]),
+    ("week", [("c", 90.0, 1), ("b", 80.0, 2), ("a", 60.0, 3)]),
+    ("all", [("b", 90.0, 1), ("a", 60.0, 2), ("c", 55.0, 3)]),
+])
+def test_window_leaderboards_average_days_in_the_window(client, daily_scores, window, expected):
+    board = client.get(f"/api/leaderboard/{window}").get_json()
+    assert [(e["id"], e["score"], e["rank"]) for e in board["entries"]] == expected
+    assert board["total"] == len(expected)
+
+
+@pytest.mark.parametrize("window", ["today", "week", "all"])
+def test_window_user_rank_matches_the_board_cold_and_cached(client, daily_scores, window):
+    cold = {uid: client.get(f"/api/leaderboard/{window}/user/{uid}") for uid in "abc"}
+    board = client.get(f"/api/leaderboard/{window}").get_json()  # warms the cache
+    for entry in board["entries"]:
+        cached = client.get(f"/api/leaderboard/{window}/user/{entry['id']}").get_json()
+        assert cold[entry["id"]].get_json() == cached == {"window": window, **entry, "total": board["total"]}
+    absent = {"abc"[i] for i in range(3)} - {e["id"] for e in board["entries"]}
+    for uid in absent:
+        assert cold[uid].status_code == 404
+
+
+def test_unknown_window_is_rejected(client):
+    assert client.get("/api/leaderboard/month").status_code == 400
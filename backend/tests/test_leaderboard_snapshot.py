@@ -0,0 +1,50 @@
+import threading
+from datetime import timedelta
+from types import SimpleNamespace
+
+import leaderboard
+from db import SessionLocal, lift_statement_timeout
+from leaderboard import refresh_leaderboard_snapshot, snapshot_row
+from models import User, LeaderboardSnapshot, utcnow
+
+
+def add_users(scores):
+    with SessionLocal() as session:
+        session.add_all(User(uid=f"u{i}", score=score, games_played=1) for i, score in enumerate(scores))
+        session.commit()
+
+
+def test_snapshot_ranks_ties_and_null_scores():
+    add_users([50.0, 90.0, None, 90.0])
+    with SessionLocal() as session:
+        assert refresh_leaderboard_snapshot(session) == 4
+        ranks = {row.uid: row.rank for row in session.query(LeaderboardSnapshot)}
+    assert ranks == {"u1": 1, "u3": 1, "u0": 3, "u2": 4}
+
+
+def test_stale_snapshot_is_served_and_rebuilt_in_the_background(monkeypatch):
+    add_users([50.0])
+    with SessionLocal() as session:
+        refresh_leaderboard_snapshot(session)
+        stale = utcnow() - timedelta(seconds=leaderboard.SNAPSHOT_INTERVAL + 1)
+        session.query(LeaderboardSnapshot).update({"snapshot_at": stale})
+        session.commit()
+    monkeypatch.setitem(leaderboard._snapshot_refresh, "next_at", 0.0)
+
+    with SessionLocal() as session:
+        assert snapshot_row(session, "u0").snapshot_at == stale
+    for thread in threading.enumerate():
+        if thread.name == "leaderboard-snapshot":
+            thread.join(5)
+    with SessionLocal() as session:
+        assert session.get(LeaderboardSnapshot, "u0").snapshot_at > stale
+
+
+def test_rebuild_lifts_the_postgres_statement_timeout():
+    executed = []
+    session = SimpleNamespace(
+        get_bind=lambda: SimpleNamespace(dialect=SimpleNamespace(name="postgresql")),
+        execute=lambda statement: executed.append(str(statement)),
+    )
+    lift_statement_timeout(session)
+    assert executed == ["SET LOCAL statement_timeout = 0"]
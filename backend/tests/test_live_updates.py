@@ -0,0 +1,36 @@
+from sqlalchemy import update
+
+import live_updates
+from conftest import play_today
+from daily_questions import get_eastern_date
+from db import SessionLocal
+from leaderboard import refresh_leaderboard_snapshot
+from models import User, UserDailyScore
+
+
+def test_in_place_rescore_is_published(client, monkeypatch):
+    with SessionLocal() as session:
+        session.add_all(User(uid=f"u{u}", score=50.0, games_played=1) for u in range(3))
+        session.commit()
+    play_today(client, range(3))
+    publisher = live_updates.RankPublisher()
+    monkeypatch.setattr(publisher, "_run", lambda: None)  # drive it by hand
+    topic = ("results", get_eastern_date())
+    q, state = publisher.subscribe(topic)
+    publisher._publish_changes([topic])  # records the watermark
+    last = min(state, key=lambda uid: -state[uid]["rank"])
+
+    # Rewrite scores in place, as rescore.py does: no new user_daily_scores id
+    with SessionLocal() as session:
+        session.execute(update(UserDailyScore).where(UserDailyScore.user_id == last)
+                        .values(avg_score=1000.0, avg_score_dem=1000.0, avg_score_rep=1000.0))
+        session.commit()
+    publisher._publish_changes([topic])
+    assert q.empty()
+
+    with SessionLocal() as session:
+        refresh_leaderboard_snapshot(session)
+    publisher._publish_changes([topic])
+    event = q.get_nowait()
+    assert event["changes"][last] == {"rank": 1, "rank_dem": 1, "rank_rep": 1}
+    publisher.unsubscribe(topic, q)
@@ -0,0 +1,132 @@
+import pytest
+import sqlalchemy as sa
+from alembic import command
+from alembic.config import Config
+
+from conftest import REPO_DIR
+
+BASE_REVISION = "87121f32aa59"
+
+# Gameplay tables as an older create_all built them: before the ground truth
+# and submission time were stored on answers
+LEGACY_SCHEMA = [
+    "CREATE TABLE users (uid VARCHAR PRIMARY KEY, display_name VARCHAR, score FLOAT, games_played INTEGER, "
+    "survey_responses TEXT, created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL)",
+    "CREATE TABLE daily_questions (id INTEGER PRIMARY KEY, date VARCHAR NOT NULL, question_id VARCHAR NOT NULL, "
+    "question_order INTEGER NOT NULL, img_path VARCHAR NOT NULL, dem FLOAT NOT NULL, rep FLOAT NOT NULL, "
+    "topic VARCHAR, created_at DATETIME NOT NULL)",
+    "CREATE TABLE user_answers (id INTEGER PRIMARY KEY, user_id VARCHAR NOT NULL, date VARCHAR NOT NULL, "
+    "question_id VARCHAR NOT NULL, dem_guess FLOAT NOT NULL, rep_guess FLOAT NOT NULL, score FLOAT NOT NULL, "
+    "score_dem FLOAT NOT NULL, score_rep FLOAT NOT NULL)",
+    "INSERT INTO users VALUES ('u1', 'Ann', 80.5, 3, NULL, '2026-01-01 00:00:00', '2026-01-01 00:00:00')",
+    "INSERT INTO daily_questions VALUES (1, '2026-01-01', 'q1', 0, 'a.png', 40.0, 60.0, NULL, '2026-01-01 00:00:00')",
+    "INSERT INTO user_answers VALUES (1, 'u1', '2026-01-01', 'q1', 45.0, 55.0, 90.0, 90.0, 90.0)",
+]
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.execute(sa.text(statement))
+    yield engine
+    engine.dispose()
+
+
+def migrate(engine, direction, target):
+    config = Config(str(REPO_DIR / "alembic.ini"))
+    with engine.begin() as conn:
+        config.attributes["connection"] = conn
+        direction(config, target)
+
+
+def test_upgrade_backfills_and_enforces_not_null(legacy_db):
+    migrate(legacy_db, command.upgrade, "head")
+    columns = {c["name"]: c for c in sa.inspect(legacy_db).get_columns("user_answers")}
+    assert not columns["actual_dem"]["nullable"]
+    assert not columns["submitted_at"]["nullable"]
+    with legacy_db.connect() as conn:
+        row = conn.execute(sa.text("SELECT actual_dem, actual_rep, submitted_at FROM user_answers")).one()
+    assert (row.actual_dem, row.actual_rep) == (40.0, 60.0)
+    assert row.submitted_at is not None
+
+
+def test_downgrade_keeps_tables_that_predate_the_revision(legacy_db):
+    migrate(legacy_db, command.upgrade, "head")
+    migrate(legacy_db, command.downgrade, BASE_REVISION)
+
+    inspector = sa.inspect(legacy_db)
+    assert {"users", "daily_questions", "user_answers"} <= set(inspector.get_table_names())
+    assert not inspector.has_table("user_daily_scores")
+    assert not inspector.has_table("migration_created_objects")
+    assert "actual_dem" not in {c["name"] for c in inspector.get_columns("user_answers")}
+    with legacy_db.connect() as conn:
+        assert conn.execute(sa.text("SELECT display_name FROM users")).scalar() == "Ann"
+        assert conn.execute(sa.text("SELECT count(*) FROM user_answers")).scalar() == 1
+
+
+def test_upgrade_backfills_signup_cohorts(legacy_db):
+    migrate(legacy_db, command.upgrade, "e91b5c2d4f60")
+    with legacy_db.begin() as conn:
+        conn.execute(sa.text(
+            "UPDATE users SET survey_responses = "
+            "'{\"partyIdentification\": \"Democrat\", \"ideologicalOrientation\": \"Liberal\", \"feelingDemocrats\": \"70\"}'"
+        ))
+        conn.execute(sa.text(
+            "INSERT INTO user_daily_scores (user_id, date, avg_score, avg_score_dem, avg_score_rep, created_at) "
+            "VALUES ('u1', '2026-01-01', 90.0, 88.0, 92.0, '2026-01-01 00:00:00')"
+        ))
+        conn.execute(sa.text(
+            "INSERT INTO user_stats (user_id, answers_count, days_completed, updated_at) "
+            "VALUES ('u1', 5, 1, '2026-01-01 00:00:00')"
+        ))
+    migrate(legacy_db, command.upgrade, "head")
+
+    with legacy_db.connect() as conn:
+        survey = conn.execute(sa.text("SELECT party_identity, ideology, warmth_dem FROM signup_surveys")).one()
+        daily = conn.execute(sa.text("SELECT party_identity, ideology FROM user_daily_scores")).one()
+        stats = conn.execute(sa.text("SELECT party_identity, ideology, score_sum, score_rep_sum FROM user_stats")).one()
+    assert tuple(survey) == ("Democrat", "Liberal", 70)
+    assert tuple(daily) == ("Democrat", "Liberal")
+    assert tuple(stats) == ("Democrat", "Liberal", 90.0, 92.0)
+
+
+DATE_REVISION = "d7a3f0b6e218"
+
+
+def test_upgrade_declares_date_columns_and_keeps_values(legacy_db):
+    from datetime import date
+
+    migrate(legacy_db, command.upgrade, DATE_REVISION)
+    columns = {c["name"]: c for c in sa.inspect(legacy_db).get_columns("user_answers")}
+    assert isinstance(columns["date"]["type"], sa.Date)
+    answers = sa.table("user_answers", sa.column("date", sa.Date))
+    with legacy_db.connect() as conn:
+        assert conn.execute(sa.select(answers.c.date)).scalar() == date(2026, 1, 1)
+        assert conn.execute(sa.select(answers.c.date).where(answers.c.date >= date(2026, 1, 1))).scalar()
+
+    migrate(legacy_db, command.downgrade, "c4e1d92a7b35")
+    columns = {c["name"]: c for c in sa.inspect(legacy_db).get_columns("user_answers")}
+    assert isinstance(columns["date"]["type"], sa.String)
+    with legacy_db.connect() as conn:
+        assert conn.execute(sa.text("SELECT date FROM user_answers")).scalar() == "2026-01-01"
+
+
+def test_upgrade_refuses_dates_that_are_not_iso(legacy_db):
+    migrate(legacy_db, command.upgrade, "c4e1d92a7b35")
+    with legacy_db.begin() as conn:
+        conn.execute(sa.text("UPDATE user_answers SET date = '01/01/2026'"))
+    with pytest.raises(RuntimeError, match="01/01/2026"):
+        migrate(legacy_db, command.upgrade, DATE_REVISION)
+
+
+@pytest.mark.parametrize("path", [
+    "/api/results?user_id=u1&date=2026-1-1",
+    "/api/questions/distribution?question_id=q1&date=01/01/2026",
+    "/api/stats/improvement?end_date=yesterday",
+])
+def test_request_dates_must_be_iso(client, path):
+    response = client.get(path)
+    assert response.status_code == 400
+    assert "YYYY-MM-DD" in response.get_json()["error"]
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+import app
+from conftest import play_today
+from db import SessionLocal
+from models import User
+
+
+@pytest.fixture
+def played(client, monkeypatch):
+    """Three users with a display name and today's answers; batches smaller than the results."""
+    monkeypatch.setattr(app, "STREAM_BATCH_SIZE", 2)
+    with SessionLocal() as session:
+        session.add_all(User(uid=f"u{u}", display_name=f"User {u}") for u in range(3))
+        session.commit()
+    play_today(client, range(3))
+
+
+def ndjson_lines(response):
+    assert response.mimetype == "application/x-ndjson"
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+@pytest.mark.parametrize("path, key", [
+    ("/api/user_ids?limit=10000", "users"),
+    ("/api/user/guesses?user_id=u1&limit=1000", "guesses"),
+])
+def test_ndjson_streams_the_same_rows_as_json(client, played, path, key):
+    expected = client.get(path).get_json()[key]
+    assert len(expected) > app.STREAM_BATCH_SIZE
+    assert ndjson_lines(client.get(f"{path}&format=ndjson")) == expected
+    assert ndjson_lines(client.get(path, headers={"Accept": "application/x-ndjson"})) == expected
+
+
+def test_progress_ndjson_matches_json(client, played):
+    from datetime import timedelta
+
+    from daily_questions import get_eastern_date
+    from models import UserDailyScore
+
+    with SessionLocal() as session:
+        yesterday = get_eastern_date() - timedelta(days=1)
+        session.add_all(
+            UserDailyScore(user_id=f"u{u}", date=yesterday, avg_score=50.0, avg_score_dem=50.0, avg_score_rep=50.0)
+            for u in range(3)
+        )
+        session.commit()
+    expected = client.get("/api/users/progress").get_json()
+    assert len(expected) == 3
+    assert ndjson_lines(client.get("/api/users/progress?format=ndjson")) == expected
+
+
+def test_guesses_ndjson_only_pages_when_asked(client, played):
+    everything = ndjson_lines(client.get("/api/user/guesses?user_id=u1&format=ndjson"))
+    assert len(everything) == client.get("/api/user/guesses?user_id=u1").get_json()["total"]
+    page = ndjson_lines(client.get("/api/user/guesses?user_id=u1&format=ndjson&limit=2&offset=1"))
+    assert page == everything[1:3]
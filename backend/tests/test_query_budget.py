@@ -0,0 +1,33 @@
+import pytest
+
+from conftest import play_today
+from query_stats import count_queries
+
+# (endpoint for user u0, most statements it may run)
+HOT_ENDPOINTS = [
+    ("/api/results?user_id=u0", 10),
+    ("/api/user/guesses?user_id=u0", 3),
+    ("/api/daily_questions?user_id=u0", 3),
+    ("/api/leaderboard/today", 2),
+    ("/api/leaderboard/week/user/u0", 4),
+]
+
+
+def measure(client, url):
+    with count_queries() as stats:
+        response = client.get(url)
+    assert response.status_code == 200, response.get_json()
+    return stats
+
+
+@pytest.mark.parametrize("url, budget", HOT_ENDPOINTS, ids=[url for url, _ in HOT_ENDPOINTS])
+def test_hot_endpoint_has_no_n_plus_one(client, url, budget):
+    play_today(client, range(0, 4))
+    few = measure(client, url)
+    play_today(client, range(4, 16))
+    many = measure(client, url)
+
+    assert not many.repeated(threshold=2), many.repeated(threshold=2)
+    assert many.queries <= budget
+    # Four times the players must not mean more statements
+    assert many.queries <= few.queries
@@ -0,0 +1,63 @@
+import threading
+from types import SimpleNamespace
+
+import cohorts
+from db import SessionLocal
+from models import UserStats
+from ranking import rank_desc
+
+
+def test_ties_share_the_best_rank():
+    rows = [SimpleNamespace(user_id=uid, score=score) for uid, score in
+            [("a", 50.0), ("b", 70.0), ("c", 50.0), ("d", 90.0), ("e", 10.0)]]
+    assert rank_desc(rows, lambda r: r.score) == {"d": 1, "b": 2, "a": 3, "c": 3, "e": 5}
+
+
+def add_stats(user_id, party, score_sum, days=1):
+    with SessionLocal() as session:
+        session.merge(UserStats(user_id=user_id, answers_count=5 * days, days_completed=days,
+                                score_sum=score_sum, score_dem_sum=score_sum, score_rep_sum=score_sum,
+                                party_identity=party))
+        session.commit()
+
+
+def join_cohort_refreshes():
+    for thread in threading.enumerate():
+        if thread.name == "cohort-ranks":
+            thread.join(timeout=5)
+
+
+def test_alltime_cohort_ranks_refresh_in_the_background(monkeypatch):
+    # A refresh started by an earlier test would hold the lock and skip ours
+    join_cohort_refreshes()
+    monkeypatch.setattr(cohorts, "_alltime_cohort_cache", {"expires_at": 0.0, "ranks": None})
+    add_stats("a", "Democrat", 60.0)
+    add_stats("b", "Democrat", 40.0)
+    with SessionLocal() as session:
+        ranks = cohorts.get_alltime_cohort_ranks(session)
+        assert ranks["party_identity"]["b"]["rank"] == 2
+
+        add_stats("b", "Democrat", 80.0)
+        # Stale: the old ranks are served while a refresh runs off the request
+        cohorts._alltime_cohort_cache["expires_at"] = 0.0
+        assert cohorts.get_alltime_cohort_ranks(session) is ranks
+
+    join_cohort_refreshes()
+    with SessionLocal() as session:
+        assert cohorts.get_alltime_cohort_ranks(session)["party_identity"]["b"]["rank"] == 1
+
+
+def test_daily_cohort_rank_includes_a_player_who_just_finished(client):
+    from cohorts import upsert_signup_survey
+    from conftest import play_today
+
+    with SessionLocal() as session:
+        for u in range(4):
+            upsert_signup_survey(session, f"u{u}", {"partyIdentification": "Democrat"})
+        session.commit()
+    play_today(client, range(3))
+    play_today(client, range(3, 4))
+
+    today = client.get("/api/results?user_id=u3").get_json()["cohort_ranks"]["party_identity"]["today"]
+    assert today["cohort"] == "Democrat"
+    assert today["total"] == 4
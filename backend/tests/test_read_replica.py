@@ -0,0 +1,30 @@
+import pytest
+import sqlalchemy as sa
+
+import db
+from conftest import play_today
+
+
+@pytest.fixture
+def lagging_replica(tmp_path, monkeypatch):
+    """A replica that has not caught up with anything yet (an empty copy of the schema)."""
+    replica = sa.create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    db.Base.metadata.create_all(replica)
+    monkeypatch.setattr(db, "read_engine", replica)
+    yield replica
+    replica.dispose()
+
+
+def test_results_after_submit_on_another_worker(client, lagging_replica):
+    play_today(client, range(1))
+    db._recent_writes.clear()  # the submits were served by a different worker
+
+    assert client.get("/api/results?user_id=u0").status_code == 404
+    response = client.get("/api/results?user_id=u0&fresh=1")
+    assert response.status_code == 200
+    assert len(response.get_json()["questions"]) > 0
+
+
+def test_recent_write_in_this_process_reads_primary(client, lagging_replica):
+    play_today(client, range(1))
+    assert client.get("/api/results?user_id=u0").status_code == 200
@@ -0,0 +1,79 @@
+import pytest
+from sqlalchemy import select, update
+
+import rescore
+from conftest import play_today
+from db import SessionLocal
+from models import UserAnswer, UserDailyScore, UserStats
+
+
+def rollups():
+    with SessionLocal() as session:
+        days = session.execute(select(
+            UserDailyScore.id, UserDailyScore.avg_score, UserDailyScore.avg_score_dem, UserDailyScore.avg_score_rep,
+        ).order_by(UserDailyScore.id)).all()
+        stats = session.execute(select(
+            UserStats.user_id, UserStats.score_sum, UserStats.score_dem_sum, UserStats.score_rep_sum,
+        ).order_by(UserStats.user_id)).all()
+    return days, stats
+
+
+def scramble():
+    """Stored scores as an older formula would have left them."""
+    with SessionLocal() as session:
+        session.execute(update(UserAnswer).values(score=0.0, score_dem=0.0, score_rep=0.0))
+        session.execute(update(UserDailyScore).values(avg_score=0.0, avg_score_dem=0.0, avg_score_rep=0.0))
+        session.execute(update(UserStats).values(score_sum=0.0, score_dem_sum=0.0, score_rep_sum=0.0))
+        session.commit()
+
+
+@pytest.fixture
+def played(client):
+    play_today(client, range(7))
+    submitted = rollups()
+    scramble()
+    return submitted
+
+
+def test_full_run_restores_submitted_scores(played, tmp_path):
+    rescore.rescore(tmp_path / "state.json", chunk_size=4)
+    assert rollups() == played
+    assert rescore.load_state(tmp_path / "state.json")["phase"] == "done"
+
+
+def test_interrupted_run_resumes_to_the_same_result(played, tmp_path, monkeypatch):
+    state_file = tmp_path / "state.json"
+    saves = []
+    real_save = rescore.save_state
+
+    def crash_after_first_chunk(path, state):
+        real_save(path, state)
+        saves.append(dict(state))
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(rescore, "save_state", crash_after_first_chunk)
+    with pytest.raises(KeyboardInterrupt):
+        rescore.rescore(state_file, chunk_size=4)
+    monkeypatch.undo()
+    assert saves == [{"formula": [rescore.ALPHA, rescore.BETA], "phase": "answers", "after": 4}]
+
+    rescore.rescore(state_file, chunk_size=4)
+    assert rescore.load_state(state_file)["phase"] == "done"
+    assert rollups() == played
+
+
+def test_phases_run_in_order(played, tmp_path, monkeypatch):
+    phases = []
+    real_save = rescore.save_state
+    monkeypatch.setattr(rescore, "save_state", lambda path, state: (phases.append(state["phase"]), real_save(path, state)))
+    rescore.rescore(tmp_path / "state.json", chunk_size=4)
+    order = [phase for i, phase in enumerate(phases) if i == 0 or phases[i - 1] != phase]
+    assert order == rescore.PHASES + ["done"]
+
+
+def test_dry_run_reports_without_writing(played):
+    before = rollups()
+    summary = rescore.dry_run(chunk_size=4)
+    assert summary["answers"] == summary["changed"] > 0
+    assert summary["days"] == 7
+    assert rollups() == before
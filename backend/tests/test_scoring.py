@@ -0,0 +1,33 @@
+import pytest
+
+from scoring import answer_scores, check_equivalence, daily_averages, score_batch
+
+# (user_dem, user_rep, truth_dem, truth_rep): guesses of 0 and 100, and exact guesses
+EDGES = [
+    (0, 0, 0, 0),
+    (100, 100, 100, 100),
+    (0, 100, 100, 0),
+    (100, 0, 0, 100),
+    (37.5, 62.4, 37.5, 62.4),
+    (0.1, 99.9, 0, 100),
+]
+
+
+def test_score_batch_matches_scalar_on_random_sample():
+    assert check_equivalence(n=20_000, seed=1) == 0
+
+
+@pytest.mark.parametrize("answer", EDGES)
+def test_score_batch_matches_scalar_on_edges(answer):
+    batch = score_batch(*([value] for value in answer))
+    assert tuple(column[0] for column in batch) == answer_scores(*answer)
+
+
+def test_exact_guess_scores_100():
+    assert answer_scores(42, 58, 42, 58) == (100.0, 100.0, 100.0)
+
+
+def test_daily_averages_do_not_depend_on_answer_order():
+    scores = [(0.1, 0.7, 1e16), (0.2, 0.1, 1.0), (0.3, 0.2, -1e16), (99.9, 33.3, 3.0), (1e-9, 50.0, 2.0)]
+    assert daily_averages(scores) == daily_averages(reversed(scores)) == daily_averages(sorted(scores))
+    assert daily_averages(scores)[2] == 6.0 / 5
@@ -0,0 +1,15 @@
+from survey_store import SurveyStore
+
+
+def test_save_after_interrupted_append_starts_a_new_line(tmp_path):
+    store = SurveyStore(tmp_path / "surveys.jsonl", legacy_path=None)
+    store.save("a@example.com", {"party_identity": "Democrat"})
+    with open(store.path, "ab") as f:
+        f.write(b'{"email":"b@example.com","party')  # crashed mid-write
+
+    store.save("c@example.com", {"party_identity": "Republican"})
+
+    assert store.get("c@example.com") == {"email": "c@example.com", "party_identity": "Republican"}
+    assert store.get("b@example.com") is None
+    fresh = SurveyStore(store.path, legacy_path=None)
+    assert [r["email"] for r in fresh.all()] == ["a@example.com", "c@example.com"]
@@ -4,30 +4,44 @@ import os, sys
 from sqlalchemy import engine_from_config, pool
 from alembic import context
 
-# add project root to path
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+# backend modules import each other by bare name (from db import Base), so put backend/ itself on the path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend")))
 
-from backend.db import Base, DATABASE_URL
-from backend import models  # noqa: F401  ensures models are imported
+from db import Base, DATABASE_URL
+import models  # noqa: F401  ensures models are imported
 
 config = context.config
 fileConfig(config.config_file_name)
 target_metadata = Base.metadata
 
+def include_name(name, type_, parent_names):
+    # Bookkeeping table kept by revision c4e1d92a7b35, not part of the models
+    return not (type_ == "table" and name == "migration_created_objects")
+
 def run_migrations_offline():
     url = DATABASE_URL
-    context.configure(url=url, target_metadata=target_metadata, literal_binds=True, compare_type=True)
+    context.configure(url=url, target_metadata=target_metadata, literal_binds=True, compare_type=True,
+                      include_name=include_name)
     with context.begin_transaction():
         context.run_migrations()
 
 def run_migrations_online():
+    # A caller (e.g. the tests) can hand over its own connection via config.attributes
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run_on(connection)
+        return
     configuration = config.get_section(config.config_ini_section)
     configuration["sqlalchemy.url"] = DATABASE_URL
     connectable = engine_from_config(configuration, prefix="sqlalchemy.", poolclass=pool.NullPool)
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata, compare_type=True)
-        with context.begin_transaction():
-            context.run_migrations()
+        _run_on(connection)
+
+def _run_on(connection):
+    context.configure(connection=connection, target_metadata=target_metadata, compare_type=True,
+                      include_name=include_name)
+    with context.begin_transaction():
+        context.run_migrations()
 
 if context.is_offline_mode():
     run_migrations_offline()
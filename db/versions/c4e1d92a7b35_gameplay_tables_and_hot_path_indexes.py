@@ -0,0 +1,316 @@
+"""gameplay tables and hot-path indexes
+
+Brings databases up to the current models: the user/gameplay tables that
+init_schema predates, columns added to them since, and the indexes behind the
+hot filters (per-day score and answer scans, the leaderboard ordering, posts by
+topic, post_question_map by post/question).
+
+Databases that were bootstrapped with Base.metadata.create_all are upgraded in
+place: existing tables, columns and indexes are detected and skipped. Columns
+added to existing tables are backfilled and then made NOT NULL as the models
+declare. On Postgres, indexes on existing tables are built with CREATE INDEX
+CONCURRENTLY so writes are not blocked while they build.
+
+Everything this revision creates is recorded in migration_created_objects, and
+downgrade drops only those tables, columns and indexes, never tables (or
+data) that predate it.
+
+Revision ID: c4e1d92a7b35
+Revises: 87121f32aa59
+Create Date: 2026-10-18 23:40:00.000000
+
+"""
+from contextlib import nullcontext
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e1d92a7b35'
+down_revision: Union[str, Sequence[str], None] = '87121f32aa59'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Bookkeeping of the objects this revision created (see downgrade)
+LEDGER = 'migration_created_objects'
+_ledger = sa.table(LEDGER, sa.column('revision'), sa.column('kind'), sa.column('table_name'), sa.column('name'))
+
+# (name, table, columns, unique); expressions are given as sa.text
+INDEXES = [
+    ('ix_users_score_nulls_last', 'users', [sa.text('(score IS NULL)'), sa.text('score DESC'), 'uid'], False),
+    ('ix_users_updated_at', 'users', ['updated_at'], False),
+    ('ix_leaderboard_snapshot_score', 'leaderboard_snapshot', ['score'], False),
+    ('ix_leaderboard_snapshot_taken', 'leaderboard_snapshot', ['snapshot_at'], False),
+    ('ix_daily_questions_date_order', 'daily_questions', ['date', 'question_order'], False),
+    ('ix_daily_questions_date_question', 'daily_questions', ['date', 'question_id'], False),
+    ('ix_user_answers_user_date_question', 'user_answers', ['user_id', 'date', 'question_id'], True),
+    ('ix_user_answers_user_date_submitted', 'user_answers', ['user_id', 'date', 'submitted_at', 'id'], False),
+    ('ix_user_answers_date_question', 'user_answers', ['date', 'question_id'], False),
+    ('ix_user_answers_date_score', 'user_answers', ['date', 'score'], False),
+    ('ix_user_daily_scores_user_date', 'user_daily_scores', ['user_id', 'date'], True),
+    ('ix_user_daily_scores_date_score', 'user_daily_scores', ['date', 'avg_score'], False),
+    ('ix_user_daily_scores_date_score_dem', 'user_daily_scores', ['date', 'avg_score_dem'], False),
+    ('ix_user_daily_scores_date_score_rep', 'user_daily_scores', ['date', 'avg_score_rep'], False),
+    ('ix_user_daily_scores_date_user_scores', 'user_daily_scores',
+     ['date', 'user_id', 'avg_score', 'avg_score_dem', 'avg_score_rep'], False),
+    ('ix_question_guess_cells_key', 'question_guess_cells', ['date', 'question_id', 'dem_bin', 'rep_bin'], True),
+    ('ix_question_guess_errors_key', 'question_guess_errors', ['date', 'question_id', 'axis', 'err_bin'], True),
+    ('ix_signup_surveys_party_user', 'signup_surveys', ['party_identity', 'user_id'], False),
+    ('ix_signup_surveys_ideology_user', 'signup_surveys', ['ideology', 'user_id'], False),
+    ('ix_posts_topic_id', 'posts', ['topic_id'], False),
+    ('ix_post_question_map_post', 'post_question_map', ['post_id'], False),
+    ('ix_post_question_map_question', 'post_question_map', ['question_id'], False),
+]
+
+
+def _tables() -> list:
+    """Current definitions of the tables this revision manages, in dependency order."""
+    return [
+        ('users', [
+            sa.Column('uid', sa.String(), nullable=False),
+            sa.Column('display_name', sa.String(), nullable=True),
+            sa.Column('score', sa.Float(), nullable=True),
+            sa.Column('games_played', sa.Integer(), nullable=True),
+            sa.Column('survey_responses', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('uid'),
+        ]),
+        ('user_rounds', [
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('user_uid', sa.String(), nullable=False),
+            sa.Column('average_score', sa.Float(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['user_uid'], ['users.uid'], ),
+            sa.PrimaryKeyConstraint('id'),
+        ]),
+        ('leaderboard_snapshot', [
+            sa.Column('uid', sa.String(), nullable=False),
+            sa.Column('score', sa.Float(), nullable=False),
+            sa.Column('rank', sa.Integer(), nullable=False),
+            sa.Column('games_played', sa.Integer(), nullable=False),
+            sa.Column('snapshot_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('uid'),
+        ]),
+        ('daily_questions', [
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('date', sa.String(), nullable=False),
+            sa.Column('question_id', sa.String(), nullable=False),
+            sa.Column('question_order', sa.Integer(), nullable=False),
+            sa.Column('img_path', sa.String(), nullable=False),
+            sa.Column('dem', sa.Float(), nullable=False),
+            sa.Column('rep', sa.Float(), nullable=False),
+            sa.Column('topic', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+        ]),
+        ('user_answers', [
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('user_id', sa.String(), nullable=False),
+            sa.Column('date', sa.String(), nullable=False),
+            sa.Column('question_id', sa.String(), nullable=False),
+            sa.Column('dem_guess', sa.Float(), nullable=False),
+            sa.Column('rep_guess', sa.Float(), nullable=False),
+            sa.Column('actual_dem', sa.Float(), nullable=False),
+            sa.Column('actual_rep', sa.Float(), nullable=False),
+            sa.Column('score', sa.Float(), nullable=False),
+            sa.Column('score_dem', sa.Float(), nullable=False),
+            sa.Column('score_rep', sa.Float(), nullable=False),
+            sa.Column('submitted_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+        ]),
+        ('user_daily_scores', [
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('user_id', sa.String(), nullable=False),
+            sa.Column('date', sa.String(), nullable=False),
+            sa.Column('avg_score', sa.Float(), nullable=False),
+            sa.Column('avg_score_dem', sa.Float(), nullable=False),
+            sa.Column('avg_score_rep', sa.Float(), nullable=False),
+            sa.Column('party_identity', sa.String(), nullable=True),
+            sa.Column('ideology', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+        ]),
+        ('user_stats', [
+            sa.Column('user_id', sa.String(), nullable=False),
+            sa.Column('answers_count', sa.Integer(), nullable=False),
+            sa.Column('days_completed', sa.Integer(), nullable=False),
+            sa.Column('score_sum', sa.Float(), server_default='0', nullable=False),
+            sa.Column('score_dem_sum', sa.Float(), server_default='0', nullable=False),
+            sa.Column('score_rep_sum', sa.Float(), server_default='0', nullable=False),
+            sa.Column('party_identity', sa.String(), nullable=True),
+            sa.Column('ideology', sa.String(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('user_id'),
+        ]),
+        ('question_guess_cells', [
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('date', sa.String(), nullable=False),
+            sa.Column('question_id', sa.String(), nullable=False),
+            sa.Column('dem_bin', sa.Integer(), nullable=False),
+            sa.Column('rep_bin', sa.Integer(), nullable=False),
+            sa.Column('count', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+        ]),
+        ('question_guess_errors', [
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('date', sa.String(), nullable=False),
+            sa.Column('question_id', sa.String(), nullable=False),
+            sa.Column('axis', sa.String(), nullable=False),
+            sa.Column('err_bin', sa.Integer(), nullable=False),
+            sa.Column('count', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+        ]),
+        ('signup_surveys', [
+            sa.Column('user_id', sa.String(), nullable=False),
+            sa.Column('party_identity', sa.String(), nullable=True),
+            sa.Column('ideology', sa.String(), nullable=True),
+            sa.Column('warmth_dem', sa.Integer(), nullable=True),
+            sa.Column('warmth_rep', sa.Integer(), nullable=True),
+            sa.Column('engagement', sa.String(), nullable=True),
+            sa.Column('empathy', sa.String(), nullable=True),
+            sa.Column('difference', sa.String(), nullable=True),
+            sa.Column('age_range', sa.String(), nullable=True),
+            sa.Column('education_level', sa.String(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('user_id'),
+        ]),
+    ]
+
+
+def _is_postgres() -> bool:
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def _index_block():
+    """CONCURRENTLY cannot run inside the migration transaction on Postgres."""
+    return op.get_context().autocommit_block() if _is_postgres() else nullcontext()
+
+
+def _record(kind: str, table: str, name: str) -> None:
+    """Note an object this revision created, for downgrade()."""
+    op.execute(_ledger.insert().values(revision=revision, kind=kind, table_name=table, name=name))
+
+
+def _add_missing_columns(table: str, columns: list) -> list:
+    """
+    Add columns that an older create_all-built table lacks. Returns the columns
+    that the model declares NOT NULL but had to be added as nullable, since old
+    rows have no value for them yet.
+    """
+    existing = {c['name'] for c in sa.inspect(op.get_bind()).get_columns(table)}
+    to_tighten = []
+    for column in columns:
+        if not isinstance(column, sa.Column) or column.name in existing or column.primary_key:
+            continue
+        if not column.nullable and column.server_default is None:
+            to_tighten.append(column)
+            column = sa.Column(column.name, column.type, nullable=True)
+        op.add_column(table, column)
+        _record('column', table, column.name)
+    return to_tighten
+
+
+def _backfill(table: str, column: sa.Column) -> None:
+    """Fill a freshly added column for the rows that predate it, where the value can be derived."""
+    if isinstance(column.type, sa.DateTime):
+        op.execute(f"UPDATE {table} SET {column.name} = CURRENT_TIMESTAMP WHERE {column.name} IS NULL")
+    elif table == 'user_answers' and column.name in ('actual_dem', 'actual_rep'):
+        # Answers stored before the ground truth was copied onto them
+        source = column.name.removeprefix('actual_')
+        op.execute(
+            f"UPDATE user_answers SET {column.name} = (SELECT dq.{source} FROM daily_questions dq "
+            "WHERE dq.date = user_answers.date AND dq.question_id = user_answers.question_id) "
+            f"WHERE {column.name} IS NULL"
+        )
+
+
+def _set_not_null(table: str, columns: list) -> None:
+    """Enforce the models' NOT NULL on backfilled columns; refuse if any row is still empty."""
+    if not columns:
+        return
+    for column in columns:
+        missing = op.get_bind().execute(
+            sa.text(f"SELECT count(*) FROM {table} WHERE {column.name} IS NULL")
+        ).scalar()
+        if missing:
+            raise RuntimeError(
+                f"{table}.{column.name} is NULL in {missing} rows that could not be backfilled; "
+                "fill or delete them before upgrading"
+            )
+    # Batch mode: SQLite can only change nullability by recreating the table
+    with op.batch_alter_table(table) as batch:
+        for column in columns:
+            batch.alter_column(column.name, existing_type=column.type, nullable=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(LEDGER):
+        op.create_table(
+            LEDGER,
+            sa.Column('revision', sa.String(), nullable=False),
+            sa.Column('kind', sa.String(), nullable=False),
+            sa.Column('table_name', sa.String(), nullable=False),
+            sa.Column('name', sa.String(), nullable=False),
+        )
+    for name, columns in _tables():
+        if not inspector.has_table(name):
+            op.create_table(name, *columns)
+            _record('table', name, name)
+            continue
+        to_tighten = _add_missing_columns(name, columns)
+        for column in to_tighten:
+            _backfill(name, column)
+        _set_not_null(name, to_tighten)
+
+    inspector = sa.inspect(op.get_bind())
+    existing = {
+        ix['name']
+        for table in {t for _, t, _, _ in INDEXES}
+        for ix in inspector.get_indexes(table)
+    }
+    concurrently = {'postgresql_concurrently': True} if _is_postgres() else {}
+    with _index_block():
+        for name, table, columns, unique in INDEXES:
+            if name not in existing:
+                op.create_index(name, table, columns, unique=unique, **concurrently)
+                _record('index', table, name)
+
+
+def downgrade() -> None:
+    """Downgrade schema: drop only what upgrade() created."""
+    bind = op.get_bind()
+    if sa.inspect(bind).has_table(LEDGER):
+        created = bind.execute(
+            sa.select(_ledger.c.kind, _ledger.c.table_name, _ledger.c.name)
+            .where(_ledger.c.revision == revision)
+        ).all()
+    else:
+        # Upgraded before the ledger existed: only the indexes are known to be ours
+        created = [('index', table, name) for name, table, _, _ in INDEXES]
+    tables = {t for kind, t, _ in created if kind == 'table'}
+
+    concurrently = {'postgresql_concurrently': True} if _is_postgres() else {}
+    with _index_block():
+        for kind, table, name in created:
+            if kind == 'index' and table not in tables:
+                op.drop_index(name, table_name=table, if_exists=True, **concurrently)
+    for table, _ in _tables():
+        dropped = [name for kind, t, name in created if kind == 'column' and t == table]
+        if dropped:
+            with op.batch_alter_table(table) as batch:
+                for name in dropped:
+                    batch.drop_column(name)
+    for name, _ in reversed(_tables()):
+        if name in tables:
+            op.drop_table(name)
+
+    if sa.inspect(bind).has_table(LEDGER):
+        op.execute(_ledger.delete().where(_ledger.c.revision == revision))
+        if not bind.execute(sa.select(sa.func.count()).select_from(_ledger)).scalar():
+            op.drop_table(LEDGER)
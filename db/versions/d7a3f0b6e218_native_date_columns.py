@@ -0,0 +1,82 @@
+"""native date columns
+
+Converts the Eastern-day keys of the gameplay tables from YYYY-MM-DD strings
+to DATE, so date-window filters (weekly leaderboards, archive play, exports)
+are range scans on a real date type and the tables can be range-partitioned
+by date.
+
+On Postgres each column is rewritten in place with USING date::date; the
+indexes that contain it are rebuilt as part of the ALTER, which holds an
+ACCESS EXCLUSIVE lock on the table for the duration. SQLite already stores
+SQLAlchemy dates as YYYY-MM-DD text, so there the values are only validated
+and the tables are recreated with the new declared type.
+
+Revision ID: d7a3f0b6e218
+Revises: c4e1d92a7b35
+Create Date: 2026-10-19 01:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a3f0b6e218'
+down_revision: Union[str, Sequence[str], None] = 'c4e1d92a7b35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+DATE_TABLES = [
+    'daily_questions',
+    'user_answers',
+    'user_daily_scores',
+    'question_guess_cells',
+    'question_guess_errors',
+]
+
+
+def _check_sqlite_dates(table: str) -> None:
+    """Refuse to convert a table holding dates that would not read back as DATE."""
+    bad = op.get_bind().execute(sa.text(
+        f"SELECT date FROM {table} WHERE date IS NOT date(date) LIMIT 1"
+    )).scalar()
+    if bad is not None:
+        raise RuntimeError(f"{table}.date holds {bad!r}, expected YYYY-MM-DD; fix it before upgrading")
+
+
+def _recreate_sqlite_table(table: str, date_type) -> None:
+    """
+    Recreate `table` with `date_type` declared for its date column.
+    The type is given as the reflected one rather than via alter_column: a type
+    change makes batch mode copy with CAST(date AS DATE), and SQLite's numeric
+    affinity turns '2026-01-01' into 2026. The stored text is already right.
+    """
+    with op.batch_alter_table(table, recreate='always',
+                              reflect_args=[sa.Column('date', date_type, nullable=False)]):
+        pass
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+    for table in DATE_TABLES:
+        if is_postgres:
+            op.alter_column(table, 'date', type_=sa.Date(), existing_type=sa.String(),
+                            existing_nullable=False, postgresql_using='date::date')
+            continue
+        _check_sqlite_dates(table)
+        _recreate_sqlite_table(table, sa.Date())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+    for table in reversed(DATE_TABLES):
+        if is_postgres:
+            op.alter_column(table, 'date', type_=sa.String(), existing_type=sa.Date(),
+                            existing_nullable=False, postgresql_using="to_char(date, 'YYYY-MM-DD')")
+            continue
+        _recreate_sqlite_table(table, sa.String())
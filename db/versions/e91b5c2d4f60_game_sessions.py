@@ -0,0 +1,42 @@
+"""game sessions
+
+Server-side state of /api/start_game games (game_store.DBGameStore), replacing
+the question list that used to ride in the session cookie.
+
+Revision ID: e91b5c2d4f60
+Revises: d7a3f0b6e218
+Create Date: 2026-10-19 02:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e91b5c2d4f60'
+down_revision: Union[str, Sequence[str], None] = 'd7a3f0b6e218'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if sa.inspect(op.get_bind()).has_table('game_sessions'):
+        # Already created by init_db (Base.metadata.create_all)
+        return
+    op.create_table(
+        'game_sessions',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('questions', sa.Text(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_game_sessions_expires_at', 'game_sessions', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_game_sessions_expires_at', table_name='game_sessions')
+    op.drop_table('game_sessions')
@@ -0,0 +1,101 @@
+"""backfill signup surveys and cohort columns
+
+Data-only revision for databases that predate the typed signup_surveys table:
+- creates the signup_surveys row of every user whose survey is still only in
+  users.survey_responses (JSON), using the same mapping as the app
+  (cohorts.survey_columns)
+- copies party_identity / ideology onto user_daily_scores and user_stats rows
+  that have no cohort yet, so cohort ranks include existing players
+- fills the user_stats score sums of rollups created before they were tracked
+  (added with a server default of 0)
+
+Rows that already have values are left alone; `python cohorts.py backfill`
+remains available to rebuild everything from users.survey_responses.
+
+Revision ID: f3b8a2c6d1e9
+Revises: e91b5c2d4f60
+Create Date: 2026-10-19 11:20:00.000000
+
+"""
+import json
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8a2c6d1e9'
+down_revision: Union[str, Sequence[str], None] = 'e91b5c2d4f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BATCH_SIZE = 1000
+COHORT_COLUMNS = ('party_identity', 'ideology')
+
+users = sa.table('users', sa.column('uid'), sa.column('survey_responses'))
+signup_surveys = sa.table(
+    'signup_surveys',
+    sa.column('user_id'), sa.column('party_identity'), sa.column('ideology'),
+    sa.column('warmth_dem'), sa.column('warmth_rep'), sa.column('engagement'), sa.column('empathy'),
+    sa.column('difference'), sa.column('age_range'), sa.column('education_level'), sa.column('updated_at'),
+)
+
+
+def _backfill_surveys(bind) -> None:
+    from cohorts import survey_columns  # env.py puts backend/ on the path
+
+    missing = bind.execute(
+        sa.select(users.c.uid, users.c.survey_responses)
+        .where(
+            users.c.survey_responses.is_not(None),
+            ~sa.exists().where(signup_surveys.c.user_id == users.c.uid),
+        )
+    ).all()
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    rows = []
+    for uid, raw in missing:
+        try:
+            responses = json.loads(raw)
+        except (TypeError, ValueError):
+            continue
+        if isinstance(responses, dict) and responses:
+            rows.append({'user_id': uid, **survey_columns(responses), 'updated_at': now})
+    for start in range(0, len(rows), BATCH_SIZE):
+        bind.execute(signup_surveys.insert(), rows[start:start + BATCH_SIZE])
+
+
+def _copy_cohorts(table: str) -> None:
+    assignments = ', '.join(
+        f"{column} = (SELECT s.{column} FROM signup_surveys s WHERE s.user_id = {table}.user_id)"
+        for column in COHORT_COLUMNS
+    )
+    unset = ' AND '.join(f"{table}.{column} IS NULL" for column in COHORT_COLUMNS)
+    op.execute(
+        f"UPDATE {table} SET {assignments} "
+        f"WHERE {unset} AND EXISTS (SELECT 1 FROM signup_surveys s WHERE s.user_id = {table}.user_id)"
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _backfill_surveys(op.get_bind())
+    _copy_cohorts('user_daily_scores')
+    _copy_cohorts('user_stats')
+    sums = ', '.join(
+        f"{target} = (SELECT coalesce(sum(d.{source}), 0) FROM user_daily_scores d "
+        "WHERE d.user_id = user_stats.user_id)"
+        for target, source in (
+            ('score_sum', 'avg_score'), ('score_dem_sum', 'avg_score_dem'), ('score_rep_sum', 'avg_score_rep'),
+        )
+    )
+    op.execute(
+        f"UPDATE user_stats SET {sums} "
+        "WHERE days_completed > 0 AND score_sum = 0 AND score_dem_sum = 0 AND score_rep_sum = 0"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema: nothing to undo; the backfilled values stay valid at the previous revision."""
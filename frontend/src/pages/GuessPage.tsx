@@ -721,7 +721,7 @@ export default function GuessPage() {
                   const done = reveal.completed_all
                   setReveal(null)
                   if (done) {
-                    navigate('/guess/results', { replace: false })
+                    navigate('/guess/results', { replace: false, state: { fresh: true } })
                     return
                   }
                   if (qIndex + 1 < dailyQuestions.length) {
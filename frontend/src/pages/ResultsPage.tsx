@@ -1,5 +1,5 @@
 import { useEffect, useMemo, useState } from 'react'
-import { useSearchParams } from 'react-router-dom'
+import { useLocation, useSearchParams } from 'react-router-dom'
 import { getAuth } from 'firebase/auth'
 const API_URL = import.meta.env.VITE_API_URL;
 
@@ -30,6 +30,8 @@ type ResultsData = {
 export default function ResultsPage() {
   const auth = getAuth()
   const [searchParams] = useSearchParams()
+  // Set by GuessPage right after the last submit: read from the primary, not a lagging replica
+  const justSubmitted = Boolean((useLocation().state as { fresh?: boolean } | null)?.fresh)
   const [resultsData, setResultsData] = useState<ResultsData | null>(null)
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
@@ -60,9 +62,10 @@ export default function ResultsPage() {
       try {
         const userId = auth.currentUser.uid
         const dateParam = searchParams.get('date') // Optional date parameter
-        const url = dateParam 
-          ? `${API_URL}/api/results?user_id=${userId}&date=${dateParam}`
-          : `${API_URL}/api/results?user_id=${userId}`
+        const params = new URLSearchParams({ user_id: userId })
+        if (dateParam) params.set('date', dateParam)
+        if (justSubmitted) params.set('fresh', '1')
+        const url = `${API_URL}/api/results?${params}`
         
         const res = await fetch(url)
         if (!res.ok) {
@@ -90,7 +93,7 @@ export default function ResultsPage() {
     }
 
     loadResults()
-  }, [auth.currentUser, searchParams])
+  }, [auth.currentUser, searchParams, justSubmitted])
 
   // Load global leaderboard rank for current user (independent of daily rank)
   useEffect(() => {
@@ -1,48 +1,35 @@
 import requests
-from scipy.stats import ttest_rel
 
-BACKEND_URL = "https://echo-breaker-backend.onrender.com/api/users/progress"
+BACKEND_URL = "https://echo-breaker-backend.onrender.com/api/stats/improvement"
 
 def main():
-    # 1. Get progress data
-    resp = requests.get(BACKEND_URL)
+    # 1. Get paired improvement statistics (computed server-side)
+    resp = requests.get(BACKEND_URL, params={"min_days": 2})
     resp.raise_for_status()
-    data = resp.json()
-    
-    # 2. Extract paired scores
-    first_scores = []
-    last_scores = []
-    for user in data:
-        try:
-            first = float(user["first_score"])
-            last = float(user["last_score"])
-            first_scores.append(first)
-            last_scores.append(last)
-        except Exception as e:
-            # Just skip if something's missing or broken
-            continue
+    stats = resp.json()
 
-    if not first_scores or not last_scores:
+    if not stats["n"]:
         print("No valid user scores found.")
         return
-    
-    # 3. Compute difference list
-    differences = [last - first for first, last in zip(first_scores, last_scores)]
 
-    print(f"Found {len(differences)} users with paired scores.")
-    print(f"Mean start score: {sum(first_scores)/len(first_scores):.2f}")
-    print(f"Mean finish score: {sum(last_scores)/len(last_scores):.2f}")
-    print(f"Mean difference: {sum(differences)/len(differences):.2f}")
+    print(f"Found {stats['n']} users with paired scores.")
+    print(f"Mean start score: {stats['mean_first']:.2f}")
+    print(f"Mean finish score: {stats['mean_last']:.2f}")
+    print(f"Mean difference: {stats['mean_difference']:.2f}")
 
-    # 4. Paired t-test
-    t_stat, p_value = ttest_rel(last_scores, first_scores)
-    print(f"Paired t-test statistic: {t_stat:.4f}")
+    # 2. Paired t-test
+    t_stat, p_value = stats["t_statistic"], stats["p_value"]
+    if p_value is None:
+        print("Not enough variation in scores for a paired t-test.")
+        return
+    if t_stat is not None:
+        print(f"Paired t-test statistic: {t_stat:.4f}")
     print(f"Paired t-test p-value   : {p_value:.5f}")
-    
+
     if p_value < 0.05:
         print("Result: Statistically significant improvement! 🎉")
     else:
         print("Result: Not statistically significant.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()